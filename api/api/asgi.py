@@ -1,7 +1,29 @@
 import os
 
 from django.core.asgi import get_asgi_application
+from django.db import connections
+from django.urls import get_resolver
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Представления и сериализаторы импортируются при запуске процесса
+# (до fork с gunicorn --preload), а не первым запросом.
+get_resolver().url_patterns
+
+from api_back.bitmaps import title_index  # noqa: E402
+from api_back.events import EVENTS_PATH, title_events  # noqa: E402
+
+# Индекс каталога тоже строится при запуске; соединения закрываются,
+# чтобы воркеры после fork открыли свои.
+title_index.preload()
+connections.close_all()
+
+
+async def application(scope, receive, send):
+    """Потоки событий произведений обслуживаются в обход Django."""
+    if scope['type'] == 'http' and EVENTS_PATH.match(scope['path']):
+        await title_events(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
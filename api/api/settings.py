@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from datetime import timedelta
@@ -28,6 +29,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api_back.memory.MemoryProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -35,6 +37,9 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api_back.profiling.ProfilingMiddleware',
+    'api_back.querylog.QueryLogMiddleware',
+    'api_back.cache.CacheStatusMiddleware',
 ]
 
 ROOT_URLCONF = 'api.urls'
@@ -66,6 +71,29 @@ DATABASES = {
     }
 }
 
+REVIEW_SHARDS = [
+    f'shard_{number}'
+    for number in range(int(os.getenv('REVIEW_SHARDS', 0)))
+]
+
+for alias in REVIEW_SHARDS:
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'{alias}.sqlite3',
+        'OPTIONS': {'timeout': 20},
+    }
+
+DATABASE_ROUTERS = ['reviews.shards.ShardRouter']
+
+# Общий для процессов кэш фасетов и карточек произведений.
+if os.getenv('MEMCACHED_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.getenv('MEMCACHED_LOCATION'),
+        }
+    }
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -118,3 +146,73 @@ AUTH_USER_MODEL = "users.User"
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+
+DELETION_BATCH_SIZE = 500
+
+DELETION_IN_BACKGROUND = True
+
+PRERENDERED_JSON = False
+
+CATALOG_SNAPSHOT = False
+
+CATALOG_SNAPSHOT_PATH = BASE_DIR / 'catalog.snapshot'
+
+ARCHIVE_PATH = BASE_DIR / 'archive.sqlite3'
+
+ARCHIVE_AFTER_DAYS = 730
+
+PROFILING = False
+
+PROFILING_SAMPLE_RATE = 0.0
+
+PROFILING_PATH = BASE_DIR / 'profiles'
+
+PROFILING_MAX_BYTES = 50 * 1024 * 1024
+
+MEMORY_PROFILING = False
+
+MEMORY_TRACE_FRAMES = 1
+
+QUERY_LOG = False
+
+SLOW_QUERY_MS = 100
+
+REPEATED_QUERY_LIMIT = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'api_back.queries': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'api_back.warmup': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+WARM_CACHES_ON_START = False
+
+WARM_CACHES_HOST = 'localhost'
+
+WARM_CACHES_ACCESS_LOG = None
+
+WARM_CACHES_LIMIT = 200
+
+WARM_CACHES_WORKERS = 4
+
+WARM_CACHES_SECONDS = 10
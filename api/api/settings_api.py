@@ -0,0 +1,36 @@
+"""
+Настройки процессов, которые обслуживают только REST API:
+без админки, сессий, сообщений, статики, djoser и django_filters
+в INSTALLED_APPS, ответы только в JSON.
+"""
+from api.settings import *  # noqa: F401,F403
+from api.settings import REST_FRAMEWORK
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'rest_framework',
+    'api_back',
+    'reviews',
+    'users.apps.UsersConfig',
+]
+
+MIDDLEWARE = [
+    'api_back.memory.MemoryProfilingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'api_back.profiling.ProfilingMiddleware',
+    'api_back.querylog.QueryLogMiddleware',
+    'api_back.cache.CacheStatusMiddleware',
+]
+
+ROOT_URLCONF = 'api.urls_api'
+
+TEMPLATES = []
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+    ],
+}
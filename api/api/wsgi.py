@@ -1,7 +1,20 @@
 import os
 
 from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.urls import get_resolver
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
 
 application = get_wsgi_application()
+
+# Представления и сериализаторы импортируются при запуске процесса
+# (до fork с gunicorn --preload), а не первым запросом.
+get_resolver().url_patterns
+
+from api_back.bitmaps import title_index  # noqa: E402
+
+# Индекс каталога тоже строится при запуске; соединения закрываются,
+# чтобы воркеры после fork открыли свои.
+title_index.preload()
+connections.close_all()
@@ -0,0 +1,292 @@
+import json
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from functools import reduce
+from operator import and_, or_
+from typing import Callable, Iterable, Optional, Union
+
+from django.db import DatabaseError, connection
+from django.db.models import QuerySet
+
+from api_back.catalog import get_catalog_version, touch_catalog
+from reviews.models import GenreTitle, Title
+
+MAX_INLINE_IDS: int = 500
+CHUNK_BITS: int = 16
+CHUNK_MASK: int = (1 << CHUNK_BITS) - 1
+ARRAY_LIMIT: int = 4096
+
+Container = Union[int, array]
+
+
+def to_bitmap(ids: Iterable[int]) -> int:
+    """Битовая карта id: бит с номером id установлен у каждого id."""
+    ids = list(ids)
+    if not ids:
+        return 0
+    bits: bytearray = bytearray(max(ids) // 8 + 1)
+    for pk in ids:
+        bits[pk >> 3] |= 1 << (pk & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def from_bitmap(bitmap: int) -> list[int]:
+    """Упорядоченный список id из битовой карты."""
+    ids: list[int] = []
+    data: bytes = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for index, byte in enumerate(data):
+        while byte:
+            low: int = byte & -byte
+            ids.append((index << 3) + low.bit_length() - 1)
+            byte ^= low
+    return ids
+
+
+def dense(container: Container) -> int:
+    if isinstance(container, int):
+        return container
+    return to_bitmap(container)
+
+
+def packed(bits: int) -> Container:
+    """
+    Контейнер блока: до ARRAY_LIMIT id — отсортированный массив
+    по 2 байта на id, плотнее — битовая карта блока (8 КиБ).
+    """
+    if bin(bits).count('1') > ARRAY_LIMIT:
+        return bits
+    return array('H', from_bitmap(bits))
+
+
+class Bitmap:
+    """
+    Сжатая битовая карта id по схеме Roaring: id делятся на блоки
+    по 65536, пустые блоки не хранятся, редкие хранятся массивом.
+    Размер карты зависит от числа id, а не от наибольшего id.
+    Карта не изменяется: add и discard возвращают новую.
+    """
+
+    __slots__ = ('chunks',)
+
+    def __init__(self, chunks: Optional[dict[int, Container]] = None) -> None:
+        self.chunks: dict[int, Container] = chunks or {}
+
+    @classmethod
+    def from_ids(cls, ids: Iterable[int]) -> 'Bitmap':
+        lows: dict[int, list[int]] = defaultdict(list)
+        for pk in ids:
+            lows[pk >> CHUNK_BITS].append(pk & CHUNK_MASK)
+        return cls({
+            high: packed(to_bitmap(values))
+            for high, values in sorted(lows.items())
+        })
+
+    def ids(self) -> list[int]:
+        """Упорядоченный список id."""
+        ids: list[int] = []
+        for high, container in sorted(self.chunks.items()):
+            base: int = high << CHUNK_BITS
+            lows: Iterable[int] = (
+                from_bitmap(container) if isinstance(container, int)
+                else container
+            )
+            ids.extend(base + low for low in lows)
+        return ids
+
+    def __len__(self) -> int:
+        return sum(
+            bin(container).count('1') if isinstance(container, int)
+            else len(container)
+            for container in self.chunks.values()
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.chunks)
+
+    def combine(self, other: 'Bitmap', operation: Callable,
+                highs: Iterable[int]) -> 'Bitmap':
+        chunks: dict[int, Container] = {}
+        for high in highs:
+            bits: int = operation(dense(self.chunks.get(high, 0)),
+                                  dense(other.chunks.get(high, 0)))
+            if bits:
+                chunks[high] = packed(bits)
+        return Bitmap(chunks)
+
+    def __and__(self, other: 'Bitmap') -> 'Bitmap':
+        return self.combine(other, and_, self.chunks.keys() & other.chunks)
+
+    def __or__(self, other: 'Bitmap') -> 'Bitmap':
+        return self.combine(other, or_, self.chunks.keys() | other.chunks)
+
+    def add(self, pk: int) -> 'Bitmap':
+        high, low = pk >> CHUNK_BITS, pk & CHUNK_MASK
+        container: Container = self.chunks.get(high, array('H'))
+        if isinstance(container, int):
+            container = container | 1 << low
+        else:
+            position: int = bisect_left(container, low)
+            if position < len(container) and container[position] == low:
+                return self
+            container = container[:position] + array('H', (low,)) + (
+                container[position:]
+            )
+            if len(container) > ARRAY_LIMIT:
+                container = to_bitmap(container)
+        return Bitmap({**self.chunks, high: container})
+
+    def discard(self, pk: int) -> 'Bitmap':
+        high: int = pk >> CHUNK_BITS
+        if high not in self.chunks:
+            return self
+        bits: int = dense(self.chunks[high]) & ~(1 << (pk & CHUNK_MASK))
+        chunks: dict[int, Container] = dict(self.chunks)
+        if bits:
+            chunks[high] = packed(bits)
+        else:
+            del chunks[high]
+        return Bitmap(chunks)
+
+    def nbytes(self) -> int:
+        """Память, занятая контейнерами блоков."""
+        return sys.getsizeof(self.chunks) + sum(
+            sys.getsizeof(container) for container in self.chunks.values()
+        )
+
+
+EMPTY: Bitmap = Bitmap()
+
+
+def filter_by_ids(queryset: QuerySet, ids: list[int]) -> QuerySet:
+    """
+    Ограничивает выборку списком id. Длинный список в SQLite передаётся
+    одним JSON-параметром, чтобы не упереться в лимит переменных.
+    """
+    if len(ids) <= MAX_INLINE_IDS or connection.vendor != 'sqlite':
+        return queryset.filter(pk__in=ids)
+    table: str = connection.ops.quote_name(queryset.model._meta.db_table)
+    return queryset.extra(
+        where=[f'{table}."id" IN (SELECT value FROM json_each(%s))'],
+        params=[json.dumps(ids)],
+    )
+
+
+class TitleBitmapIndex:
+    """
+    Индекс каталога в памяти процесса: для каждого жанра и категории
+    хранится сжатая битовая карта id произведений. Строится при запуске
+    процесса (api/wsgi.py, api/asgi.py) и после изменения версии каталога
+    в базе другим процессом, изменения произведений в своём процессе
+    применяются точечно.
+    """
+
+    def __init__(self) -> None:
+        self.lock: threading.Lock = threading.Lock()
+        self.version: Optional[str] = None
+        self.genres: dict[str, Bitmap] = {}
+        self.categories: dict[str, Bitmap] = {}
+
+    def build(self) -> None:
+        version: str = get_catalog_version()
+        genres: dict[str, list[int]] = defaultdict(list)
+        categories: dict[str, list[int]] = defaultdict(list)
+        for title_id, slug in GenreTitle.objects.filter(
+                title__is_deleted=False).values_list(
+                'title_id', 'genre__slug').iterator():
+            genres[slug].append(title_id)
+        for title_id, slug in Title.objects.filter(
+                category__isnull=False, is_deleted=False).values_list(
+                'id', 'category__slug').iterator():
+            categories[slug].append(title_id)
+        self.genres = {
+            slug: Bitmap.from_ids(ids) for slug, ids in genres.items()
+        }
+        self.categories = {
+            slug: Bitmap.from_ids(ids) for slug, ids in categories.items()
+        }
+        self.version = version
+
+    def preload(self) -> None:
+        """
+        Построение при запуске процесса. Если таблиц ещё нет
+        (до migrate), индекс строится первым запросом.
+        """
+        try:
+            self.ensure_fresh()
+        except DatabaseError:
+            self.version = None
+
+    def ensure_fresh(self) -> None:
+        version: str = get_catalog_version()
+        if self.version != version:
+            with self.lock:
+                if self.version != version:
+                    self.build()
+
+    def match(self, genres: list[str], categories: list[str],
+              genre_mode: str = 'any') -> Bitmap:
+        """Битовая карта произведений, подходящих под жанры и категории."""
+        self.ensure_fresh()
+        parts: list[Bitmap] = []
+        if genres:
+            bitmaps: list[Bitmap] = [
+                self.genres.get(slug, EMPTY) for slug in genres
+            ]
+            parts.append(reduce(and_ if genre_mode == 'all' else or_,
+                                bitmaps))
+        if categories:
+            parts.append(reduce(or_, (
+                self.categories.get(slug, EMPTY) for slug in categories
+            )))
+        return reduce(and_, parts)
+
+    def update_title(self, title: Title) -> None:
+        """Переносит произведение в актуальные жанры и категорию."""
+        genres: list[str] = list(title.genre.values_list('slug', flat=True))
+        category: Optional[str] = (
+            title.category.slug if title.category_id else None
+        )
+        with self.lock:
+            self.ensure_synced()
+            self.clear(title.id)
+            for slug in genres:
+                self.genres[slug] = self.genres.get(slug, EMPTY).add(title.id)
+            if category is not None:
+                self.categories[category] = self.categories.get(
+                    category, EMPTY
+                ).add(title.id)
+            self.version = touch_catalog()
+
+    def remove_title(self, title_id: int) -> None:
+        with self.lock:
+            self.ensure_synced()
+            self.clear(title_id)
+            self.version = touch_catalog()
+
+    def invalidate(self) -> None:
+        """Полная перестройка при удалении жанра или категории."""
+        with self.lock:
+            touch_catalog()
+            self.version = None
+
+    def ensure_synced(self) -> None:
+        if self.version != get_catalog_version():
+            self.build()
+
+    def clear(self, title_id: int) -> None:
+        for bitmaps in (self.genres, self.categories):
+            for slug, bitmap in list(bitmaps.items()):
+                bitmaps[slug] = bitmap.discard(title_id)
+
+    def nbytes(self) -> int:
+        return sum(
+            bitmap.nbytes()
+            for bitmaps in (self.genres, self.categories)
+            for bitmap in bitmaps.values()
+        )
+
+
+title_index: TitleBitmapIndex = TitleBitmapIndex()
@@ -0,0 +1,173 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+LOCAL_CACHE_SIZE: int = 1024
+FRESH_SECONDS: int = 30
+STALE_SECONDS: int = 300
+LOCK_SECONDS: int = 10
+POLL_SECONDS: float = 0.05
+TITLES_VERSION_KEY: str = 'titles:version'
+CACHE_STATUS_HEADER: str = 'X-Cache'
+
+# Попадания и промахи кэшей за текущий запрос потока.
+cache_lookups: threading.local = threading.local()
+
+
+def record_lookup(hit: bool) -> None:
+    """Отмечает обращение к кэшу в текущем запросе."""
+    lookups: Optional[list] = getattr(cache_lookups, 'values', None)
+    if lookups is not None:
+        lookups.append(hit)
+
+
+def title_version_key(title_id: Any) -> str:
+    return f'title:{title_id}:version'
+
+
+def title_cache_key(title_id: Any, name: str) -> str:
+    """
+    Ключ данных произведения с версиями всего каталога и самого
+    произведения: запись меняет версию, и старые ключи перестают читаться.
+    """
+    keys: list[str] = [TITLES_VERSION_KEY, title_version_key(title_id)]
+    versions: dict = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid4().hex, timeout=None)
+            versions[key] = cache.get(key)
+    return f'title:{title_id}:{name}:' + ':'.join(
+        str(versions[key]) for key in keys
+    )
+
+
+def invalidate_title(title_id: Any) -> None:
+    """Сбрасывает кэш произведения после фиксации транзакции."""
+    transaction.on_commit(lambda: cache.set(
+        title_version_key(title_id), uuid4().hex, timeout=None
+    ))
+
+
+def invalidate_titles() -> None:
+    """Сбрасывает кэш всех произведений после фиксации транзакции."""
+    transaction.on_commit(lambda: cache.set(
+        TITLES_VERSION_KEY, uuid4().hex, timeout=None
+    ))
+
+
+class TieredCache:
+    """
+    Кэш чтения из двух уровней: LRU в памяти процесса перед общим
+    кэшем Django. Отсутствующий ключ вычисляет один поток процесса
+    и один процесс из всех (остальные ждут его результата), устаревшее
+    значение отдаётся, пока его обновляет выигравший блокировку запрос.
+    """
+
+    def __init__(self, size: int = LOCAL_CACHE_SIZE) -> None:
+        self.size: int = size
+        self.lock: threading.Lock = threading.Lock()
+        self.entries: OrderedDict = OrderedDict()
+        self.flights: dict[str, threading.Event] = {}
+
+    def get_or_set(self, key: str, compute: Callable[[], Any]) -> Any:
+        entry: Optional[tuple] = self.local_get(key)
+        if entry is None:
+            entry = cache.get(key)
+            if entry is not None:
+                self.local_set(key, entry)
+        if entry is None:
+            record_lookup(False)
+            return self.fill(key, compute)
+        value, fresh_until = entry
+        if fresh_until > time.time() or not cache.add(
+                f'{key}:lock', 1, timeout=LOCK_SECONDS):
+            record_lookup(True)
+            return value
+        record_lookup(False)
+        return self.refresh(key, compute)
+
+    def fill(self, key: str, compute: Callable[[], Any]) -> Any:
+        with self.lock:
+            flight: Optional[threading.Event] = self.flights.get(key)
+            leader: bool = flight is None
+            if leader:
+                flight = self.flights[key] = threading.Event()
+        if not leader:
+            flight.wait(LOCK_SECONDS)
+            entry: Optional[tuple] = self.local_get(key)
+            return entry[0] if entry is not None else compute()
+        try:
+            if cache.add(f'{key}:lock', 1, timeout=LOCK_SECONDS):
+                return self.refresh(key, compute)
+            deadline: float = time.monotonic() + LOCK_SECONDS
+            while time.monotonic() < deadline:
+                time.sleep(POLL_SECONDS)
+                entry = cache.get(key)
+                if entry is not None:
+                    self.local_set(key, entry)
+                    return entry[0]
+            return self.store(key, compute())
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.set()
+
+    def refresh(self, key: str, compute: Callable[[], Any]) -> Any:
+        try:
+            return self.store(key, compute())
+        finally:
+            cache.delete(f'{key}:lock')
+
+    def store(self, key: str, value: Any) -> Any:
+        entry: tuple = (value, time.time() + FRESH_SECONDS)
+        cache.set(key, entry, timeout=FRESH_SECONDS + STALE_SECONDS)
+        self.local_set(key, entry)
+        return value
+
+    def local_get(self, key: str) -> Optional[tuple]:
+        with self.lock:
+            entry: Optional[tuple] = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] + STALE_SECONDS < time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def local_set(self, key: str, entry: tuple) -> None:
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
+tiered_cache: TieredCache = TieredCache()
+
+
+class CacheStatusMiddleware:
+    """
+    Заголовок X-Cache: HIT, если все обращения запроса к кэшам
+    попали, MISS, если нет. Ответы без обращений к кэшам его не
+    получают. По нему прогрев считает долю попаданий.
+    """
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response: Callable = get_response
+
+    def __call__(self, request: Any) -> Any:
+        cache_lookups.values = []
+        try:
+            response: Any = self.get_response(request)
+            lookups: list[bool] = cache_lookups.values
+        finally:
+            cache_lookups.values = None
+        if lookups:
+            response[CACHE_STATUS_HEADER] = 'HIT' if all(lookups) else 'MISS'
+        return response
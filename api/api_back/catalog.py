@@ -0,0 +1,75 @@
+import threading
+from typing import Optional
+from uuid import uuid4
+
+from django.core.signals import request_finished, request_started
+
+from reviews.models import CatalogVersion
+
+CATALOG_VERSION_KEY: str = 'catalog:version'
+SLUGS_VERSION_KEY: str = 'catalog:slugs:version'
+SNAPSHOT_VERSION_KEY: str = 'catalog:snapshot:version'
+
+# Версии, прочитанные за текущий запрос потока: каждая читается из базы
+# один раз на запрос. Вне запросов (команды, фоновые потоки) не хранятся.
+request_versions: threading.local = threading.local()
+
+
+def start_request(**kwargs) -> None:
+    request_versions.values = {}
+
+
+def finish_request(**kwargs) -> None:
+    request_versions.values = None
+
+
+request_started.connect(start_request, dispatch_uid='catalog_versions_start')
+request_finished.connect(finish_request,
+                         dispatch_uid='catalog_versions_finish')
+
+
+def get_catalog_version(key: str = CATALOG_VERSION_KEY,
+                        initial: Optional[str] = None) -> str:
+    """
+    Текущая версия каталога (произведения, жанры, категории и их связи).
+    Производные структуры в памяти процесса сверяют с ней свою версию.
+    Отдельными ключами версионируются набор slug жанров и категорий
+    и файл снимка каталога. Версии лежат в таблице CatalogVersion,
+    отсутствующая версия создаётся со значением initial или случайным.
+    """
+    known: Optional[dict] = getattr(request_versions, 'values', None)
+    if known is not None and key in known:
+        return known[key]
+    version: Optional[str] = CatalogVersion.objects.filter(
+        key=key
+    ).values_list('version', flat=True).first()
+    if version is None:
+        CatalogVersion.objects.bulk_create(
+            (CatalogVersion(key=key, version=initial or uuid4().hex),),
+            ignore_conflicts=True
+        )
+        version = CatalogVersion.objects.values_list(
+            'version', flat=True
+        ).get(key=key)
+    if known is not None:
+        known[key] = version
+    return version
+
+
+def touch_catalog(key: str = CATALOG_VERSION_KEY) -> str:
+    """
+    Помечает каталог изменённым и возвращает новую версию.
+    Каждый шаг — отдельный запрос, так что SQLite не держит
+    блокировку чтения, которую потом нужно повысить до записи.
+    """
+    version: str = uuid4().hex
+    versions = CatalogVersion.objects.filter(key=key)
+    if not versions.update(version=version):
+        CatalogVersion.objects.bulk_create(
+            (CatalogVersion(key=key, version=version),), ignore_conflicts=True
+        )
+        versions.update(version=version)
+    known: Optional[dict] = getattr(request_versions, 'values', None)
+    if known is not None:
+        known[key] = version
+    return version
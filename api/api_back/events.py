@@ -0,0 +1,231 @@
+import asyncio
+import json
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Optional
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+from reviews.models import Title
+
+EVENTS_PATH: re.Pattern = re.compile(
+    r'^/api/v1/titles/(?P<title_id>\d+)/events/$'
+)
+EVENT_BUFFER_SIZE: int = 100
+KEEPALIVE_SECONDS: float = 15
+RETRY_MILLISECONDS: int = 3000
+KEEPALIVE: bytes = b': keepalive\n\n'
+OVERFLOW: bytes = b'event: overflow\ndata: {}\n\n'
+
+
+def format_event(event: str, data: Any) -> bytes:
+    """Сообщение в формате text/event-stream."""
+    body: str = json.dumps(data, cls=JSONEncoder, ensure_ascii=False)
+    return f'event: {event}\ndata: {body}\n\n'.encode()
+
+
+class Subscriber:
+    """
+    Подписчик на события произведения с ограниченным буфером.
+    Медленный клиент при переполнении получает событие overflow
+    и должен досинхронизироваться через ?cursor= списков.
+    """
+
+    __slots__ = ('buffer', 'waiter', 'overflowed', 'closed')
+
+    def __init__(self) -> None:
+        self.buffer: list[bytes] = []
+        self.waiter: Optional[asyncio.Future] = None
+        self.overflowed: bool = False
+        self.closed: bool = False
+
+    def push(self, payload: bytes) -> None:
+        if len(self.buffer) >= EVENT_BUFFER_SIZE:
+            self.overflowed = True
+        else:
+            self.buffer.append(payload)
+        self.wake()
+
+    def wake(self) -> None:
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
+
+    def close(self) -> None:
+        self.closed = True
+        self.wake()
+
+    async def wait(self) -> None:
+        if self.buffer or self.overflowed or self.closed:
+            return
+        self.waiter = asyncio.get_running_loop().create_future()
+        try:
+            await self.waiter
+        finally:
+            self.waiter = None
+
+    def drain(self) -> list[bytes]:
+        batch: list[bytes] = self.buffer
+        self.buffer = []
+        return batch
+
+
+def fan_out(subscribers: tuple[Subscriber, ...], payload: bytes) -> None:
+    for subscriber in subscribers:
+        subscriber.push(payload)
+
+
+class EventBroker:
+    """
+    Рассылка событий внутри процесса. Подписчики сгруппированы по
+    произведению и циклу событий, публикация из потока представления
+    ставит в каждый цикл одну задачу на всех его подписчиков.
+    Keepalive рассылается одним таймером на цикл, так что ожидающий
+    подписчик не держит ни задач, ни таймеров.
+    """
+
+    def __init__(self) -> None:
+        self.lock: threading.Lock = threading.Lock()
+        self.channels: dict[int, dict] = defaultdict(dict)
+        self.tickers: set[asyncio.AbstractEventLoop] = set()
+
+    def subscribe(self, title_id: int) -> Subscriber:
+        subscriber: Subscriber = Subscriber()
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        with self.lock:
+            self.channels[title_id].setdefault(loop, set()).add(subscriber)
+            start_ticker: bool = loop not in self.tickers
+            self.tickers.add(loop)
+        if start_ticker:
+            loop.call_later(KEEPALIVE_SECONDS, self.keepalive, loop)
+        return subscriber
+
+    def unsubscribe(self, title_id: int, subscriber: Subscriber) -> None:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        with self.lock:
+            loops: dict = self.channels.get(title_id, {})
+            subscribers: set = loops.get(loop, set())
+            subscribers.discard(subscriber)
+            if not subscribers:
+                loops.pop(loop, None)
+            if not loops:
+                self.channels.pop(title_id, None)
+
+    def keepalive(self, loop: asyncio.AbstractEventLoop) -> None:
+        with self.lock:
+            subscribers: list[Subscriber] = [
+                subscriber
+                for loops in self.channels.values()
+                for subscriber in loops.get(loop, ())
+            ]
+            if not subscribers:
+                self.tickers.discard(loop)
+                return
+        for subscriber in subscribers:
+            subscriber.wake()
+        loop.call_later(KEEPALIVE_SECONDS, self.keepalive, loop)
+
+    def subscribers_count(self, title_id: int) -> int:
+        with self.lock:
+            return sum(map(len, self.channels.get(title_id, {}).values()))
+
+    def publish(self, title_id: int, event: str, data: Any) -> None:
+        with self.lock:
+            targets: list = [
+                (loop, tuple(subscribers))
+                for loop, subscribers in self.channels.get(
+                    title_id, {}).items()
+            ]
+        if not targets:
+            return
+        payload: bytes = format_event(event, data)
+        for loop, subscribers in targets:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(fan_out, subscribers, payload)
+
+
+broker: EventBroker = EventBroker()
+
+
+def publish_on_commit(title_id: int, event: str, data: Any) -> None:
+    """Публикует событие после фиксации транзакции."""
+    transaction.on_commit(lambda: broker.publish(int(title_id), event, data))
+
+
+async def watch_disconnect(receive: Callable,
+                           subscriber: Subscriber) -> None:
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+    subscriber.close()
+
+
+async def stream_title(title_id: int, receive: Callable,
+                       send: Callable) -> None:
+    """Отдаёт события произведения, пока клиент не отключится."""
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': f'retry: {RETRY_MILLISECONDS}\n\n'.encode(),
+        'more_body': True,
+    })
+    subscriber: Subscriber = broker.subscribe(title_id)
+    watcher: asyncio.Future = asyncio.ensure_future(
+        watch_disconnect(receive, subscriber)
+    )
+    try:
+        while True:
+            await subscriber.wait()
+            if subscriber.closed:
+                return
+            chunks: list[bytes] = subscriber.drain()
+            if subscriber.overflowed:
+                chunks.append(OVERFLOW)
+            await send({
+                'type': 'http.response.body',
+                'body': b''.join(chunks) or KEEPALIVE,
+                'more_body': not subscriber.overflowed,
+            })
+            if subscriber.overflowed:
+                return
+    finally:
+        broker.unsubscribe(title_id, subscriber)
+        watcher.cancel()
+
+
+@sync_to_async
+def title_exists(title_id: int) -> bool:
+    return Title.objects.filter(pk=title_id, is_deleted=False).exists()
+
+
+async def send_error(send: Callable, status: int, detail: str) -> None:
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': json.dumps({'detail': detail}).encode(),
+    })
+
+
+async def title_events(scope: dict, receive: Callable,
+                       send: Callable) -> None:
+    """ASGI-обработчик /api/v1/titles/{title_id}/events/."""
+    title_id: int = int(EVENTS_PATH.match(scope['path'])['title_id'])
+    if scope['method'] != 'GET':
+        await send_error(send, 405, 'Method not allowed.')
+    elif not await title_exists(title_id):
+        await send_error(send, 404, 'Not found.')
+    else:
+        await stream_title(title_id, receive, send)
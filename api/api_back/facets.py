@@ -0,0 +1,70 @@
+import hashlib
+from collections import Counter
+
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.http import QueryDict
+
+from api_back.bitmaps import Bitmap, title_index
+from api_back.cache import record_lookup
+from api_back.catalog import get_catalog_version
+
+FACETS_CACHE_TIMEOUT: int = 300
+IGNORED_PARAMS: tuple[str, ...] = ('page', 'ordering', 'stats')
+
+
+def facets_cache_key(params: QueryDict) -> str:
+    """
+    Ключ кэша по нормализованному фильтру и версии каталога:
+    порядок параметров и значений в списках через запятую не важен.
+    """
+    normalized: list[str] = sorted(
+        f'{name}={",".join(sorted(set(value.split(","))))}'
+        for name, values in params.lists()
+        if name not in IGNORED_PARAMS
+        for value in values
+        if value
+    )
+    digest: str = hashlib.md5('&'.join(normalized).encode()).hexdigest()
+    return f'facets:{get_catalog_version()}:{digest}'
+
+
+def count_facets(queryset: QuerySet) -> dict:
+    """
+    Количество произведений по жанрам, категориям и десятилетиям за один
+    проход по отфильтрованной выборке; жанры и категории считаются
+    пересечением с битовыми картами индекса каталога.
+    """
+    decades: Counter = Counter()
+    ids: list[int] = []
+    for title_id, year in queryset.order_by().values_list('id', 'year'):
+        ids.append(title_id)
+        decades[year // 10 * 10] += 1
+    matched: Bitmap = Bitmap.from_ids(ids)
+    title_index.ensure_fresh()
+
+    def intersect(bitmaps: dict[str, Bitmap]) -> dict[str, int]:
+        counts: dict[str, int] = {
+            slug: len(bitmap & matched)
+            for slug, bitmap in list(bitmaps.items())
+        }
+        return {slug: count for slug, count in sorted(counts.items())
+                if count}
+
+    return {
+        'count': len(ids),
+        'genre': intersect(title_index.genres),
+        'category': intersect(title_index.categories),
+        'decade': {str(decade): count
+                   for decade, count in sorted(decades.items())},
+    }
+
+
+def title_facets(queryset: QuerySet, params: QueryDict) -> dict:
+    key: str = facets_cache_key(params)
+    facets: dict = cache.get(key)
+    record_lookup(facets is not None)
+    if facets is None:
+        facets = count_facets(queryset)
+        cache.set(key, facets, FACETS_CACHE_TIMEOUT)
+    return facets
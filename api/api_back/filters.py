@@ -1,24 +1,111 @@
 from django_filters import rest_framework as filters
+from django_filters.constants import EMPTY_VALUES
+from rest_framework.filters import OrderingFilter
 
+from api_back.bitmaps import Bitmap, filter_by_ids, title_index
 from reviews.models import Title
 
+GENRE_MODES: tuple[tuple[str, str]] = (('all', 'all'), ('any', 'any'))
+
+
+class SlugListFilter(filters.BaseInFilter, filters.CharFilter):
+    """Список slug через запятую."""
+
+
+class TieBreakingOrderingFilter(filters.OrderingFilter):
+    """
+    Сортировка с добором по ключу в направлении последнего поля:
+    порядок стабилен и пригоден для постраничной выборки по ключу.
+    Для полей связанной модели добор идёт по её ключу, а связь
+    соединяется через INNER JOIN, чтобы сортировку обслужил её индекс.
+    """
+
+    def __init__(self, *args, tie_breakers: dict = None, **kwargs) -> None:
+        self.tie_breakers: dict = tie_breakers or {}
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        ordering: list[str] = [
+            self.get_ordering_value(param) for param in value
+        ]
+        last: str = value[-1].lstrip('-')
+        tie_breaker: str = self.tie_breakers.get(last, 'id')
+        if '__' in tie_breaker:
+            relation: str = tie_breaker.split('__', 1)[0]
+            qs = qs.filter(**{f'{relation}__isnull': False})
+        if ordering[-1].startswith('-'):
+            tie_breaker = f'-{tie_breaker}'
+        return qs.order_by(*ordering, tie_breaker)
+
+
+class TieBreakingOrderingBackend(OrderingFilter):
+    """Сортировка по ?ordering= с добором по id, как у TitlesFilter."""
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        tie_breaker: str = '-id' if ordering[-1].startswith('-') else 'id'
+        return (*ordering, tie_breaker)
+
 
 class TitlesFilter(filters.FilterSet):
-    """Фильтр для модели Title"""
+    """
+    Фильтр для модели Title.
+    Жанры (?genre=a,b&genre_mode=all|any) и категории (?category=a,b)
+    отбираются по битовым картам индекса каталога.
+    Сортировки обслуживаются индексами Title и TitleStats.
+    """
 
     name = filters.CharFilter(
         field_name='name',
         lookup_expr='icontains'
     )
-    category = filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='icontains'
+    category = SlugListFilter(method='filter_catalog')
+    genre = SlugListFilter(method='filter_catalog')
+    genre_mode = filters.ChoiceFilter(
+        choices=GENRE_MODES,
+        method='filter_catalog'
     )
-    genre = filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains'
+    year_min = filters.NumberFilter(
+        field_name='year',
+        lookup_expr='gte'
+    )
+    year_max = filters.NumberFilter(
+        field_name='year',
+        lookup_expr='lte'
+    )
+    ordering = TieBreakingOrderingFilter(
+        fields=(
+            ('stats__rating', 'rating'),
+            ('year', 'year'),
+            ('name', 'name'),
+            ('stats__reviews_count', 'reviews_count'),
+        ),
+        tie_breakers={
+            'rating': 'stats__title_id',
+            'reviews_count': 'stats__title_id',
+        }
     )
 
     class Meta:
         model = Title
         fields = ('name', 'year', 'genre', 'category')
+
+    def filter_catalog(self, queryset, name, value):
+        """Жанры и категории применяются вместе в filter_queryset."""
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        data: dict = self.form.cleaned_data
+        genres: list[str] = data.get('genre') or []
+        categories: list[str] = data.get('category') or []
+        if not (genres or categories):
+            return queryset
+        bitmap: Bitmap = title_index.match(
+            genres, categories, data.get('genre_mode') or 'any'
+        )
+        return filter_by_ids(queryset, bitmap.ids())
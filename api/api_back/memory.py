@@ -0,0 +1,133 @@
+import threading
+import tracemalloc
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+MEMORY_HEADER: str = 'X-Memory-Peak'
+IGNORED_FILES: tuple[tracemalloc.Filter, ...] = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+class RouteMemory:
+    """Пик и удержанная память запросов одного маршрута."""
+
+    def __init__(self) -> None:
+        self.requests: int = 0
+        self.peak_max: int = 0
+        self.peak_total: int = 0
+        self.retained_total: int = 0
+
+    def add(self, peak: int, retained: int) -> None:
+        self.requests += 1
+        self.peak_max = max(self.peak_max, peak)
+        self.peak_total += peak
+        self.retained_total += retained
+
+    def as_dict(self, route: str) -> dict:
+        return {
+            'route': route,
+            'requests': self.requests,
+            'peak_max': self.peak_max,
+            'peak_avg': self.peak_total // self.requests,
+            'retained_total': self.retained_total,
+            'retained_avg': self.retained_total // self.requests,
+        }
+
+
+class MemoryTracker:
+    """
+    Учёт памяти запросов процесса через tracemalloc. Пик отслеживается
+    на весь процесс, поэтому измеряемые запросы выполняются по одному;
+    отчёт запрашивается изнутри измеряемого запроса.
+    """
+
+    def __init__(self) -> None:
+        self.lock: threading.RLock = threading.RLock()
+        self.routes: dict[str, RouteMemory] = {}
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(settings.MEMORY_TRACE_FRAMES)
+
+    def measure(self, request: Any, get_response: Callable) -> Any:
+        with self.lock:
+            before: int = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            response: Any = get_response(request)
+            current, peak = tracemalloc.get_traced_memory()
+            match = getattr(request, 'resolver_match', None)
+            route: str = match.view_name if match else request.path_info
+            self.routes.setdefault(route, RouteMemory()).add(
+                peak - before, current - before
+            )
+            if self.baseline is None:
+                self.baseline = self.snapshot()
+        response[MEMORY_HEADER] = str(peak - before)
+        return response
+
+    def snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(IGNORED_FILES)
+
+    def report(self, limit: int) -> dict:
+        """
+        Память по маршрутам, самые крупные места выделения памяти
+        и места, где она выросла с первого измеренного запроса.
+        """
+        with self.lock:
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot: tracemalloc.Snapshot = self.snapshot()
+            routes: list[dict] = [
+                stats.as_dict(route) for route, stats in self.routes.items()
+            ]
+            baseline: Optional[tracemalloc.Snapshot] = self.baseline
+        growth: list = []
+        if baseline is not None:
+            growth = snapshot.compare_to(baseline, 'lineno')[:limit]
+        return {
+            'traced': current,
+            'traced_peak': peak,
+            'routes': sorted(routes, key=lambda route: route['peak_max'],
+                             reverse=True),
+            'sites': [
+                {'site': str(stat.traceback), 'size': stat.size,
+                 'count': stat.count}
+                for stat in snapshot.statistics('lineno')[:limit]
+            ],
+            'growth': [
+                {'site': str(stat.traceback), 'size_diff': stat.size_diff,
+                 'count_diff': stat.count_diff}
+                for stat in growth if stat.size_diff
+            ],
+        }
+
+    def reset(self) -> None:
+        with self.lock:
+            self.routes.clear()
+            self.baseline = None
+
+
+memory_tracker: MemoryTracker = MemoryTracker()
+
+
+class MemoryProfilingMiddleware:
+    """
+    Пиковая и удержанная память каждого запроса по маршрутам,
+    пик возвращается в заголовке X-Memory-Peak. Включается настройкой
+    MEMORY_PROFILING, без неё промежуточный слой отключается.
+    """
+
+    def __init__(self, get_response: Callable) -> None:
+        if not settings.MEMORY_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response: Callable = get_response
+        memory_tracker.start()
+
+    def __call__(self, request: Any) -> Any:
+        return memory_tracker.measure(request, self.get_response)
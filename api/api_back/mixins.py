@@ -1,4 +1,14 @@
-from rest_framework import mixins, viewsets
+from collections.abc import Sequence
+from typing import Callable
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import QuerySet
+from rest_framework import mixins, permissions, viewsets
+from rest_framework.response import Response
+
+from api_back.snapshot import catalog_snapshot, plain_list
+from api_back.sync import is_sync_request, sync_page
+from reviews.shards import use_shard
 
 
 class DeleteCreateListViewSet(mixins.ListModelMixin,
@@ -16,3 +26,84 @@ class UpdateRetrieveViewSet(mixins.UpdateModelMixin,
                             viewsets.GenericViewSet):
     """Миксин позволяет изменять и возвращать объект"""
     pass
+
+
+class DeltaSyncMixin:
+    """
+    Миксин отдаёт в списке только изменения и удаления,
+    если передан ?since= или ?cursor=
+    """
+
+    def get_sync_streams(self) -> dict:
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        if is_sync_request(request):
+            return Response(sync_page(request, self.get_sync_streams()))
+        return super().list(request, *args, **kwargs)
+
+
+class TitleShardMixin:
+    """
+    Миксин направляет запросы к отзывам и комментариям в шард
+    произведения из URL. Запрос на запись идёт в транзакции шарда.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with use_shard(kwargs['title_id']) as alias:
+            if alias == DEFAULT_DB_ALIAS or (
+                    request.method in permissions.SAFE_METHODS):
+                return super().dispatch(request, *args, **kwargs)
+            with transaction.atomic(using=alias):
+                return super().dispatch(request, *args, **kwargs)
+
+
+class SnapshotListMixin:
+    """
+    Миксин отдаёт список без фильтров из снимка каталога,
+    если снимок включён и актуален.
+    """
+
+    snapshot_rows: str
+
+    def list(self, request, *args, **kwargs):
+        snapshot = catalog_snapshot.current()
+        if snapshot is None or not plain_list(request):
+            return super().list(request, *args, **kwargs)
+        rows = getattr(snapshot, self.snapshot_rows)
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(list(rows))
+        return self.get_paginated_response(page)
+
+
+class ArchiveTail(Sequence):
+    """
+    Строки выборки, за которыми следуют архивные: пагинатор
+    читает архив, когда страницы горячих строк заканчиваются.
+    """
+
+    def __init__(self, queryset: QuerySet, archived: int,
+                 load: Callable[[int, int], list]) -> None:
+        self.queryset: QuerySet = queryset
+        self.hot: int = queryset.count()
+        self.archived: int = archived
+        self.load: Callable[[int, int], list] = load
+
+    def __len__(self) -> int:
+        return self.hot + self.archived
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            rows: list = self[index:index + 1] if index >= 0 else []
+            if not rows:
+                raise IndexError(index)
+            return rows[0]
+        start, stop, _ = index.indices(len(self))
+        rows = []
+        if start < self.hot:
+            rows = list(self.queryset[start:min(stop, self.hot)])
+        if stop > self.hot:
+            offset: int = max(start - self.hot, 0)
+            rows += self.load(offset, stop - self.hot - offset)
+        return rows
@@ -0,0 +1,91 @@
+import base64
+import binascii
+import json
+from typing import Any, Optional
+
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Постраничная выборка по ключу сортировки без OFFSET: токен cursor
+    хранит ключ последней строки страницы, следующая страница читается
+    по индексу условием «после этого ключа». Стоимость страницы
+    не зависит от её номера, а вставки не сдвигают страницы.
+    """
+
+    ordering: tuple[str, ...] = ()
+    page_size: int = api_settings.PAGE_SIZE
+    cursor_query_param: str = 'cursor'
+
+    def paginate_queryset(self, queryset: QuerySet, request: Any,
+                          view: Any = None) -> list:
+        self.request: Any = request
+        token: Optional[str] = request.query_params.get(
+            self.cursor_query_param
+        )
+        queryset = queryset.order_by(*self.ordering)
+        if token:
+            queryset = queryset.filter(self.after(self.decode(token)))
+        rows: list = list(queryset[:self.page_size + 1])
+        self.next_key: Optional[list] = None
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            self.next_key = [
+                getattr(rows[-1], field.lstrip('-'))
+                for field in self.ordering
+            ]
+        return rows
+
+    def after(self, key: list) -> Q:
+        """Строки после ключа в порядке ordering (сравнение кортежей)."""
+        condition: Optional[Q] = None
+        for field, value in reversed(list(zip(self.ordering, key))):
+            name: str = field.lstrip('-')
+            lookup: str = 'lt' if field.startswith('-') else 'gt'
+            step: Q = Q(**{f'{name}__{lookup}': value})
+            if condition is not None:
+                step |= Q(**{name: value}) & condition
+            condition = step
+        return condition
+
+    def encode(self, key: list) -> str:
+        data: bytes = json.dumps(key, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+    def decode(self, token: str) -> list:
+        try:
+            key: Any = json.loads(base64.urlsafe_b64decode(
+                token + '=' * (-len(token) % 4)
+            ))
+        except (binascii.Error, ValueError):
+            key = None
+        if not isinstance(key, list) or len(key) != len(self.ordering) or (
+                not all(isinstance(value, (int, float)) for value in key)):
+            raise ValidationError({
+                self.cursor_query_param: 'Некорректный токен продолжения'
+            })
+        return key
+
+    def get_next_link(self) -> Optional[str]:
+        if self.next_key is None:
+            return None
+        url: str = remove_query_param(
+            self.request.build_absolute_uri(), 'page'
+        )
+        return replace_query_param(url, self.cursor_query_param,
+                                   self.encode(self.next_key))
+
+    def get_paginated_response(self, data: list) -> Response:
+        return Response({'next': self.get_next_link(), 'results': data})
+
+
+class LeaderboardPagination(KeysetPagination):
+    """Рейтинг по убыванию взвешенного рейтинга, при равенстве — по id."""
+
+    ordering: tuple[str, ...] = ('-weighted_rating', 'title_id')
@@ -42,3 +42,12 @@ class IsAdminOrSuperuser(BasePermission):
         if request.user.is_anonymous:
             return False
         return (request.user.is_admin or request.user.is_superuser)
+
+
+class IsModerator(BasePermission):
+    """Разрешение на уровне модератора, админа или суперюзера"""
+
+    def has_permission(self, request, view):
+        if request.user.is_anonymous:
+            return False
+        return (request.user.is_moderator or request.user.is_superuser)
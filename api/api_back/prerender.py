@@ -0,0 +1,113 @@
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db.models import F, QuerySet
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from api_back.serializers import ReadOnlyTitleSerializer, ReviewSerializer
+from reviews.models import Review, Title
+from reviews.shards import review_databases, with_authors
+
+BATCH_SIZE: int = 500
+
+
+def prerendered(request) -> bool:
+    """Собирать ли ответ из готовых JSON-фрагментов."""
+    return settings.PRERENDERED_JSON and (
+        request.accepted_renderer.format == 'json'
+    )
+
+
+def render(data: dict) -> str:
+    return JSONRenderer().render(data).decode()
+
+
+def title_queryset() -> QuerySet:
+    return Title.objects.annotate(
+        rating=F('stats__rating')
+    ).select_related('category').prefetch_related('genre')
+
+
+def review_queryset() -> QuerySet:
+    return with_authors(Review.objects.all())
+
+
+def render_title(title: Title) -> str:
+    return render(ReadOnlyTitleSerializer(title).data)
+
+
+def render_review(review: Review) -> str:
+    return render(ReviewSerializer(review).data)
+
+
+def refresh_titles(title_ids: Iterable[int]) -> None:
+    """Перестраивает фрагменты произведений, если режим включён."""
+    if not settings.PRERENDERED_JSON:
+        return
+    title_ids = list(title_ids)
+    for start in range(0, len(title_ids), BATCH_SIZE):
+        titles: list[Title] = list(title_queryset().filter(
+            pk__in=title_ids[start:start + BATCH_SIZE]
+        ))
+        for title in titles:
+            title.rendered = render_title(title)
+        Title.objects.bulk_update(titles, ('rendered',))
+
+
+def refresh_reviews(review_ids: Optional[Iterable[int]] = None,
+                    author_id: Optional[int] = None) -> None:
+    """
+    Перестраивает фрагменты отзывов по id или по автору
+    во всех базах, где могут лежать отзывы.
+    """
+    if not settings.PRERENDERED_JSON:
+        return
+    reviews: QuerySet = review_queryset()
+    if author_id is not None:
+        reviews = reviews.filter(author_id=author_id)
+    if review_ids is not None:
+        reviews = reviews.filter(pk__in=list(review_ids))
+    for alias in review_databases():
+        last_pk: int = 0
+        while True:
+            batch: list[Review] = list(reviews.using(alias).filter(
+                pk__gt=last_pk
+            ).order_by('pk')[:BATCH_SIZE])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for review in batch:
+                review.rendered = render_review(review)
+            Review.objects.using(alias).bulk_update(batch, ('rendered',))
+
+
+def fragments(page: list, queryset: QuerySet, render_row) -> list[bytes]:
+    """
+    Фрагменты строк страницы. Строки без фрагмента (после массовой
+    загрузки) сериализуются на лету, архивные строки — как есть.
+    """
+    missing: list[int] = [row.pk for row in page if not row.rendered]
+    fresh: dict[int, str] = {}
+    if missing:
+        fresh = {
+            row.pk: render_row(row)
+            for row in queryset.filter(pk__in=missing)
+        }
+    return [
+        (row.rendered or fresh.get(row.pk) or render_row(row)).encode()
+        for row in page
+    ]
+
+
+def paginated_response(paginator, page: list, queryset: QuerySet,
+                       render_row) -> HttpResponse:
+    """Ответ списка, склеенный из конверта пагинации и фрагментов."""
+    envelope: dict = paginator.get_paginated_response([]).data
+    head: bytes = JSONRenderer().render({
+        name: value for name, value in envelope.items() if name != 'results'
+    })
+    body: bytes = head[:-1] + b',"results":[' + b','.join(
+        fragments(page, queryset, render_row)
+    ) + b']}'
+    return HttpResponse(body, content_type='application/json')
@@ -0,0 +1,208 @@
+import cProfile
+import json
+import random
+import re
+import threading
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Callable, Optional
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.serializers import BaseSerializer
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+PROFILE_HEADER: str = 'HTTP_X_PROFILE'
+PROFILE_NAME: re.Pattern = re.compile(r'^[\w.-]+$')
+TOP_QUERIES: int = 20
+SERIALIZER_FUNCTIONS: tuple[tuple, ...] = (
+    cProfile.label(BaseSerializer.data.fget.__code__),
+    cProfile.label(BaseSerializer.is_valid.__code__),
+)
+
+running: threading.Lock = threading.Lock()
+
+
+class QueryTimer:
+    """Число и время выполнения каждого SQL-запроса во всех базах."""
+
+    def __init__(self) -> None:
+        self.queries: dict[str, list] = {}
+
+    def __call__(self, execute: Callable, sql: str, params: Any,
+                 many: bool, context: dict) -> Any:
+        started: float = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            entry: list = self.queries.setdefault(sql, [0, 0.0])
+            entry[0] += 1
+            entry[1] += time.perf_counter() - started
+
+    def summary(self) -> dict:
+        top: list = sorted(
+            self.queries.items(), key=lambda item: item[1][1], reverse=True
+        )[:TOP_QUERIES]
+        return {
+            'sql_count': sum(count for count, _ in self.queries.values()),
+            'sql_ms': round(sum(
+                seconds for _, seconds in self.queries.values()
+            ) * 1000, 3),
+            'queries': [
+                {'sql': sql, 'count': count, 'ms': round(seconds * 1000, 3)}
+                for sql, (count, seconds) in top
+            ],
+        }
+
+
+def profile_dir() -> Path:
+    return Path(settings.PROFILING_PATH)
+
+
+def profile_path(name: str) -> Optional[Path]:
+    """Путь к сохранённому профилю или None для чужого имени."""
+    if not PROFILE_NAME.match(name):
+        return None
+    path: Path = profile_dir() / f'{name}.prof'
+    return path if path.is_file() else None
+
+
+def list_profiles() -> list[dict]:
+    """Сводки сохранённых профилей, новые первыми."""
+    if not profile_dir().is_dir():
+        return []
+    summaries: list[dict] = []
+    for path in profile_dir().glob('*.json'):
+        try:
+            summaries.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return sorted(summaries, key=lambda summary: summary['created'],
+                  reverse=True)
+
+
+def prune_profiles() -> None:
+    """Удаление старых профилей со сводками сверх PROFILING_MAX_BYTES."""
+    profiles: dict[str, list] = {}
+    for path in profile_dir().iterdir():
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entry: list = profiles.setdefault(path.stem, [stat.st_mtime, 0, []])
+        entry[0] = min(entry[0], stat.st_mtime)
+        entry[1] += stat.st_size
+        entry[2].append(path)
+    total: int = sum(size for _, size, _ in profiles.values())
+    for _, size, paths in sorted(profiles.values(),
+                                 key=lambda entry: entry[0]):
+        if total <= settings.PROFILING_MAX_BYTES:
+            break
+        for path in paths:
+            path.unlink(missing_ok=True)
+        total -= size
+
+
+def save_profile(profile: cProfile.Profile, summary: dict) -> None:
+    directory: Path = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    profile.dump_stats(directory / f'{summary["name"]}.prof')
+    (directory / f'{summary["name"]}.json').write_text(json.dumps(summary))
+    prune_profiles()
+
+
+def serializer_seconds(profile: cProfile.Profile) -> float:
+    """
+    Время сериализации: накопленное время BaseSerializer.data
+    и is_valid, вложенные сериализаторы уже учтены в нём.
+    """
+    import pstats
+
+    stats: dict = pstats.Stats(profile).stats
+    return sum(
+        stats[function][3] for function in SERIALIZER_FUNCTIONS
+        if function in stats
+    )
+
+
+def requested_by_admin(request: Any) -> bool:
+    try:
+        found: Optional[tuple] = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return found is not None and (found[0].is_admin or found[0].is_superuser)
+
+
+class ProfilingMiddleware:
+    """
+    Профилирование отдельных запросов к API: по заголовку X-Profile
+    от администратора или случайно с долей PROFILING_SAMPLE_RATE.
+    Профиль cProfile сохраняется в PROFILING_PATH вместе со сводкой
+    по SQL и времени сериализаторов, общий размер файлов ограничен
+    PROFILING_MAX_BYTES. Без PROFILING промежуточный слой отключается.
+    """
+
+    def __init__(self, get_response: Callable) -> None:
+        if not settings.PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response: Callable = get_response
+
+    def __call__(self, request: Any) -> Any:
+        if not self.wanted(request):
+            return self.get_response(request)
+        try:
+            route: str = resolve(request.path_info).view_name
+        except Resolver404:
+            return self.get_response(request)
+        if not route.startswith('api:') or not running.acquire(False):
+            return self.get_response(request)
+        try:
+            return self.profile(request, route)
+        finally:
+            running.release()
+
+    def wanted(self, request: Any) -> bool:
+        if PROFILE_HEADER in request.META:
+            return requested_by_admin(request)
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    def profile(self, request: Any, route: str) -> Any:
+        timer: QueryTimer = QueryTimer()
+        profile: cProfile.Profile = cProfile.Profile()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            started: float = time.perf_counter()
+            profile.enable()
+            try:
+                response: Any = self.get_response(request)
+            finally:
+                profile.disable()
+            total: float = time.perf_counter() - started
+        serializers: float = serializer_seconds(profile)
+        created = timezone.now()
+        name: str = '{}-{}-{}'.format(
+            created.strftime('%Y%m%dT%H%M%S'),
+            route.replace(':', '.'),
+            uuid4().hex[:8]
+        )
+        save_profile(profile, {
+            'name': name,
+            'created': created.isoformat(),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'route': route,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 3),
+            'serializer_ms': round(serializers * 1000, 3),
+            'view_ms': round((total - serializers) * 1000, 3),
+            **timer.summary(),
+        })
+        response['X-Profile-Id'] = name
+        return response
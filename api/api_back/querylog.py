@@ -0,0 +1,156 @@
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import ExitStack
+from types import FrameType
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import Serializer
+
+SUMMARY_HEADER: str = 'X-Query-Summary'
+TO_REPRESENTATION = Serializer.to_representation.__code__
+
+logger: logging.Logger = logging.getLogger('api_back.queries')
+
+
+def serializer_field(frame: Optional[FrameType]) -> Optional[str]:
+    """Поле сериализатора, которое сейчас заполняется, — Класс.поле."""
+    while frame is not None:
+        if frame.f_code is TO_REPRESENTATION and 'field' in frame.f_locals:
+            return '{}.{}'.format(
+                type(frame.f_locals['self']).__name__,
+                frame.f_locals['field'].field_name
+            )
+        frame = frame.f_back
+    return None
+
+
+def code_source(frame: Optional[FrameType]) -> Optional[str]:
+    """Ближайшая к запросу строка кода проекта."""
+    project: str = str(settings.BASE_DIR) + os.sep
+    while frame is not None:
+        filename: str = frame.f_code.co_filename
+        if (filename.startswith(project) and filename != __file__
+                and 'site-packages' not in filename):
+            return '{}:{} in {}'.format(
+                os.path.relpath(filename, project), frame.f_lineno,
+                frame.f_code.co_name
+            )
+        frame = frame.f_back
+    return None
+
+
+class QueryRecorder:
+    """
+    Запросы одного HTTP-запроса: медленные записываются сразу,
+    одинаковые запросы с REPEATED_QUERY_LIMIT-го повтора — в конце.
+    Место в коде и поле сериализатора определяются по стеку только
+    для таких запросов.
+    """
+
+    def __init__(self, request: Any) -> None:
+        self.request: Any = request
+        self.view: Optional[str] = None
+        self.action: Optional[str] = None
+        self.count: int = 0
+        self.seconds: float = 0.0
+        self.slow: int = 0
+        self.repeated: dict[str, dict] = {}
+        self.seen: dict[str, int] = {}
+
+    def __call__(self, execute: Callable, sql: str, params: Any,
+                 many: bool, context: dict) -> Any:
+        started: float = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed: float = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            self.seen[sql] = self.seen.get(sql, 0) + 1
+            if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+                self.slow += 1
+                self.log('slow_query', sql, context['connection'].alias,
+                         ms=round(elapsed * 1000, 3))
+            if sql in self.repeated:
+                self.repeated[sql]['ms'] += elapsed * 1000
+            elif self.seen[sql] == settings.REPEATED_QUERY_LIMIT:
+                self.repeated[sql] = self.attribution(
+                    sql, context['connection'].alias
+                )
+                self.repeated[sql]['ms'] = elapsed * 1000
+
+    def attribution(self, sql: str, database: str) -> dict:
+        frame: FrameType = sys._getframe(1)
+        return {
+            'method': self.request.method,
+            'path': self.request.path,
+            'view': self.view,
+            'action': self.action,
+            'serializer_field': serializer_field(frame),
+            'source': code_source(frame),
+            'database': database,
+            'sql': sql,
+        }
+
+    def log(self, event: str, sql: str, database: str, **extra: Any) -> None:
+        logger.warning(json.dumps({
+            'event': event, **self.attribution(sql, database), **extra
+        }, ensure_ascii=False))
+
+    def finish(self) -> None:
+        for sql, entry in self.repeated.items():
+            logger.warning(json.dumps({
+                'event': 'repeated_query',
+                **entry,
+                'count': self.seen[sql],
+                'ms': round(entry['ms'], 3),
+            }, ensure_ascii=False))
+
+    def summary(self) -> str:
+        return 'count={}; time_ms={:.1f}; slow={}; repeated={}'.format(
+            self.count, self.seconds * 1000, self.slow, len(self.repeated)
+        )
+
+
+class QueryLogMiddleware:
+    """
+    Журнал медленных (дольше SLOW_QUERY_MS) и повторяющихся в одном
+    запросе SQL-запросов строками JSON в логгер api_back.queries
+    с представлением DRF, действием и полем сериализатора.
+    С DEBUG сводка по запросам возвращается в заголовке X-Query-Summary.
+    Включается настройкой QUERY_LOG.
+    """
+
+    def __init__(self, get_response: Callable) -> None:
+        if not settings.QUERY_LOG:
+            raise MiddlewareNotUsed
+        self.get_response: Callable = get_response
+
+    def __call__(self, request: Any) -> Any:
+        recorder: QueryRecorder = QueryRecorder(request)
+        request.query_recorder = recorder
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response: Any = self.get_response(request)
+        recorder.finish()
+        if settings.DEBUG:
+            response[SUMMARY_HEADER] = recorder.summary()
+        return response
+
+    def process_view(self, request: Any, view_func: Callable,
+                     view_args: tuple, view_kwargs: dict) -> None:
+        recorder: QueryRecorder = request.query_recorder
+        view: Any = getattr(view_func, 'cls', view_func)
+        recorder.view = getattr(view, '__name__', repr(view))
+        actions: Optional[dict] = getattr(view_func, 'actions', None)
+        if actions:
+            recorder.action = actions.get(request.method.lower())
+        else:
+            recorder.action = request.method.lower()
@@ -4,15 +4,25 @@ from typing import Any
 from django.contrib.auth.tokens import default_token_generator
 from django.core import validators
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
-from reviews.models import Title, Genre, Category, Comment, Review
-from reviews.constants import ONE_POINT, TEN_POINTS
+from api_back.slugs import CATEGORY, GENRE, slug_map
+from api_back.utils import find_users
+from reviews.models import (Title, Genre, Category, Comment, GenreTitle,
+                            Review, TitleStats, LeaderboardEntry, Tombstone)
+from reviews.archive import archive
+from reviews.constants import MAX_BULK_IDS, ONE_POINT, TEN_POINTS
 from users.models import User
 from users.validators import ValidateUsername
 
 
+def with_stats(request) -> bool:
+    """Запрошен ли блок статистики оценок."""
+    return request.query_params.get('stats', '').lower() in ('1', 'true')
+
+
 class CategorySerializer(serializers.ModelSerializer):
     """Сериализатор для модели Category"""
 
@@ -37,19 +47,26 @@ class GenreSerializer(serializers.ModelSerializer):
         model: type[Genre] = Genre
 
 
+def does_not_exist(value: str) -> str:
+    return serializers.SlugRelatedField.default_error_messages[
+        'does_not_exist'
+    ].format(slug_name='slug', value=value)
+
+
 class TitleSerializer(serializers.ModelSerializer):
-    """Сериализатор для модели Title"""
+    """
+    Сериализатор для модели Title.
+    Slug жанров и категории разрешаются одним запросом в validate,
+    связи с жанрами записываются одной пакетной вставкой.
+    """
 
-    genre = serializers.SlugRelatedField(
-        slug_field='slug', many=True, queryset=Genre.objects.all()
-    )
-    category = serializers.SlugRelatedField(
-        slug_field='slug', queryset=Category.objects.all()
-    )
+    genre = serializers.ListField(child=serializers.CharField())
+    category = serializers.CharField()
 
     class Meta:
         model: type[Title] = Title
         fields: str = '__all__'
+        read_only_fields: tuple[str] = ('is_deleted',)
 
     def perform_create(self, serializer):
         serializer.is_valid(raise_exception=True)
@@ -63,21 +80,119 @@ class TitleSerializer(serializers.ModelSerializer):
             )
         return value
 
+    def validate(self, attrs: dict) -> dict:
+        genres: list[str] = attrs.get('genre', [])
+        categories: list[str] = (
+            [attrs['category']] if 'category' in attrs else []
+        )
+        ids: dict[str, dict[str, int]] = slug_map.resolve(genres, categories)
+        errors: dict[str, list[str]] = {}
+        missing: list[str] = [
+            slug for slug in genres if slug not in ids[GENRE]
+        ]
+        if missing:
+            errors['genre'] = [does_not_exist(slug) for slug in missing]
+        if categories and categories[0] not in ids[CATEGORY]:
+            errors['category'] = [does_not_exist(categories[0])]
+        if errors:
+            raise serializers.ValidationError(errors)
+        if 'genre' in attrs:
+            attrs['genre'] = list(dict.fromkeys(
+                ids[GENRE][slug] for slug in genres
+            ))
+        if 'category' in attrs:
+            attrs['category_id'] = ids[CATEGORY][attrs.pop('category')]
+        return attrs
+
+    def create(self, validated_data: dict) -> Title:
+        genre_ids: list[int] = validated_data.pop('genre', [])
+        title: Title = Title.objects.create(**validated_data)
+        self.link_genres(title, genre_ids)
+        return title
+
+    def update(self, instance: Title, validated_data: dict) -> Title:
+        genre_ids: list[int] = validated_data.pop('genre', None)
+        instance = super().update(instance, validated_data)
+        if genre_ids is not None:
+            links = GenreTitle.objects.filter(title=instance)
+            current: set[int] = set(
+                links.values_list('genre_id', flat=True)
+            )
+            if current - set(genre_ids):
+                links.exclude(genre_id__in=genre_ids).delete()
+            self.link_genres(instance, [
+                genre_id for genre_id in genre_ids if genre_id not in current
+            ])
+        return instance
+
+    def link_genres(self, title: Title, genre_ids: list[int]) -> None:
+        if genre_ids:
+            GenreTitle.objects.bulk_create(
+                GenreTitle(title=title, genre_id=genre_id)
+                for genre_id in genre_ids
+            )
+
     def to_representation(self, instance):
         return ReadOnlyTitleSerializer(instance).data
 
 
+class TitleStatsSerializer(serializers.ModelSerializer):
+    """Сериализатор для модели TitleStats"""
+
+    histogram = serializers.ListField(
+        child=serializers.IntegerField(), read_only=True
+    )
+
+    class Meta:
+        model: type[TitleStats] = TitleStats
+        fields: tuple[str] = ('reviews_count', 'rating', 'histogram')
+
+
 class ReadOnlyTitleSerializer(serializers.ModelSerializer):
-    """Сериализатор для модели Title(GET-запросы)"""
+    """
+    Сериализатор для модели Title(GET-запросы).
+    Блок stats выводится только по запросу с параметром ?stats=true.
+    """
 
     rating = serializers.IntegerField(read_only=True, default=0)
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
+    stats = TitleStatsSerializer(read_only=True)
 
     class Meta:
         model: type[Title] = Title
         fields: str = (
-            'id', 'name', 'year', 'rating', 'description', 'genre', 'category'
+            'id', 'name', 'year', 'rating', 'description', 'genre', 'category',
+            'stats'
+        )
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if not (request and with_stats(request)):
+            self.fields.pop('stats')
+
+
+class LeaderboardSerializer(serializers.ModelSerializer):
+    """Сериализатор для модели LeaderboardEntry"""
+
+    id = serializers.IntegerField(source='title_id', read_only=True)
+    name = serializers.CharField(source='title.name', read_only=True)
+    year = serializers.IntegerField(source='title.year', read_only=True)
+    rating = serializers.FloatField(
+        source='title.stats.rating', read_only=True
+    )
+    reviews_count = serializers.IntegerField(
+        source='title.stats.reviews_count', read_only=True
+    )
+    genre = GenreSerializer(source='title.genre', many=True, read_only=True)
+    category = CategorySerializer(source='title.category', read_only=True)
+
+    class Meta:
+        model: type[LeaderboardEntry] = LeaderboardEntry
+        fields: tuple[str] = (
+            'id', 'name', 'year', 'rating', 'reviews_count',
+            'weighted_rating', 'genre', 'category'
         )
 
 
@@ -105,7 +220,9 @@ class ReviewSerializer(serializers.ModelSerializer):
     class Meta:
         model: type[Review] = Review
         fields: str = (
-            'id', 'text', 'author', 'score', 'pub_date')
+            'id', 'text', 'author', 'score', 'pub_date', 'comments_count',
+            'last_comment_at')
+        read_only_fields: tuple[str] = ('comments_count', 'last_comment_at')
 
     def validate_score(self, value: int) -> int:
         if ONE_POINT > value or TEN_POINTS < value:
@@ -120,14 +237,142 @@ class ReviewSerializer(serializers.ModelSerializer):
             return data
         author: User = self.context.get('request').user
         title_id: int = self.context.get('view').kwargs.get('title_id')
-        if Review.objects.filter(author=author, title=title_id).exists():
+        if Review.objects.filter(author=author, title=title_id).exists() or (
+                archive.has_review(title_id, author.id)):
             raise serializers.ValidationError(
                 'Вы уже оставляли отзыв на это произведение'
             )
         return data
 
 
-class UserSerializer(ValidateUsername, serializers.ModelSerializer):
+class SyncReviewSerializer(ReviewSerializer):
+    """Сериализатор изменённого отзыва для синхронизации"""
+
+    title = serializers.IntegerField(source='title_id', read_only=True)
+
+    class Meta(ReviewSerializer.Meta):
+        fields: tuple[str] = ReviewSerializer.Meta.fields + (
+            'title', 'updated_at'
+        )
+
+
+class SyncCommentSerializer(CommentSerializer):
+    """Сериализатор изменённого комментария для синхронизации"""
+
+    review = serializers.IntegerField(source='review_id', read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields: tuple[str] = CommentSerializer.Meta.fields + (
+            'review', 'updated_at'
+        )
+
+
+class TombstoneSerializer(serializers.ModelSerializer):
+    """Сериализатор для модели Tombstone"""
+
+    id = serializers.IntegerField(source='object_id', read_only=True)
+    title = serializers.IntegerField(source='title_id', read_only=True)
+    review = serializers.IntegerField(source='review_id', read_only=True)
+
+    class Meta:
+        model: type[Tombstone] = Tombstone
+        fields: tuple[str] = ('kind', 'id', 'title', 'review', 'deleted_at')
+
+
+class BulkDeleteSerializer(serializers.Serializer):
+    """
+    Сериализатор условий массового удаления: автор, списки id
+    отзывов и комментариев или текст за период.
+    """
+
+    author = serializers.SlugRelatedField(
+        slug_field='username',
+        queryset=User.objects.all(),
+        required=False
+    )
+    reviews = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=MAX_BULK_IDS,
+        required=False
+    )
+    comments = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=MAX_BULK_IDS,
+        required=False
+    )
+    text = serializers.CharField(min_length=3, max_length=256, required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, data: dict) -> dict:
+        """Ровно один способ отбора; поиск по тексту — только за период."""
+        modes: list[bool] = [
+            'author' in data,
+            'reviews' in data or 'comments' in data,
+            'text' in data,
+        ]
+        if sum(modes) != 1:
+            raise serializers.ValidationError(
+                'Укажите автора, списки id или текст'
+            )
+        if 'text' in data and 'since' not in data:
+            raise serializers.ValidationError(
+                {'since': 'Поиск по тексту требует начала периода'}
+            )
+        data.setdefault('until', timezone.now())
+        return data
+
+
+class UserLookupMixin:
+    """
+    Проверка уникальности username и email по пользователям, найденным
+    одним запросом. Представление может передать найденных по исходным
+    данным пользователей в context['users'].
+    """
+
+    LOOKUP_FIELDS: tuple[str, str] = ('username', 'email')
+
+    def get_fields(self) -> dict:
+        fields: dict = super().get_fields()
+        self.unique_messages: dict[str, str] = {}
+        for name, field in fields.items():
+            for validator in field.validators:
+                if isinstance(validator, UniqueValidator):
+                    self.unique_messages[name] = validator.message
+            field.validators = [
+                validator for validator in field.validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+        return fields
+
+    def matching_users(self, attrs: dict) -> list[User]:
+        users: Any = self.context.get('users')
+        if users is None or any(
+                attrs[name] != self.initial_data.get(name)
+                for name in self.LOOKUP_FIELDS if name in attrs):
+            users = self.context['users'] = find_users(
+                attrs.get('username'), email=attrs.get('email')
+            )
+        return users
+
+    def validate_unique(self, attrs: dict, users: list[User]) -> None:
+        others: list[User] = [
+            user for user in users
+            if self.instance is None or user.pk != self.instance.pk
+        ]
+        errors: dict = {
+            name: [message]
+            for name, message in self.unique_messages.items()
+            if name in attrs and any(
+                getattr(user, name) == attrs[name] for user in others
+            )
+        }
+        if errors:
+            raise serializers.ValidationError(errors)
+
+
+class UserSerializer(UserLookupMixin, ValidateUsername,
+                     serializers.ModelSerializer):
     """Сериализатор для модели User"""
 
     username = serializers.CharField(
@@ -159,32 +404,50 @@ class UserSerializer(ValidateUsername, serializers.ModelSerializer):
 
     def validate(self, attrs: Any) -> Any:
         """Проверка на зарегистрированную почту и имя пользователя"""
-        if User.objects.filter(email=attrs.get('email')).exists():
-            user: User = User.objects.get(email=attrs.get('email'))
-            if user.username != attrs.get('username'):
-                raise serializers.ValidationError(
-                    {
-                        "Ошибка": "Электронная почта уже используется!"
-                    }
-                )
-        if User.objects.filter(username=attrs.get('username')).exists():
-            user: User = User.objects.get(username=attrs.get('username'))
-            if user.email != attrs.get('email'):
-                raise serializers.ValidationError(
-                    {
-                        "Ошибка": "Имя пользователя уже использовано!"
-                    }
-                )
+        users: list[User] = self.matching_users(attrs)
+        self.validate_unique(attrs, users)
+        email: Any = attrs.get('email')
+        username: Any = attrs.get('username')
+        if any(user.email == email and user.username != username
+               for user in users):
+            raise serializers.ValidationError(
+                {
+                    "Ошибка": "Электронная почта уже используется!"
+                }
+            )
+        if any(user.username == username and user.email != email
+               for user in users):
+            raise serializers.ValidationError(
+                {
+                    "Ошибка": "Имя пользователя уже использовано!"
+                }
+            )
         return super().validate(attrs)
 
 
-class UserSignUpSerializer(ValidateUsername, serializers.ModelSerializer):
+class UserSignUpSerializer(UserLookupMixin, ValidateUsername,
+                           serializers.ModelSerializer):
     """Сериализатор для регистрации модели User"""
 
     class Meta:
         model: type[User] = User
         fields: tuple[str, str] = ('email', 'username')
 
+    def validate(self, attrs: dict) -> dict:
+        """
+        Повторная регистрация с теми же данными отдаёт существующего
+        пользователя в поле user: ему отправляется новый код.
+        """
+        users: list[User] = self.matching_users(attrs)
+        for user in users:
+            if (user.username == attrs['username']
+                    and user.email == attrs['email']
+                    and not user.is_deleted):
+                attrs['user'] = user
+                return attrs
+        self.validate_unique(attrs, users)
+        return attrs
+
 
 class UserTokenSerializer(serializers.Serializer):
     """Сериализотор для получения токена пользователем"""
@@ -198,7 +461,9 @@ class UserTokenSerializer(serializers.Serializer):
 
     def validate(self, data: dict) -> dict:
         """Проверка наличия кода подтверждения"""
-        user: User = get_object_or_404(User, username=data['username'])
+        user: User = get_object_or_404(
+            User, username=data['username'], is_deleted=False
+        )
         token = data['confirmation_code']
         confirmation_code: bool = default_token_generator.check_token(
             user, token)
@@ -206,4 +471,5 @@ class UserTokenSerializer(serializers.Serializer):
             raise serializers.ValidationError(
                 {'Код подтверждения отсутствует'}
             )
+        data['user'] = user
         return data
@@ -0,0 +1,72 @@
+import threading
+from typing import Optional
+
+from django.db import transaction
+from django.db.models import CharField, Value
+
+from api_back.catalog import (SLUGS_VERSION_KEY, get_catalog_version,
+                              touch_catalog)
+from reviews.models import Category, Genre
+
+GENRE: str = 'genre'
+CATEGORY: str = 'category'
+
+
+class SlugMap:
+    """
+    Соответствие slug → id жанров и категорий в памяти процесса.
+    Заполняется по мере обращений: все отсутствующие slug одного
+    запроса загружаются одним запросом к базе. Сбрасывается при
+    создании и удалении жанров и категорий в любом процессе.
+    """
+
+    def __init__(self) -> None:
+        self.lock: threading.Lock = threading.Lock()
+        self.version: Optional[str] = None
+        self.ids: dict[str, dict[str, int]] = {GENRE: {}, CATEGORY: {}}
+
+    def resolve(self, genres: list[str],
+                categories: list[str]) -> dict[str, dict[str, int]]:
+        """id найденных slug по видам; ненайденных slug в ответе нет."""
+        wanted: dict[str, list[str]] = {GENRE: genres, CATEGORY: categories}
+        version: str = get_catalog_version(SLUGS_VERSION_KEY)
+        with self.lock:
+            if self.version != version:
+                self.ids = {GENRE: {}, CATEGORY: {}}
+                self.version = version
+            ids: dict[str, dict[str, int]] = self.ids
+            missing: dict[str, list[str]] = {
+                kind: [slug for slug in slugs if slug not in ids[kind]]
+                for kind, slugs in wanted.items()
+            }
+        if any(missing.values()):
+            self.load(ids, missing)
+        return {
+            kind: {slug: ids[kind][slug] for slug in slugs
+                   if slug in ids[kind]}
+            for kind, slugs in wanted.items()
+        }
+
+    def load(self, ids: dict[str, dict[str, int]],
+             missing: dict[str, list[str]]) -> None:
+        querysets: list = [
+            model.objects.filter(slug__in=missing[kind]).order_by().annotate(
+                kind=Value(kind, output_field=CharField())
+            ).values_list('kind', 'slug', 'id')
+            for kind, model in ((GENRE, Genre), (CATEGORY, Category))
+            if missing[kind]
+        ]
+        queryset = querysets[0]
+        if len(querysets) > 1:
+            queryset = queryset.union(*querysets[1:], all=True)
+        rows: list[tuple] = list(queryset)
+        with self.lock:
+            for kind, slug, pk in rows:
+                ids[kind][slug] = pk
+
+    def invalidate(self) -> None:
+        """Сброс после фиксации транзакции во всех процессах."""
+        transaction.on_commit(lambda: touch_catalog(SLUGS_VERSION_KEY))
+
+
+slug_map: SlugMap = SlugMap()
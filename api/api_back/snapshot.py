@@ -0,0 +1,344 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from api_back.catalog import (SNAPSHOT_VERSION_KEY, get_catalog_version,
+                              touch_catalog)
+from api_back.serializers import ReadOnlyTitleSerializer
+from reviews.models import Category, Genre, GenreTitle, Title, TitleStats
+
+MAGIC: bytes = b'CATSNAP1'
+PREFIX: struct.Struct = struct.Struct('<8sI')
+ALIGN: int = 8
+COLUMNS: tuple[tuple[str, str], ...] = (
+    ('strings', 'I'),
+    ('text', 'B'),
+    ('genre_id', 'q'),
+    ('genre_name', 'I'),
+    ('genre_slug', 'I'),
+    ('category_id', 'q'),
+    ('category_name', 'I'),
+    ('category_slug', 'I'),
+    ('title_id', 'q'),
+    ('title_year', 'q'),
+    ('title_name', 'I'),
+    ('title_description', 'I'),
+    ('title_category', 'i'),
+    ('title_genres', 'I'),
+    ('links', 'I'),
+)
+
+
+class SnapshotError(Exception):
+    """Файл снимка повреждён или собран на другой платформе."""
+
+
+def aligned(size: int) -> int:
+    return -(-size // ALIGN) * ALIGN
+
+
+class StringTable:
+    """Строки снимка: смещения в массиве и общий UTF-8 буфер."""
+
+    def __init__(self) -> None:
+        self.index: dict[str, int] = {}
+        self.offsets: array = array('I', (0,))
+        self.text: bytearray = bytearray()
+
+    def add(self, value: str) -> int:
+        if value not in self.index:
+            self.text += value.encode()
+            self.offsets.append(len(self.text))
+            self.index[value] = len(self.index)
+        return self.index[value]
+
+
+def compile_catalog(version: str) -> bytes:
+    """
+    Собирает каталог в бинарный снимок: заголовок JSON с версией
+    и расположением колонок, затем выровненные колонки-массивы.
+    Жанры и категории идут в порядке имени, произведения по id,
+    жанры произведения хранятся отрезками общего массива links.
+    """
+    strings: StringTable = StringTable()
+    columns: dict[str, array] = {
+        name: array(code) for name, code in COLUMNS
+    }
+    positions: dict[str, dict[int, int]] = {}
+    for prefix, model in (('genre', Genre), ('category', Category)):
+        positions[prefix] = {}
+        for pk, name, slug in model.objects.order_by(
+                'name', 'id').values_list('id', 'name', 'slug'):
+            positions[prefix][pk] = len(columns[f'{prefix}_id'])
+            columns[f'{prefix}_id'].append(pk)
+            columns[f'{prefix}_name'].append(strings.add(name))
+            columns[f'{prefix}_slug'].append(strings.add(slug))
+    links: dict[int, list[int]] = defaultdict(list)
+    for title_id, genre_id in GenreTitle.objects.values_list(
+            'title_id', 'genre_id').iterator():
+        links[title_id].append(positions['genre'][genre_id])
+    columns['title_genres'].append(0)
+    for pk, name, year, description, category_id in Title.objects.filter(
+            is_deleted=False).order_by('id').values_list(
+            'id', 'name', 'year', 'description', 'category_id').iterator():
+        columns['title_id'].append(pk)
+        columns['title_year'].append(year)
+        columns['title_name'].append(strings.add(name))
+        columns['title_description'].append(strings.add(description))
+        columns['title_category'].append(
+            positions['category'].get(category_id, -1)
+        )
+        columns['links'].extend(sorted(links.get(pk, ())))
+        columns['title_genres'].append(len(columns['links']))
+    columns['strings'] = strings.offsets
+    columns['text'] = array('B', strings.text)
+
+    layout: dict[str, list] = {}
+    body: bytearray = bytearray()
+    for name, code in COLUMNS:
+        data: bytes = columns[name].tobytes()
+        layout[name] = [code, len(body), len(data)]
+        body += data + bytes(aligned(len(data)) - len(data))
+    header: bytes = json.dumps({
+        'version': version,
+        'itemsizes': {code: array(code).itemsize for _, code in COLUMNS},
+        'columns': layout,
+    }).encode()
+    prefix: bytes = PREFIX.pack(MAGIC, len(header)) + header
+    return prefix + bytes(aligned(len(prefix)) - len(prefix)) + bytes(body)
+
+
+class Rows(Sequence):
+    """Ленивая последовательность строк снимка для пагинатора."""
+
+    def __init__(self, count: int, row: Callable[[int], dict]) -> None:
+        self.size: int = count
+        self.row: Callable[[int], dict] = row
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.row(i) for i in range(*index.indices(self.size))]
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        return self.row(index)
+
+
+class Snapshot:
+    """
+    Снимок каталога, отображённый в память только для чтения.
+    Колонки — срезы memoryview над mmap, так что процессы делят
+    страницы файла через page cache, а строки декодируются при чтении.
+    """
+
+    def __init__(self, path: Path) -> None:
+        with open(path, 'rb') as file:
+            stat: os.stat_result = os.fstat(file.fileno())
+            self.stat_key: tuple = (
+                stat.st_ino, stat.st_mtime_ns, stat.st_size
+            )
+            self.map: mmap.mmap = mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        view: memoryview = memoryview(self.map)
+        try:
+            magic, size = PREFIX.unpack_from(self.map)
+            header: dict = json.loads(bytes(
+                view[PREFIX.size:PREFIX.size + size]
+            ))
+        except (struct.error, ValueError):
+            raise SnapshotError(path)
+        if magic != MAGIC or any(
+                array(code).itemsize != itemsize
+                for code, itemsize in header['itemsizes'].items()):
+            raise SnapshotError(path)
+        self.version: str = header['version']
+        start: int = aligned(PREFIX.size + size)
+        self.columns: dict[str, memoryview] = {
+            name: view[start + offset:start + offset + length].cast(code)
+            for name, (code, offset, length) in header['columns'].items()
+        }
+        self.genres: Rows = Rows(len(self.columns['genre_id']),
+                                 lambda index: self.named('genre', index))
+        self.categories: Rows = Rows(
+            len(self.columns['category_id']),
+            lambda index: self.named('category', index)
+        )
+        self.titles: Rows = Rows(len(self.columns['title_id']), self.title)
+
+    def string(self, index: int) -> str:
+        offsets: memoryview = self.columns['strings']
+        return str(
+            self.columns['text'][offsets[index]:offsets[index + 1]], 'utf-8'
+        )
+
+    def named(self, prefix: str, index: int) -> dict:
+        return {
+            'name': self.string(self.columns[f'{prefix}_name'][index]),
+            'slug': self.string(self.columns[f'{prefix}_slug'][index]),
+        }
+
+    def title(self, index: int) -> dict:
+        """Произведение в формате ReadOnlyTitleSerializer без рейтинга."""
+        columns: dict[str, memoryview] = self.columns
+        category: int = columns['title_category'][index]
+        return {
+            'id': columns['title_id'][index],
+            'name': self.string(columns['title_name'][index]),
+            'year': columns['title_year'][index],
+            'rating': None,
+            'description': self.string(columns['title_description'][index]),
+            'genre': [
+                self.named('genre', genre)
+                for genre in columns['links'][
+                    columns['title_genres'][index]:
+                    columns['title_genres'][index + 1]
+                ]
+            ],
+            'category': (
+                self.named('category', category) if category >= 0 else None
+            ),
+        }
+
+    def find_title(self, pk: int) -> Optional[dict]:
+        ids: memoryview = self.columns['title_id']
+        index: int = bisect_left(ids, pk)
+        if index < len(ids) and ids[index] == pk:
+            return self.title(index)
+        return None
+
+
+class CatalogSnapshot:
+    """
+    Снимок каталога процесса. Файл перечитывается, когда его
+    подменили, и отдаётся, только если его версия совпадает с версией
+    каталога в кэше. Запись в каталог меняет версию и пересобирает
+    файл в фоновом потоке с атомарной подменой.
+    """
+
+    def __init__(self) -> None:
+        self.lock: threading.Lock = threading.Lock()
+        self.snapshot: Optional[Snapshot] = None
+        self.worker: Optional[threading.Thread] = None
+        self.wanted: bool = False
+
+    @property
+    def path(self) -> Path:
+        return Path(settings.CATALOG_SNAPSHOT_PATH)
+
+    def current(self) -> Optional[Snapshot]:
+        """Снимок, если режим включён и снимок актуален."""
+        if not settings.CATALOG_SNAPSHOT:
+            return None
+        snapshot: Optional[Snapshot] = self.mapped()
+        if snapshot is None:
+            return None
+        version: str = get_catalog_version(
+            SNAPSHOT_VERSION_KEY, snapshot.version
+        )
+        return snapshot if snapshot.version == version else None
+
+    def mapped(self) -> Optional[Snapshot]:
+        try:
+            stat: os.stat_result = os.stat(self.path)
+        except OSError:
+            return None
+        key: tuple = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            if self.snapshot is None or self.snapshot.stat_key != key:
+                try:
+                    self.snapshot = Snapshot(self.path)
+                except (OSError, ValueError, KeyError, SnapshotError):
+                    self.snapshot = None
+            return self.snapshot
+
+    def build(self) -> int:
+        """
+        Пишет снимок текущей версии рядом с рабочим файлом и подменяет
+        его. Если за время сборки каталог снова изменился, снимок
+        отбрасывается: его заменит сборка, запущенная этим изменением.
+        Возвращает размер файла или 0, если снимок отброшен.
+        """
+        version: str = get_catalog_version(SNAPSHOT_VERSION_KEY)
+        data: bytes = compile_catalog(version)
+        temporary: Path = self.path.with_name(
+            f'.{self.path.name}.{os.getpid()}.{threading.get_ident()}'
+        )
+        with open(temporary, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        if get_catalog_version(SNAPSHOT_VERSION_KEY) != version:
+            os.remove(temporary)
+            return 0
+        os.replace(temporary, self.path)
+        return len(data)
+
+    def rebuild(self) -> None:
+        """Пересборка после фиксации транзакции, если режим включён."""
+        if settings.CATALOG_SNAPSHOT:
+            transaction.on_commit(self.start_worker)
+
+    def start_worker(self) -> None:
+        touch_catalog(SNAPSHOT_VERSION_KEY)
+        with self.lock:
+            self.wanted = True
+            if self.worker is not None and self.worker.is_alive():
+                return
+            self.worker = threading.Thread(
+                target=self.work, name='catalog-snapshot', daemon=True
+            )
+            self.worker.start()
+
+    def work(self) -> None:
+        try:
+            while True:
+                with self.lock:
+                    if not self.wanted:
+                        self.worker = None
+                        return
+                    self.wanted = False
+                self.build()
+        finally:
+            connection.close()
+
+
+catalog_snapshot: CatalogSnapshot = CatalogSnapshot()
+
+
+def plain_list(request) -> bool:
+    """Запрошена ли страница списка без фильтров и сортировок."""
+    return set(request.query_params) <= {'page', 'format'}
+
+
+def with_ratings(titles: list[dict]) -> list[dict]:
+    """
+    Дополняет произведения снимка рейтингом одним запросом.
+    Рейтинг приводится полем rating ReadOnlyTitleSerializer, чтобы
+    ответ не отличался от ответа, собранного из базы.
+    """
+    ratings: dict[int, Optional[float]] = dict(TitleStats.objects.filter(
+        title_id__in=[title['id'] for title in titles]
+    ).values_list('title_id', 'rating'))
+    field = ReadOnlyTitleSerializer().fields['rating']
+    for title in titles:
+        rating: Optional[float] = ratings.get(title['id'])
+        title['rating'] = (
+            None if rating is None else field.to_representation(rating)
+        )
+    return titles
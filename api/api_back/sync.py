@@ -0,0 +1,112 @@
+import base64
+import binascii
+import heapq
+import json
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Optional, Union
+
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import Serializer
+
+SYNC_PAGE_SIZE: int = 100
+SYNC_COMMIT_LAG: timedelta = timedelta(seconds=2)
+
+Stream = tuple[Union[QuerySet, list[QuerySet]], str, type[Serializer]]
+
+
+def is_sync_request(request) -> bool:
+    """Запрошены ли только изменения (?since= или ?cursor=)."""
+    return 'since' in request.query_params or (
+        'cursor' in request.query_params
+    )
+
+
+def encode_cursor(cursors: dict[str, tuple[str, int]]) -> str:
+    data: bytes = json.dumps(cursors, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> dict[str, tuple[str, int]]:
+    try:
+        data: bytes = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        cursors: dict = json.loads(data)
+        return {
+            name: (str(value[0]), int(value[1]))
+            for name, value in cursors.items()
+        }
+    except (binascii.Error, ValueError, TypeError, IndexError,
+            AttributeError):
+        raise ValidationError({'cursor': 'Некорректный токен продолжения'})
+
+
+def parse_since(value: str) -> str:
+    moment: Optional[datetime] = parse_datetime(value.replace(' ', '+'))
+    if moment is None:
+        raise ValidationError({'since': 'Ожидается дата и время ISO 8601'})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, timezone.utc)
+    return moment.isoformat()
+
+
+def changed_after(queryset: QuerySet, field: str,
+                  cursor: tuple[str, int], until: datetime) -> QuerySet:
+    """
+    Строки, изменённые после курсора (время, id), в порядке индекса.
+    Самые свежие изменения откладываются на SYNC_COMMIT_LAG, чтобы
+    не пропустить транзакции, зафиксированные позже своего времени.
+    """
+    moment: datetime = parse_datetime(cursor[0])
+    return queryset.filter(
+        Q(**{f'{field}__gt': moment})
+        | Q(**{field: moment, 'pk__gt': cursor[1]}),
+        **{f'{field}__lte': until}
+    ).order_by(field, 'pk')
+
+
+def changed_rows(querysets: Union[QuerySet, list[QuerySet]], field: str,
+                 cursor: tuple[str, int], until: datetime) -> list:
+    """
+    Строки потока после курсора. Поток из нескольких выборок
+    (шардов) сливается в общий порядок (время, id).
+    """
+    if isinstance(querysets, QuerySet):
+        querysets = [querysets]
+    return list(islice(heapq.merge(
+        *(changed_after(queryset, field, cursor, until)[:SYNC_PAGE_SIZE + 1]
+          for queryset in querysets),
+        key=lambda row: (getattr(row, field), row.pk)
+    ), SYNC_PAGE_SIZE + 1))
+
+
+def sync_page(request, streams: dict[str, Stream]) -> dict:
+    """
+    Страница изменений по нескольким потокам (изменённые строки,
+    удаления). Токен next продолжает выборку с места остановки
+    и служит отправной точкой следующей синхронизации.
+    """
+    if 'cursor' in request.query_params:
+        cursors: dict = decode_cursor(request.query_params['cursor'])
+    else:
+        since: str = parse_since(request.query_params['since'])
+        cursors = {name: (since, 0) for name in streams}
+    until: datetime = timezone.now() - SYNC_COMMIT_LAG
+    page: dict = {}
+    has_more: bool = False
+    for name, (queryset, field, serializer) in streams.items():
+        if name not in cursors:
+            raise ValidationError({'cursor': 'Токен от другого запроса'})
+        rows: list = changed_rows(queryset, field, cursors[name], until)
+        if len(rows) > SYNC_PAGE_SIZE:
+            has_more = True
+            rows = rows[:SYNC_PAGE_SIZE]
+        if rows:
+            cursors[name] = (getattr(rows[-1], field).isoformat(),
+                             rows[-1].pk)
+        page[name] = serializer(rows, many=True).data
+    page['next'] = encode_cursor(cursors)
+    page['has_more'] = has_more
+    return page
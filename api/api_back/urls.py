@@ -4,7 +4,9 @@ from rest_framework_simplejwt.views import TokenRefreshView
 
 from .views import (TitleViewSet, CategoryViewSet, GenreViewSet,
                     ReviewViewSet, CommentViewSet, UserViewSet,
-                    UserSignUpViewSet, UserTokenViewSet)
+                    UserSignUpViewSet, UserTokenViewSet, SyncView,
+                    BulkDeleteView, ProfileListView, ProfileDownloadView,
+                    MemoryView)
 
 app_name = 'api'
 
@@ -40,5 +42,18 @@ urlpatterns = [
         TokenRefreshView.as_view(),
         name='token_refresh'
     ),
+    path('v1/sync/', SyncView.as_view(), name='sync'),
+    path(
+        'v1/moderation/delete/',
+        BulkDeleteView.as_view(),
+        name='bulk_delete'
+    ),
+    path('v1/profiles/', ProfileListView.as_view(), name='profiles'),
+    path(
+        'v1/profiles/<str:name>/',
+        ProfileDownloadView.as_view(),
+        name='profile_download'
+    ),
+    path('v1/memory/', MemoryView.as_view(), name='memory'),
     path('v1/', include(router.urls))
 ]
@@ -1,15 +1,33 @@
-from typing import Any
+from typing import Any, Optional
 
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.shortcuts import get_object_or_404
+from django.db.models import Q
 
 from users.models import User
 
 
-def create_confirmation_code(username: Any) -> None:
+def find_users(*usernames: Any, email: Any = None) -> list[User]:
+    """
+    Пользователи с любым из имён или с почтой одним запросом:
+    по ним проверяются и конфликты, и существование пользователя.
+    """
+    condition: Optional[Q] = None
+    names: list[str] = [name for name in usernames if isinstance(name, str)]
+    if names:
+        condition = Q(username__in=names)
+    if isinstance(email, str):
+        condition = Q(email=email) if condition is None else (
+            condition | Q(email=email)
+        )
+    if condition is None:
+        return []
+    return list(User.objects.filter(condition))
+
+
+def create_confirmation_code(user: User) -> None:
     """Функция отправки сообщения."""
-    user: User = get_object_or_404(User, username=username)
+    from django.core.mail import send_mail
+
     confirmation_code: str = default_token_generator.make_token(user)
     send_mail(
         "Подтверждение регистрации на YaMDb!",
@@ -1,14 +1,16 @@
-from typing import Any, Literal, Type
+import tracemalloc
+from typing import Any, Iterator, Literal, Optional, Type
 
 import rest_framework_simplejwt
-from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import F
 from django.db.models.manager import BaseManager
+from django.http import FileResponse, Http404
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
@@ -21,39 +23,190 @@ from api_back.serializers import (TitleSerializer,
                                   CommentSerializer,
                                   ReviewSerializer,
                                   ReadOnlyTitleSerializer,
+                                  SyncCommentSerializer,
+                                  SyncReviewSerializer,
+                                  TombstoneSerializer,
+                                  BulkDeleteSerializer,
+                                  LeaderboardSerializer,
+                                  TitleStatsSerializer,
                                   UserSerializer,
                                   UserSignUpSerializer,
-                                  UserTokenSerializer)
-from api_back.mixins import (DeleteCreateListViewSet,
+                                  UserTokenSerializer,
+                                  with_stats)
+from api_back.mixins import (ArchiveTail,
+                             DeleteCreateListViewSet,
+                             DeltaSyncMixin,
+                             SnapshotListMixin,
+                             TitleShardMixin,
                              UpdateRetrieveViewSet)
 from api_back.permissions import (AuthorOrReadOnly,
                                   IsAdminOrReadOnly,
                                   IsAdminOrSuperuser,
-                                  IsAuthenticatedOrReadOnly)
-from api_back.utils import create_confirmation_code
-from api_back.filters import TitlesFilter
-from reviews.models import Title, Genre, Category, Review
+                                  IsAuthenticatedOrReadOnly,
+                                  IsModerator)
+from api_back.utils import create_confirmation_code, find_users
+from api_back.bitmaps import title_index
+from api_back.cache import (invalidate_title, invalidate_titles,
+                            tiered_cache, title_cache_key)
+from api_back.events import publish_on_commit
+from api_back.facets import title_facets
+from api_back.filters import TieBreakingOrderingBackend, TitlesFilter
+from api_back.memory import memory_tracker
+from api_back.pagination import LeaderboardPagination
+from api_back.profiling import list_profiles, profile_path
+from api_back.prerender import (paginated_response, prerendered,
+                                refresh_reviews, refresh_titles,
+                                render_review, render_title, review_queryset,
+                                title_queryset)
+from api_back.slugs import slug_map
+from api_back.snapshot import (Snapshot, catalog_snapshot, plain_list,
+                               with_ratings)
+from api_back.sync import is_sync_request, sync_page
+from reviews.archive import archive
+from reviews.constants import LEADERBOARD_ALL
+from reviews.deletion import (delete_comments, delete_reviews, purge_author,
+                              schedule_title_deletion, schedule_user_deletion)
+from reviews.models import (Title, Genre, Category, Comment, GenreTitle,
+                            Review, TitleStats, LeaderboardEntry, Tombstone)
+from reviews.shards import live_authors, live_titles, on_shards, with_authors
+from reviews.stats import (category_scope, change_comments, change_score,
+                           genre_scope, rebuild_leaderboard)
+from reviews.tombstones import bury_comments, bury_reviews
 from users.models import User
 
 
 class TitleViewSet(UpdateRetrieveViewSet, DeleteCreateListViewSet):
     """ViewSet модели Title."""
 
-    queryset: BaseManager[Title] = Title.objects.annotate(
-        rating=Avg('reviews__score')
-    ).all().order_by('id')
+    queryset: BaseManager[Title] = Title.objects.filter(
+        is_deleted=False
+    ).annotate(rating=F('stats__rating')).order_by('id')
     permission_classes: tuple[type[IsAdminOrReadOnly]] = (IsAdminOrReadOnly, )
     http_method_names: tuple[str] = ('get', 'post', 'patch', 'delete')
     filter_backends: tuple[Type[DjangoFilterBackend]] = (DjangoFilterBackend,)
     filterset_class: type[TitlesFilter] = TitlesFilter
 
+    def get_queryset(self):
+        queryset = self.queryset
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.select_related('category').prefetch_related(
+                'genre'
+            )
+        if with_stats(self.request):
+            return queryset.select_related('stats')
+        return queryset
+
     def get_serializer_class(self):
         if self.action in ("retrieve", "list"):
             return ReadOnlyTitleSerializer
         return TitleSerializer
 
+    def list(self, request: Any, *args: Any, **kwargs: Any) -> Response:
+        snapshot: Optional[Snapshot] = catalog_snapshot.current()
+        if snapshot is not None and plain_list(request):
+            page: list = self.paginate_queryset(snapshot.titles)
+            return self.get_paginated_response(with_ratings(page))
+        if with_stats(request) or not prerendered(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        page: list = self.paginate_queryset(queryset.select_related(
+            None
+        ).prefetch_related(None).only('id', 'rendered'))
+        return paginated_response(self.paginator, page, title_queryset(),
+                                  render_title)
+
+    def retrieve(self, request: Any, *args: Any, **kwargs: Any) -> Response:
+        def compute() -> dict:
+            snapshot: Optional[Snapshot] = catalog_snapshot.current()
+            if (snapshot is not None and not with_stats(request)
+                    and str(kwargs['pk']).isdigit()):
+                title: Optional[dict] = snapshot.find_title(int(kwargs['pk']))
+                if title is None:
+                    raise Http404
+                return with_ratings([title])[0]
+            return dict(super(TitleViewSet, self).retrieve(
+                request, *args, **kwargs
+            ).data)
+
+        key: str = title_cache_key(
+            kwargs['pk'], f'detail:{int(with_stats(request))}'
+        )
+        return Response(tiered_cache.get_or_set(key, compute),
+                        status=status.HTTP_200_OK)
 
-class GenreViewSet(DeleteCreateListViewSet):
+    @transaction.atomic
+    def perform_create(self, serializer):
+        title: Title = serializer.save()
+        TitleStats.objects.create(title=title)
+        rebuild_leaderboard((title.id,))
+        refresh_titles((title.id,))
+        catalog_snapshot.rebuild()
+        transaction.on_commit(lambda: title_index.update_title(title))
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        title: Title = serializer.save()
+        rebuild_leaderboard((title.id,))
+        refresh_titles((title.id,))
+        catalog_snapshot.rebuild()
+        transaction.on_commit(lambda: title_index.update_title(title))
+        invalidate_title(title.id)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        title_id: int = instance.id
+        schedule_title_deletion(instance)
+        catalog_snapshot.rebuild()
+        invalidate_title(title_id)
+        transaction.on_commit(lambda: title_index.remove_title(title_id))
+        publish_on_commit(title_id, 'title.deleted', {'id': title_id})
+
+    @action(detail=True, methods=('get',))
+    def stats(self, request: Any, pk: Any) -> Response:
+        """Гистограмма оценок и количество отзывов без агрегации."""
+        stats: TitleStats = get_object_or_404(
+            TitleStats, title_id=pk, title__is_deleted=False
+        )
+        serializer = TitleStatsSerializer(stats)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=('get',))
+    def facets(self, request: Any) -> Response:
+        """Количество произведений по жанрам, категориям и десятилетиям."""
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(title_facets(queryset, request.query_params),
+                        status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=('get',))
+    def leaderboard(self, request: Any) -> Response:
+        """
+        Лучшие произведения по байесовскому рейтингу:
+        всего каталога, категории (?category=) или жанра (?genre=).
+        Страницы читаются по ключу (рейтинг, id) через ?cursor=<next>.
+        """
+        scope: str = LEADERBOARD_ALL
+        if request.query_params.get('category'):
+            category: Category = get_object_or_404(
+                Category, slug=request.query_params['category']
+            )
+            scope = category_scope(category.id)
+        elif request.query_params.get('genre'):
+            genre: Genre = get_object_or_404(
+                Genre, slug=request.query_params['genre']
+            )
+            scope = genre_scope(genre.id)
+        queryset = LeaderboardEntry.objects.filter(
+            scope=scope
+        ).select_related(
+            'title__category', 'title__stats'
+        ).prefetch_related('title__genre')
+        paginator: LeaderboardPagination = LeaderboardPagination()
+        page: list = paginator.paginate_queryset(queryset, request, self)
+        serializer = LeaderboardSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class GenreViewSet(SnapshotListMixin, DeleteCreateListViewSet):
     """ViewSet модели Genre."""
 
     queryset: BaseManager[Genre] = Genre.objects.all()
@@ -63,9 +216,29 @@ class GenreViewSet(DeleteCreateListViewSet):
     filter_backends: tuple[type[SearchFilter]] = (filters.SearchFilter,)
     search_fields: tuple[Literal['name']] = ('name',)
     lookup_field: str = "slug"
+    snapshot_rows: str = 'genres'
 
-
-class CategoryViewSet(DeleteCreateListViewSet):
+    def perform_create(self, serializer):
+        serializer.save()
+        catalog_snapshot.rebuild()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        LeaderboardEntry.objects.filter(
+            scope=genre_scope(instance.id)
+        ).delete()
+        title_ids: list[int] = list(GenreTitle.objects.filter(
+            genre=instance
+        ).values_list('title_id', flat=True))
+        instance.delete()
+        refresh_titles(title_ids)
+        slug_map.invalidate()
+        catalog_snapshot.rebuild()
+        transaction.on_commit(title_index.invalidate)
+        invalidate_titles()
+
+
+class CategoryViewSet(SnapshotListMixin, DeleteCreateListViewSet):
     """ViewSet модели Category."""
 
     queryset: BaseManager[Category] = Category.objects.all()
@@ -76,9 +249,29 @@ class CategoryViewSet(DeleteCreateListViewSet):
     filter_backends: tuple[type[SearchFilter]] = (filters.SearchFilter,)
     search_fields: tuple[Literal['name']] = ('name',)
     lookup_field: str = "slug"
+    snapshot_rows: str = 'categories'
 
-
-class CommentViewSet(viewsets.ModelViewSet):
+    def perform_create(self, serializer):
+        serializer.save()
+        catalog_snapshot.rebuild()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        LeaderboardEntry.objects.filter(
+            scope=category_scope(instance.id)
+        ).delete()
+        title_ids: list[int] = list(instance.titles.values_list(
+            'id', flat=True
+        ))
+        instance.delete()
+        refresh_titles(title_ids)
+        slug_map.invalidate()
+        catalog_snapshot.rebuild()
+        transaction.on_commit(title_index.invalidate)
+        invalidate_titles()
+
+
+class CommentViewSet(TitleShardMixin, DeltaSyncMixin, viewsets.ModelViewSet):
     """ViewSet модели Comment."""
 
     serializer_class: type[CommentSerializer] = CommentSerializer
@@ -86,46 +279,328 @@ class CommentViewSet(viewsets.ModelViewSet):
     http_method_names: tuple[str] = ('get', 'post', 'patch', 'delete')
 
     def get_queryset(self):
+        """
+        Комментарии отзыва. Для отзыва из архива на чтение
+        отдаётся список архивных комментариев.
+        """
         pk = self.kwargs.get('review_id')
         id = self.kwargs.get('title_id')
-        title: Title = get_object_or_404(Title, id=id)
-        review: Review = get_object_or_404(Review, pk=pk, title=title)
-        queryset = review.comments.all()
-        return queryset
-
+        title: Title = get_object_or_404(Title, id=id, is_deleted=False)
+        review: Optional[Review] = live_authors(
+            Review.objects.filter(pk=pk, title=title)
+        ).first()
+        if review is not None:
+            return with_authors(live_authors(review.comments.all()))
+        if self.request.method in permissions.SAFE_METHODS:
+            review = archive.find_review(title.id, pk)
+        if review is None:
+            raise Http404
+        return archive.comments(review)
+
+    def get_object(self):
+        queryset = self.get_queryset()
+        if isinstance(queryset, list):
+            comment: Optional[Comment] = next((
+                comment for comment in queryset
+                if str(comment.pk) == self.kwargs['pk']
+            ), None)
+            if comment is None:
+                raise Http404
+        else:
+            comment = get_object_or_404(queryset, pk=self.kwargs['pk'])
+        self.check_object_permissions(self.request, comment)
+        return comment
+
+    def get_sync_streams(self) -> dict:
+        comments = self.get_queryset()
+        if isinstance(comments, list):
+            comments = Comment.objects.none()
+        return {
+            'comments': (with_authors(comments), 'updated_at',
+                         SyncCommentSerializer),
+            'deleted': (Tombstone.objects.filter(
+                review_id=self.kwargs.get('review_id')
+            ), 'deleted_at', TombstoneSerializer),
+        }
+
+    @transaction.atomic
     def perform_create(self, serializer):
         pk = self.kwargs.get('review_id')
         id = self.kwargs.get('title_id')
-        title: Title = get_object_or_404(Title, id=id)
-        review: Review = get_object_or_404(Review, pk=pk, title=title)
-        serializer.save(author=self.request.user,
-                        review=review)
-
-
-class ReviewViewSet(viewsets.ModelViewSet):
+        title: Title = get_object_or_404(Title, id=id, is_deleted=False)
+        review: Review = get_object_or_404(
+            live_authors(Review.objects.filter(title=title)), pk=pk
+        )
+        comment: Comment = serializer.save(author=self.request.user,
+                                           review=review)
+        change_comments(review.id, 1)
+        refresh_reviews((review.id,))
+        invalidate_title(title.id)
+        publish_on_commit(title.id, 'comment.created',
+                          SyncCommentSerializer(comment).data)
+
+    def perform_update(self, serializer):
+        comment: Comment = serializer.save()
+        invalidate_title(self.kwargs.get('title_id'))
+        publish_on_commit(self.kwargs.get('title_id'), 'comment.updated',
+                          SyncCommentSerializer(comment).data)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        title_id: int = int(self.kwargs.get('title_id'))
+        comment_id: int = instance.id
+        bury_comments(((comment_id, instance.review_id, title_id),))
+        instance.delete()
+        change_comments(instance.review_id, -1)
+        refresh_reviews((instance.review_id,))
+        invalidate_title(title_id)
+        publish_on_commit(title_id, 'comment.deleted', {
+            'id': comment_id, 'review': instance.review_id
+        })
+
+
+class ReviewViewSet(TitleShardMixin, DeltaSyncMixin, viewsets.ModelViewSet):
     """ViewSet модели Review."""
 
     serializer_class: type[ReviewSerializer] = ReviewSerializer
     permission_classes: tuple = (AuthorOrReadOnly, IsAuthenticatedOrReadOnly)
     http_method_names: tuple[str] = ('get', 'post', 'patch', 'delete')
+    filter_backends: tuple[type[TieBreakingOrderingBackend]] = (
+        TieBreakingOrderingBackend,
+    )
+    ordering_fields: tuple[str] = ('comments_count', 'last_comment_at')
 
     def get_queryset(self):
         pk = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=pk)
-        queryset = title.reviews.all()
+        title = get_object_or_404(Title, pk=pk, is_deleted=False)
+        queryset = with_authors(live_authors(title.reviews.all()))
         return queryset
 
+    def get_object(self):
+        """Отзыв; на чтение он ищется и в архиве."""
+        try:
+            return super().get_object()
+        except Http404:
+            review: Optional[Review] = None
+            title_id: int = int(self.kwargs['title_id'])
+            if self.request.method in permissions.SAFE_METHODS and (
+                    Title.objects.filter(pk=title_id,
+                                         is_deleted=False).exists()):
+                review = archive.find_review(title_id, self.kwargs['pk'])
+            if review is None:
+                raise
+            return review
+
+    def paginate_queryset(self, queryset):
+        """За отзывами из базы следуют архивные."""
+        title_id: int = int(self.kwargs['title_id'])
+        archived: int = archive.count_reviews(title_id)
+        if archived:
+            queryset = ArchiveTail(
+                queryset, archived,
+                lambda offset, limit: archive.reviews(title_id, offset, limit)
+            )
+        return super().paginate_queryset(queryset)
+
+    def get_sync_streams(self) -> dict:
+        return {
+            'reviews': (with_authors(self.get_queryset()), 'updated_at',
+                        SyncReviewSerializer),
+            'deleted': (Tombstone.objects.filter(
+                kind=Tombstone.REVIEW, title_id=self.kwargs.get('title_id')
+            ), 'deleted_at', TombstoneSerializer),
+        }
+
+    def list(self, request: Any, *args: Any, **kwargs: Any) -> Response:
+        """
+        Первая страница отзывов читается через кэш,
+        остальные при включённом режиме собираются из фрагментов.
+        """
+        params: set[str] = set(request.query_params)
+        if params - {'ordering', 'page'} or (
+                request.query_params.get('page', '1') != '1'):
+            if is_sync_request(request) or not prerendered(request):
+                return super().list(request, *args, **kwargs)
+            queryset = self.filter_queryset(self.get_queryset())
+            page: list = self.paginate_queryset(queryset.select_related(
+                None
+            ).prefetch_related(None).only('id', 'title', 'rendered'))
+            return paginated_response(self.paginator, page,
+                                      review_queryset(), render_review)
+
+        def compute() -> dict:
+            data: dict = super(ReviewViewSet, self).list(
+                request, *args, **kwargs
+            ).data
+            return {**data, 'results': list(data['results'])}
+
+        key: str = title_cache_key(kwargs['title_id'], 'reviews:{}:{}'.format(
+            request.get_host(), request.query_params.get('ordering', '')
+        ))
+        return Response(tiered_cache.get_or_set(key, compute),
+                        status=status.HTTP_200_OK)
+
+    @transaction.atomic
     def perform_create(self, serializer):
         pk = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=pk)
-        serializer.save(author=self.request.user,
-                        title=title)
+        title = get_object_or_404(Title, pk=pk, is_deleted=False)
+        review: Review = serializer.save(author=self.request.user,
+                                         title=title)
+        change_score(review.title_id, added=review.score)
+        refresh_reviews((review.id,))
+        refresh_titles((review.title_id,))
+        invalidate_title(review.title_id)
+        publish_on_commit(review.title_id, 'review.created',
+                          SyncReviewSerializer(review).data)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_score: int = serializer.instance.score
+        review: Review = serializer.save()
+        change_score(review.title_id, added=review.score, removed=old_score)
+        refresh_reviews((review.id,))
+        refresh_titles((review.title_id,))
+        invalidate_title(review.title_id)
+        publish_on_commit(review.title_id, 'review.updated',
+                          SyncReviewSerializer(review).data)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        review_id: int = instance.id
+        bury_reviews(((review_id, instance.title_id),))
+        instance.delete()
+        change_score(instance.title_id, removed=instance.score)
+        refresh_titles((instance.title_id,))
+        invalidate_title(instance.title_id)
+        publish_on_commit(instance.title_id, 'review.deleted', {
+            'id': review_id
+        })
+
+
+class SyncView(APIView):
+    """
+    Лента изменений отзывов и комментариев по всей базе
+    с момента ?since= или с места токена ?cursor=.
+    """
+
+    def get(self, request: Any) -> Response:
+        if not is_sync_request(request):
+            raise ValidationError({'since': 'Обязательный параметр'})
+        return Response(sync_page(request, {
+            'reviews': (on_shards(with_authors(live_authors(live_titles(
+                Review.objects.all()
+            )))), 'updated_at', SyncReviewSerializer),
+            'comments': (on_shards(with_authors(live_authors(live_titles(
+                Comment.objects.all(), 'review__title'
+            )))), 'updated_at', SyncCommentSerializer),
+            'deleted': (Tombstone.objects.all(), 'deleted_at',
+                        TombstoneSerializer),
+        }), status=status.HTTP_200_OK)
+
+
+class BulkDeleteView(APIView):
+    """
+    Массовое удаление отзывов и комментариев модератором:
+    всего написанного автором, по спискам id или по тексту за период.
+    Удаление идёт пачками, права проверяются перед каждой пачкой:
+    если их отозвали, уже удалённые пачки остаются удалёнными.
+    """
+
+    permission_classes: tuple[type[IsModerator]] = (IsModerator,)
+
+    def post(self, request: Any) -> Response:
+        serializer: BulkDeleteSerializer = BulkDeleteSerializer(
+            data=request.data
+        )
+        serializer.is_valid(raise_exception=True)
+        deleted: dict[str, int] = {'reviews': 0, 'comments': 0}
+        try:
+            for reviews, comments in self.batches(serializer.validated_data):
+                deleted['reviews'] += reviews
+                deleted['comments'] += comments
+        finally:
+            if deleted['reviews'] or deleted['comments']:
+                invalidate_titles()
+        return Response(deleted, status=status.HTTP_200_OK)
+
+    def batches(self, data: dict) -> Iterator[tuple[int, int]]:
+        if 'author' in data:
+            yield from purge_author(data['author'].id, self.check_moderator)
+            return
+        if 'text' in data:
+            comments = Comment.objects.filter(
+                text__icontains=data['text'],
+                pub_date__range=(data['since'].date(), data['until'].date())
+            )
+            reviews = Review.objects.filter(
+                text__icontains=data['text'],
+                pub_date__range=(data['since'], data['until'])
+            )
+        else:
+            comments = Comment.objects.filter(pk__in=data.get('comments', ()))
+            reviews = Review.objects.filter(pk__in=data.get('reviews', ()))
+        for amount in delete_comments(comments, self.check_moderator):
+            yield 0, amount
+        yield from delete_reviews(reviews, self.check_moderator)
+
+    def check_moderator(self) -> None:
+        """Права перечитываются из базы: их могли отозвать."""
+        user: Optional[User] = User.objects.filter(
+            pk=self.request.user.pk, is_active=True, is_deleted=False
+        ).first()
+        if user is None or not (user.is_moderator or user.is_superuser):
+            self.permission_denied(self.request)
+
+
+class ProfileListView(APIView):
+    """Сводки сохранённых профилей запросов, новые первыми."""
+
+    permission_classes: tuple[type[IsAdminOrSuperuser]] = (IsAdminOrSuperuser,)
+
+    def get(self, request: Any) -> Response:
+        return Response(list_profiles(), status=status.HTTP_200_OK)
+
+
+class ProfileDownloadView(APIView):
+    """Файл профиля в формате pstats."""
+
+    permission_classes: tuple[type[IsAdminOrSuperuser]] = (IsAdminOrSuperuser,)
+
+    def get(self, request: Any, name: str) -> FileResponse:
+        path = profile_path(name)
+        if path is None:
+            raise Http404
+        return FileResponse(path.open('rb'), as_attachment=True,
+                            filename=path.name)
+
+
+class MemoryView(APIView):
+    """
+    Память процесса по маршрутам и крупнейшие места её выделения
+    (?limit=, по умолчанию 20). DELETE сбрасывает накопленное.
+    """
+
+    permission_classes: tuple[type[IsAdminOrSuperuser]] = (IsAdminOrSuperuser,)
+
+    def get(self, request: Any) -> Response:
+        if not tracemalloc.is_tracing():
+            raise Http404
+        try:
+            limit: int = int(request.query_params.get('limit', 20))
+        except ValueError:
+            raise ValidationError({'limit': 'Ожидается число'})
+        return Response(memory_tracker.report(limit),
+                        status=status.HTTP_200_OK)
+
+    def delete(self, request: Any) -> Response:
+        memory_tracker.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class UserViewSet(viewsets.ModelViewSet):
     """ViewSet модели User."""
 
-    queryset: Any = User.objects.all()
+    queryset: Any = User.objects.filter(is_deleted=False)
     permission_classes: tuple[type[IsAdminOrSuperuser]] = (IsAdminOrSuperuser,)
     serializer_class: type[UserSerializer] = UserSerializer
     filter_backends: tuple[type[SearchFilter]] = (SearchFilter,)
@@ -138,18 +613,34 @@ class UserViewSet(viewsets.ModelViewSet):
         url_name='get_user'
     )
     def get_user_by_username(self, request: Any, username: Any) -> Response:
-        user: User = get_object_or_404(User, username=username)
+        data: Any = request.data if request.method == 'PATCH' and isinstance(
+            request.data, dict) else {}
+        users: list[User] = find_users(
+            username, data.get('username'), email=data.get('email')
+        )
+        user: Optional[User] = next((
+            user for user in users
+            if user.username == username and not user.is_deleted
+        ), None)
+        if user is None:
+            raise Http404
         if request.method == 'PATCH':
             serializer: type[UserSerializer] = UserSerializer(
                 user,
                 data=request.data,
-                partial=True
+                partial=True,
+                context={'users': users}
             )
             serializer.is_valid(raise_exception=True)
             serializer.save()
+            if 'username' in serializer.validated_data:
+                refresh_reviews(author_id=user.id)
+                invalidate_titles()
             return Response(serializer.data, status=status.HTTP_200_OK)
         if request.method == 'DELETE':
-            user.delete()
+            with transaction.atomic():
+                schedule_user_deletion(user)
+                invalidate_titles()
             return Response(status=status.HTTP_204_NO_CONTENT)
         serializer: type[UserSerializer] = UserSerializer(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -171,6 +662,9 @@ class UserViewSet(viewsets.ModelViewSet):
             )
             serializer.is_valid(raise_exception=True)
             serializer.save(role=request.user.role)
+            if 'username' in serializer.validated_data:
+                refresh_reviews(author_id=request.user.id)
+                invalidate_titles()
             return Response(serializer.data, status=status.HTTP_200_OK)
         serializer: type[UserSerializer] = UserSerializer(request.user)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -183,28 +677,18 @@ class UserSignUpViewSet(APIView):
     """
 
     def post(self, request: Any) -> Response:
-        email: str = request.data.get('email')
-        username: str = request.data.get('username')
         serializer: type[UserSignUpSerializer] = UserSignUpSerializer(
-            data=request.data
+            data=request.data,
+            context={'users': find_users(
+                request.data.get('username'),
+                email=request.data.get('email')
+            )}
         )
-        if User.objects.filter(username=username, email=email).exists():
-            create_confirmation_code(username)
-            return Response(
-                {'email': serializer.initial_data['email'],
-                 'username': serializer.initial_data['username']},
-                status=status.HTTP_200_OK)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
-        confirmation_code: str = default_token_generator.make_token(user)
-        send_mail(
-            "Подтверждение регистрации на YaMDb!",
-            "Для подтверждения регистрации отправьте код:"
-            f"{confirmation_code}",
-            "yamdb.host@yandex.ru",
-            [user.email],
-            False,
+        user: User = serializer.validated_data.get('user') or (
+            serializer.save()
         )
+        create_confirmation_code(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -219,8 +703,7 @@ class UserTokenViewSet(APIView):
             data=request.data
         )
         serializer.is_valid(raise_exception=True)
-        username: str = serializer.validated_data.get('username')
-        user: User = get_object_or_404(User, username=username)
+        user: User = serializer.validated_data['user']
         refresh: rest_framework_simplejwt.tokens.RefreshToken = (
             RefreshToken.for_user(user))
         return Response(
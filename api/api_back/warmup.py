@@ -0,0 +1,229 @@
+import logging
+import re
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+
+from api_back.cache import CACHE_STATUS_HEADER
+from reviews.models import TitleStats
+
+API_PREFIX: str = '/api/v1/'
+CATALOG_PATHS: tuple[str, ...] = (
+    f'{API_PREFIX}titles/',
+    f'{API_PREFIX}genres/',
+    f'{API_PREFIX}categories/',
+)
+LOG_REQUEST: re.Pattern = re.compile(
+    r'"GET (?P<path>\S+) HTTP/[\d.]+" (?P<status>\d{3})'
+)
+SYNC_PARAMS: re.Pattern = re.compile(r'[?&](since|cursor)=')
+HTTP_TIMEOUT: float = 10.0
+
+logger: logging.Logger = logging.getLogger('api_back.warmup')
+
+
+def paths_from_log(access_log: Path, limit: int) -> list[str]:
+    """
+    Самые частые успешные GET-запросы к API из журнала доступа
+    в формате common/combined (nginx, gunicorn) или по адресу в строке.
+    """
+    hits: Counter = Counter()
+    with open(access_log, encoding='utf8', errors='replace') as lines:
+        for line in lines:
+            match: Optional[re.Match] = LOG_REQUEST.search(line)
+            if match is not None:
+                if match['status'] != '200':
+                    continue
+                path: str = match['path']
+            else:
+                path = line.strip()
+            if path.startswith(API_PREFIX) and not SYNC_PARAMS.search(path):
+                hits[path] += 1
+    return [path for path, _ in hits.most_common(limit)]
+
+
+def popular_paths(limit: int) -> list[str]:
+    """
+    Списки каталога, карточки и первые страницы отзывов
+    произведений с наибольшим числом отзывов.
+    """
+    paths: list[str] = list(CATALOG_PATHS)
+    title_ids = TitleStats.objects.filter(
+        title__is_deleted=False
+    ).order_by('-reviews_count', '-title').values_list(
+        'title', flat=True
+    )[:max(limit - len(paths), 0) // 2]
+    for title_id in title_ids:
+        paths += [f'{API_PREFIX}titles/{title_id}/',
+                  f'{API_PREFIX}titles/{title_id}/reviews/']
+    return paths[:limit]
+
+
+def hot_paths(limit: int, access_log: Optional[Path] = None) -> list[str]:
+    if access_log is not None:
+        return paths_from_log(access_log, limit)
+    return popular_paths(limit)
+
+
+class Warmup:
+    """
+    Прогрев кэшей GET-запросами в пуле потоков. Попадание — ответ
+    с заголовком X-Cache: HIT; доля попаданий считается по ответам,
+    которые обращались к кэшам (с заголовком X-Cache).
+    """
+
+    def fetch(self, path: str) -> tuple[int, Optional[bool]]:
+        """Статус ответа и попадание в кэш (None — кэш не использовался)."""
+        raise NotImplementedError
+
+    @staticmethod
+    def cache_status(header: Optional[str]) -> Optional[bool]:
+        return None if header is None else header == 'HIT'
+
+    def run(self, paths: list[str], workers: int,
+            deadline: float) -> dict:
+        """Запросы в пуле потоков, пока не вышло время."""
+        def fetch(path: str) -> Optional[tuple[int, Optional[bool]]]:
+            if time.monotonic() >= deadline:
+                return None
+            return self.fetch(path)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results: list = list(pool.map(fetch, paths))
+        done: list[tuple[str, int, Optional[bool]]] = [
+            (path, *result) for path, result in zip(paths, results)
+            if result is not None
+        ]
+        return {
+            'paths': [path for path, status, _ in done if status == 200],
+            'requested': len(done),
+            'skipped': len(paths) - len(done),
+            'errors': sum(status != 200 for _, status, _ in done),
+            'cached': sum(
+                hit is not None for _, status, hit in done if status == 200
+            ),
+            'hits': sum(bool(hit) for _, status, hit in done if status == 200),
+        }
+
+    def warm(self, paths: list[str], workers: int, seconds: float) -> dict:
+        """
+        Прогрев за seconds секунд и повтор прогретых запросов:
+        доля попаданий до и после прогрева.
+        """
+        started: float = time.monotonic()
+        warmed: dict = self.run(paths, workers, started + seconds)
+        checked: dict = self.run(warmed['paths'], workers, float('inf'))
+        return {
+            'requested': warmed['requested'],
+            'skipped': warmed['skipped'],
+            'errors': warmed['errors'],
+            'seconds': time.monotonic() - started,
+            'cached': checked['cached'],
+            'hit_ratio_before': warmed['hits'] / max(warmed['cached'], 1),
+            'hit_ratio_after': checked['hits'] / max(checked['cached'], 1),
+        }
+
+
+class HttpWarmup(Warmup):
+    """
+    Прогрев работающего сервера по HTTP: ответы заполняют кэши
+    воркеров, которые их обслужили, и общий кэш Django. Запросы
+    идут на address (по умолчанию сам host) с заголовком Host.
+    """
+
+    def __init__(self, host: str, scheme: str = 'http',
+                 address: Optional[str] = None,
+                 timeout: float = HTTP_TIMEOUT) -> None:
+        self.host: str = host
+        self.base_url: str = f'{scheme}://{address or host}'
+        self.timeout: float = timeout
+
+    def fetch(self, path: str) -> tuple[int, Optional[bool]]:
+        request: Request = Request(self.base_url + path,
+                                   headers={'Host': self.host})
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                status: int = response.status
+                header: Optional[str] = response.headers.get(
+                    CACHE_STATUS_HEADER
+                )
+        except HTTPError as error:
+            return error.code, None
+        except (URLError, OSError):
+            return 0, None
+        return status, self.cache_status(header)
+
+
+class LocalWarmup(Warmup):
+    """
+    Прогрев через обработчик WSGI в этом же процессе: запросы
+    проходят тот же код и заполняют кэши самого процесса.
+    """
+
+    def __init__(self, host: str, scheme: str = 'http') -> None:
+        self.host: str = host
+        self.scheme: str = scheme
+        self.handler: WSGIHandler = WSGIHandler()
+
+    def fetch(self, path: str) -> tuple[int, Optional[bool]]:
+        location, _, query = path.partition('?')
+        environ: dict = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': location,
+            'QUERY_STRING': query,
+            'SERVER_NAME': self.host.split(':')[0],
+            'SERVER_PORT': '443' if self.scheme == 'https' else '80',
+            'HTTP_HOST': self.host,
+            'wsgi.url_scheme': self.scheme,
+            'wsgi.input': BytesIO(),
+            'wsgi.errors': BytesIO(),
+        }
+        started: list[tuple[int, dict]] = []
+        try:
+            response = self.handler(
+                environ, lambda line, headers, exc_info=None: started.append(
+                    (int(line.split()[0]), dict(headers))
+                )
+            )
+            for _ in response:
+                pass
+            response.close()
+        finally:
+            connections.close_all()
+        status, headers = started[0]
+        return status, self.cache_status(headers.get(CACHE_STATUS_HEADER))
+
+
+def warm_worker() -> None:
+    """
+    Прогрев кэшей процесса при запуске воркера, если включён
+    WARM_CACHES_ON_START (хук post_worker_init в gunicorn.conf.py).
+    Полезен только для кэшей в памяти процесса: L1 кэша карточек
+    и, без общего кэша Django, его локального кэша.
+    """
+    if not settings.WARM_CACHES_ON_START:
+        return
+    access_log: Optional[str] = settings.WARM_CACHES_ACCESS_LOG
+    report: dict = LocalWarmup(settings.WARM_CACHES_HOST).warm(
+        hot_paths(settings.WARM_CACHES_LIMIT,
+                  Path(access_log) if access_log else None),
+        settings.WARM_CACHES_WORKERS,
+        settings.WARM_CACHES_SECONDS
+    )
+    logger.info(
+        'warmed %d paths in %.1fs (%d skipped, %d errors), '
+        'hit ratio %.0f%% -> %.0f%%',
+        report['requested'], report['seconds'], report['skipped'],
+        report['errors'], report['hit_ratio_before'] * 100,
+        report['hit_ratio_after'] * 100
+    )
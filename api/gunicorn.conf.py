@@ -0,0 +1,8 @@
+def post_worker_init(worker) -> None:
+    """
+    Прогрев кэшей воркера после загрузки приложения, до первых
+    запросов. Включается настройкой WARM_CACHES_ON_START.
+    """
+    from api_back.warmup import warm_worker
+
+    warm_worker()
@@ -1,8 +1,319 @@
+from typing import Iterable
+
 from django.contrib import admin
+from django.db import transaction
+
+from api_back.bitmaps import title_index
+from api_back.cache import invalidate_title, invalidate_titles
+from api_back.events import publish_on_commit
+from api_back.prerender import refresh_reviews, refresh_titles
+from api_back.serializers import SyncCommentSerializer, SyncReviewSerializer
+from api_back.slugs import slug_map
+from api_back.snapshot import catalog_snapshot
+from .deletion import schedule_title_deletion
+from .models import (
+    Category, Comment, DeletionTask, Genre, GenreTitle, LeaderboardEntry,
+    Review, Title, TitleStats
+)
+from .paginators import EstimatedCountPaginator
+from .stats import (category_scope, change_comments, change_score,
+                    genre_scope, rebuild_leaderboard)
+from .tombstones import bury_comments, bury_reviews
+
+
+def titles_changed(title_ids: Iterable[int]) -> None:
+    """
+    Рейтинг, фрагменты, индекс каталога и кэш карточек произведений
+    после смены их категории или жанров.
+    """
+    title_ids = list(title_ids)
+    rebuild_leaderboard(title_ids)
+    refresh_titles(title_ids)
+    for title_id in title_ids:
+        invalidate_title(title_id)
+
+    def update_index() -> None:
+        for title in Title.objects.filter(
+                pk__in=title_ids).select_related('category'):
+            if title.is_deleted:
+                title_index.remove_title(title.pk)
+            else:
+                title_index.update_title(title)
+
+    transaction.on_commit(update_index)
+
+
+class MaintainedAdmin(admin.ModelAdmin):
+    """
+    Админка таблиц, от которых зависят счётчики, рейтинги и кэши.
+    Массовое удаление идёт по строке через delete_model, чтобы они
+    обновлялись так же, как при удалении через API.
+    """
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset) -> None:
+        for obj in queryset:
+            self.delete_model(request, obj)
+
+
+class CatalogAdmin(MaintainedAdmin):
+    """
+    Админка каталога: сохранение и удаление пересобирают снимок
+    каталога так же, как запись через API.
+    """
+
+    def save_model(self, request, obj, form, change) -> None:
+        super().save_model(request, obj, form, change)
+        catalog_snapshot.rebuild()
+
+    def delete_model(self, request, obj) -> None:
+        super().delete_model(request, obj)
+        catalog_snapshot.rebuild()
+
+
+class ClassifierAdmin(CatalogAdmin):
+    """
+    Жанры и категории. Правка сбрасывает соответствие slug → id,
+    индекс каталога и карточки произведений, удаление — ещё и срез
+    рейтинга, как удаление через API.
+    """
+
+    list_display: tuple[str, str, str] = ("pk", "name", "slug", )
+    search_fields: tuple[str, str] = ("^name", "=slug", )
+
+    def scope(self, obj) -> str:
+        raise NotImplementedError
+
+    def title_ids(self, obj) -> list[int]:
+        raise NotImplementedError
+
+    def catalog_changed(self, title_ids: list[int]) -> None:
+        refresh_titles(title_ids)
+        slug_map.invalidate()
+        transaction.on_commit(title_index.invalidate)
+        invalidate_titles()
+
+    def save_model(self, request, obj, form, change) -> None:
+        super().save_model(request, obj, form, change)
+        if change:
+            self.catalog_changed(self.title_ids(obj))
+
+    def delete_model(self, request, obj) -> None:
+        LeaderboardEntry.objects.filter(scope=self.scope(obj)).delete()
+        title_ids: list[int] = self.title_ids(obj)
+        super().delete_model(request, obj)
+        self.catalog_changed(title_ids)
+
+
+@admin.register(Category)
+class CategoryAdmin(ClassifierAdmin):
+
+    def scope(self, obj) -> str:
+        return category_scope(obj.pk)
+
+    def title_ids(self, obj) -> list[int]:
+        return list(obj.titles.values_list('id', flat=True))
+
+
+@admin.register(Genre)
+class GenreAdmin(ClassifierAdmin):
+
+    def scope(self, obj) -> str:
+        return genre_scope(obj.pk)
+
+    def title_ids(self, obj) -> list[int]:
+        return list(GenreTitle.objects.filter(genre=obj).values_list(
+            'title_id', flat=True
+        ))
+
+
+@admin.register(Title)
+class TitleAdmin(CatalogAdmin):
+    """
+    Произведения. Поиск по началу названия и сортировка по id
+    идут по индексам, число строк оценивается пагинатором.
+    Удаление, как и через API, скрывает произведение и ставит
+    задачу на удаление его отзывов.
+    """
+
+    list_display: tuple[str, ...] = (
+        "pk",
+        "name",
+        "year",
+        "category",
+        "is_deleted",
+    )
+    list_select_related: tuple[str] = ("category", )
+    autocomplete_fields: tuple[str] = ("category", )
+    readonly_fields: tuple[str] = ("is_deleted", )
+    search_fields: tuple[str] = ("^name", )
+    list_filter: tuple[str] = ("category", )
+    ordering: tuple[str] = ("-pk", )
+    paginator = EstimatedCountPaginator
+    show_full_result_count: bool = False
+
+    def save_model(self, request, obj, form, change) -> None:
+        super().save_model(request, obj, form, change)
+        TitleStats.objects.get_or_create(title=obj)
+        titles_changed((obj.pk, ))
+
+    def delete_model(self, request, obj) -> None:
+        title_id: int = obj.pk
+        schedule_title_deletion(obj)
+        catalog_snapshot.rebuild()
+        invalidate_title(title_id)
+        transaction.on_commit(lambda: title_index.remove_title(title_id))
+        publish_on_commit(title_id, 'title.deleted', {'id': title_id})
+
+
+@admin.register(GenreTitle)
+class GenreTitleAdmin(CatalogAdmin):
+    list_display: tuple[str, str, str] = ("pk", "title", "genre", )
+    list_select_related: tuple[str, str] = ("title", "genre", )
+    raw_id_fields: tuple[str] = ("title", )
+    autocomplete_fields: tuple[str] = ("genre", )
+    ordering: tuple[str] = ("-pk", )
+    paginator = EstimatedCountPaginator
+    show_full_result_count: bool = False
+
+    def save_model(self, request, obj, form, change) -> None:
+        title_ids: set[int] = set(GenreTitle.objects.filter(
+            pk=obj.pk
+        ).values_list('title_id', flat=True)) if change else set()
+        super().save_model(request, obj, form, change)
+        titles_changed(title_ids | {obj.title_id})
+
+    def delete_model(self, request, obj) -> None:
+        super().delete_model(request, obj)
+        titles_changed((obj.title_id, ))
+
+
+@admin.register(Review)
+class ReviewAdmin(MaintainedAdmin):
+    """
+    Отзывы. Связанные произведения и авторы читаются одним запросом,
+    в форме вместо списков на всю таблицу — поля для id.
+    Поиск — по точному имени автора, отзывы произведения
+    открываются по адресу ?title__id__exact=<id>.
+    Запись обновляет статистику и рейтинг произведения, как API;
+    счётчики комментариев только для чтения.
+    """
+
+    list_display: tuple[str, ...] = (
+        "pk",
+        "title",
+        "author",
+        "score",
+        "comments_count",
+        "pub_date",
+    )
+    list_select_related: tuple[str, str] = ("title", "author", )
+    raw_id_fields: tuple[str, str] = ("title", "author", )
+    readonly_fields: tuple[str, str] = ("comments_count", "last_comment_at", )
+    search_fields: tuple[str] = ("=author__username", )
+    ordering: tuple[str] = ("-pk", )
+    paginator = EstimatedCountPaginator
+    show_full_result_count: bool = False
+
+    def get_readonly_fields(self, request, obj=None) -> tuple[str, ...]:
+        if obj is None:
+            return self.readonly_fields
+        return (*self.readonly_fields, "title", "author", )
+
+    def save_model(self, request, obj, form, change) -> None:
+        old_score = Review.objects.filter(pk=obj.pk).values_list(
+            'score', flat=True
+        ).first() if change else None
+        super().save_model(request, obj, form, change)
+        change_score(obj.title_id, added=obj.score, removed=old_score)
+        refresh_reviews((obj.pk, ))
+        refresh_titles((obj.title_id, ))
+        invalidate_title(obj.title_id)
+        publish_on_commit(
+            obj.title_id, 'review.updated' if change else 'review.created',
+            SyncReviewSerializer(obj).data
+        )
+
+    def delete_model(self, request, obj) -> None:
+        review_id: int = obj.pk
+        bury_reviews(((review_id, obj.title_id), ))
+        super().delete_model(request, obj)
+        change_score(obj.title_id, removed=obj.score)
+        refresh_titles((obj.title_id, ))
+        invalidate_title(obj.title_id)
+        publish_on_commit(obj.title_id, 'review.deleted', {'id': review_id})
+
+
+@admin.register(Comment)
+class CommentAdmin(MaintainedAdmin):
+    """
+    Комментарии. Устроены как отзывы: ?review__id__exact=<id>.
+    Добавление и удаление обновляют счётчик комментариев отзыва.
+    """
+
+    list_display: tuple[str, ...] = (
+        "pk",
+        "review",
+        "author",
+        "pub_date",
+    )
+    list_select_related: tuple[str, str] = ("review", "author", )
+    raw_id_fields: tuple[str, str] = ("review", "author", )
+    search_fields: tuple[str] = ("=author__username", )
+    ordering: tuple[str] = ("-pk", )
+    paginator = EstimatedCountPaginator
+    show_full_result_count: bool = False
+
+    def get_readonly_fields(self, request, obj=None) -> tuple[str, ...]:
+        if obj is None:
+            return self.readonly_fields
+        return (*self.readonly_fields, "review", "author", )
+
+    def save_model(self, request, obj, form, change) -> None:
+        super().save_model(request, obj, form, change)
+        title_id: int = obj.review.title_id
+        if not change:
+            change_comments(obj.review_id, 1)
+            refresh_reviews((obj.review_id, ))
+        invalidate_title(title_id)
+        publish_on_commit(
+            title_id, 'comment.updated' if change else 'comment.created',
+            SyncCommentSerializer(obj).data
+        )
 
-from .models import Title, Review, Comment
+    def delete_model(self, request, obj) -> None:
+        comment_id: int = obj.pk
+        title_id: int = obj.review.title_id
+        bury_comments(((comment_id, obj.review_id, title_id), ))
+        super().delete_model(request, obj)
+        change_comments(obj.review_id, -1)
+        refresh_reviews((obj.review_id, ))
+        invalidate_title(title_id)
+        publish_on_commit(title_id, 'comment.deleted', {
+            'id': comment_id, 'review': obj.review_id
+        })
 
 
-admin.site.register(Title)
-admin.site.register(Review)
-admin.site.register(Comment)
+@admin.register(DeletionTask)
+class DeletionTaskAdmin(admin.ModelAdmin):
+    list_display: tuple[str, ...] = (
+        "pk",
+        "kind",
+        "object_id",
+        "status",
+        "reviews_deleted",
+        "comments_deleted",
+        "created_at",
+        "finished_at",
+    )
+    list_filter: tuple[str, str] = ("status", "kind", )
+    readonly_fields: tuple[str, ...] = (
+        "kind",
+        "object_id",
+        "status",
+        "reviews_deleted",
+        "comments_deleted",
+        "error",
+        "created_at",
+        "finished_at",
+    )
@@ -5,3 +5,6 @@ class ReviewsConfig(AppConfig):
     default_auto_field: str = 'django.db.models.BigAutoField'
     name: str = 'reviews'
     verbose_name: str = 'Отзывы'
+
+    def ready(self) -> None:
+        from . import ids, shards  # noqa: F401
@@ -0,0 +1,337 @@
+import json
+import sqlite3
+import threading
+import zlib
+from collections import defaultdict
+from datetime import datetime, time, timezone
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Comment, DeletionTask, Review, User
+from .shards import live_authors, live_titles, on_shards
+
+SCHEMA: tuple[str, ...] = (
+    'PRAGMA journal_mode = WAL',
+    'CREATE TABLE IF NOT EXISTS review ('
+    ' id INTEGER PRIMARY KEY, title_id INTEGER NOT NULL,'
+    ' author_id INTEGER NOT NULL, score INTEGER NOT NULL,'
+    ' pub_date TEXT NOT NULL, data BLOB NOT NULL, comments BLOB NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS review_title'
+    ' ON review (title_id, pub_date DESC, id DESC)',
+    'CREATE INDEX IF NOT EXISTS review_author ON review (author_id, title_id)',
+    'CREATE TABLE IF NOT EXISTS comment ('
+    ' id INTEGER PRIMARY KEY, review_id INTEGER NOT NULL,'
+    ' author_id INTEGER NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS comment_review ON comment (review_id)',
+    'CREATE INDEX IF NOT EXISTS comment_author ON comment (author_id)',
+)
+REVIEW_COLUMNS: str = 'id, title_id, author_id, score, pub_date, data'
+
+
+def pack(value: Any) -> bytes:
+    return zlib.compress(
+        json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode(),
+        9
+    )
+
+
+def unpack(data: bytes) -> Any:
+    return json.loads(zlib.decompress(data))
+
+
+def moment(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def hidden_authors() -> list[int]:
+    """Авторы, чьё удаление ещё не завершено: их строки не отдаются."""
+    return list(DeletionTask.objects.filter(
+        kind=DeletionTask.USER
+    ).exclude(status=DeletionTask.DONE).values_list('object_id', flat=True))
+
+
+def author_filter(authors: list[int]) -> tuple[str, list[int]]:
+    if not authors:
+        return '', []
+    marks: str = ','.join('?' * len(authors))
+    return f' AND author_id NOT IN ({marks})', authors
+
+
+class Archive:
+    """
+    Холодное хранилище старых отзывов вместе с комментариями —
+    отдельный файл SQLite. Отзыв хранится строкой с колонками для
+    выборки и сжатыми полями, комментарии отзыва — одним сжатым
+    блоком. Архивные отзывы и комментарии доступны только для чтения.
+    """
+
+    def __init__(self) -> None:
+        self.local: threading.local = threading.local()
+
+    @property
+    def path(self) -> Path:
+        return Path(settings.ARCHIVE_PATH)
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def connect(self) -> sqlite3.Connection:
+        """Соединение потока; схема создаётся при первом подключении."""
+        path: str = str(self.path)
+        if getattr(self.local, 'path', None) != path:
+            db: sqlite3.Connection = sqlite3.connect(path)
+            for statement in SCHEMA:
+                db.execute(statement)
+            self.local.db, self.local.path = db, path
+        return self.local.db
+
+    def store(self, reviews: list[Review], comments: list[Comment]) -> None:
+        """Записывает отзывы и их комментарии одной транзакцией."""
+        threads: dict[int, list] = defaultdict(list)
+        for comment in comments:
+            threads[comment.review_id].append([
+                comment.id, comment.author_id, comment.text,
+                comment.pub_date.isoformat(), moment(comment.updated_at)
+            ])
+        with self.connect() as db:
+            db.executemany(
+                'INSERT OR REPLACE INTO review '
+                '(id, title_id, author_id, score, pub_date, data, comments) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(review.id, review.title_id, review.author_id, review.score,
+                  review.pub_date.isoformat(), pack([
+                      review.text, review.comments_count,
+                      moment(review.last_comment_at),
+                      moment(review.updated_at)
+                  ]), pack(threads[review.id])) for review in reviews]
+            )
+            db.executemany(
+                'INSERT OR REPLACE INTO comment (id, review_id, author_id) '
+                'VALUES (?, ?, ?)',
+                [(comment.id, comment.review_id, comment.author_id)
+                 for comment in comments]
+            )
+
+    def count_reviews(self, title_id: int) -> int:
+        if not self.exists():
+            return 0
+        condition, authors = author_filter(hidden_authors())
+        return self.connect().execute(
+            f'SELECT count(*) FROM review WHERE title_id = ?{condition}',
+            [title_id, *authors]
+        ).fetchone()[0]
+
+    def reviews(self, title_id: int, offset: int,
+                limit: int) -> list[Review]:
+        """Страница архивных отзывов произведения, новые первыми."""
+        condition, authors = author_filter(hidden_authors())
+        return self.attach_authors([
+            self.make_review(row) for row in self.connect().execute(
+                f'SELECT {REVIEW_COLUMNS} FROM review '
+                f'WHERE title_id = ?{condition} '
+                'ORDER BY pub_date DESC, id DESC LIMIT ? OFFSET ?',
+                [title_id, *authors, limit, offset]
+            )
+        ])
+
+    def find_review(self, title_id: int, review_id: Any) -> Optional[Review]:
+        if not self.exists() or not str(review_id).isdigit():
+            return None
+        row: Optional[tuple] = self.connect().execute(
+            f'SELECT {REVIEW_COLUMNS} FROM review '
+            'WHERE id = ? AND title_id = ?', (int(review_id), title_id)
+        ).fetchone()
+        if row is None or row[2] in hidden_authors():
+            return None
+        found: list[Review] = self.attach_authors([self.make_review(row)])
+        return found[0] if found else None
+
+    def comments(self, review: Review) -> list[Comment]:
+        """Комментарии архивного отзыва в порядке -pub_date."""
+        data: bytes = self.connect().execute(
+            'SELECT comments FROM review WHERE id = ?', (review.id,)
+        ).fetchone()[0]
+        hidden: list[int] = hidden_authors()
+        return self.attach_authors([
+            Comment(id=pk, review_id=review.id, author_id=author_id,
+                    text=text, pub_date=parse_date(pub_date),
+                    updated_at=parse_datetime(updated_at))
+            for pk, author_id, text, pub_date, updated_at in unpack(data)
+            if author_id not in hidden
+        ])
+
+    def has_review(self, title_id: Any, author_id: int) -> bool:
+        if not self.exists():
+            return False
+        return self.connect().execute(
+            'SELECT 1 FROM review WHERE author_id = ? AND title_id = ?',
+            (author_id, int(title_id))
+        ).fetchone() is not None
+
+    def histograms(self, title_ids: Optional[list[int]] = None) -> dict:
+        """Количество архивных отзывов по произведениям и оценкам."""
+        counters: dict[int, dict] = defaultdict(dict)
+        if not self.exists():
+            return counters
+        query: str = 'SELECT title_id, score, count(*) FROM review'
+        params: list[int] = []
+        if title_ids is not None:
+            query += ' WHERE title_id IN (SELECT value FROM json_each(?))'
+            params.append(json.dumps(title_ids))
+        for title_id, score, amount in self.connect().execute(
+                query + ' GROUP BY title_id, score', params):
+            counters[title_id][score] = amount
+        return counters
+
+    def highest_id(self, table: str) -> int:
+        """Наибольший id архивных отзывов или комментариев."""
+        if not self.exists():
+            return 0
+        return self.connect().execute(
+            f'SELECT coalesce(max(id), 0) FROM {table}'
+        ).fetchone()[0]
+
+    def taken_ids(self, table: str, ids: list[int]) -> set[int]:
+        """Какие из id уже заняты архивными строками."""
+        if not self.exists() or not ids:
+            return set()
+        return {pk for pk, in self.connect().execute(
+            f'SELECT id FROM {table} '
+            'WHERE id IN (SELECT value FROM json_each(?))', (json.dumps(ids),)
+        )}
+
+    def purge_title(self, title_id: int) -> tuple[list[tuple], int]:
+        """
+        Удаляет архив произведения. Возвращает пары (id отзыва,
+        id произведения) и количество удалённых комментариев.
+        """
+        if not self.exists():
+            return [], 0
+        with self.connect() as db:
+            rows: list[tuple] = db.execute(
+                'SELECT id, title_id FROM review WHERE title_id = ?',
+                (title_id,)
+            ).fetchall()
+            comments: int = db.execute(
+                'DELETE FROM comment WHERE review_id IN '
+                '(SELECT id FROM review WHERE title_id = ?)', (title_id,)
+            ).rowcount
+            db.execute('DELETE FROM review WHERE title_id = ?', (title_id,))
+        return rows, comments
+
+    def purge_author(self, author_id: int) -> tuple[list, list, int]:
+        """
+        Удаляет архивные отзывы автора со всеми комментариями и его
+        комментарии к чужим отзывам. Возвращает пары (id отзыва,
+        id произведения), тройки (id комментария, id отзыва,
+        id произведения) его комментариев к чужим отзывам
+        и количество всех удалённых комментариев.
+        """
+        if not self.exists():
+            return [], [], 0
+        with self.connect() as db:
+            reviews: list[tuple] = db.execute(
+                'SELECT id, title_id FROM review WHERE author_id = ?',
+                (author_id,)
+            ).fetchall()
+            removed: int = db.execute(
+                'DELETE FROM comment WHERE review_id IN '
+                '(SELECT id FROM review WHERE author_id = ?)', (author_id,)
+            ).rowcount
+            db.execute('DELETE FROM review WHERE author_id = ?', (author_id,))
+            comments: list[tuple] = []
+            for review_id, title_id, data, thread in db.execute(
+                    'SELECT id, title_id, data, comments FROM review '
+                    'WHERE id IN (SELECT review_id FROM comment '
+                    'WHERE author_id = ?)', (author_id,)).fetchall():
+                kept: list = []
+                for row in unpack(thread):
+                    if row[1] == author_id:
+                        comments.append((row[0], review_id, title_id))
+                    else:
+                        kept.append(row)
+                text, _, _, updated_at = unpack(data)
+                last: Optional[str] = max(
+                    (row[3] for row in kept), default=None
+                )
+                last_comment_at: Optional[str] = last and moment(
+                    datetime.combine(parse_date(last), time.min,
+                                     tzinfo=timezone.utc)
+                )
+                db.execute(
+                    'UPDATE review SET data = ?, comments = ? WHERE id = ?',
+                    (pack([text, len(kept), last_comment_at, updated_at]),
+                     pack(kept), review_id)
+                )
+            db.execute('DELETE FROM comment WHERE author_id = ?',
+                       (author_id,))
+        return reviews, comments, removed + len(comments)
+
+    def make_review(self, row: tuple) -> Review:
+        pk, title_id, author_id, score, pub_date, data = row
+        text, comments_count, last_comment_at, updated_at = unpack(data)
+        return Review(
+            id=pk, title_id=title_id, author_id=author_id, score=score,
+            text=text, pub_date=parse_datetime(pub_date),
+            comments_count=comments_count,
+            last_comment_at=last_comment_at and parse_datetime(
+                last_comment_at
+            ),
+            updated_at=parse_datetime(updated_at)
+        )
+
+    def attach_authors(self, rows: list) -> list:
+        """Подставляет авторов одним запросом."""
+        authors: dict[int, User] = User.objects.in_bulk(
+            {row.author_id for row in rows}
+        )
+        for row in rows:
+            row.author = authors.get(row.author_id)
+        return [row for row in rows if row.author is not None]
+
+
+archive: Archive = Archive()
+
+
+def archive_batches(cutoff: datetime,
+                    batch_size: int) -> Iterator[tuple[list[int], int]]:
+    """
+    Переносит в архив отзывы, в ветке которых ничего не менялось
+    с cutoff, пачками по каждому шарду. Горячие строки удаляются
+    в транзакции базы, которая фиксируется после записи пачки в архив:
+    при сбое строки остаются в базе и переносятся повторным запуском.
+    Возвращает id произведений пачки и количество комментариев.
+    """
+    candidates = live_titles(live_authors(Review.objects.filter(
+        updated_at__lt=cutoff
+    ))).exclude(
+        Q(last_comment_at__gte=cutoff) | Q(comments__updated_at__gte=cutoff)
+    ).order_by('pk')
+    for shard in on_shards(candidates):
+        last_pk: int = 0
+        while True:
+            with transaction.atomic(using=shard.db):
+                reviews: list[Review] = list(
+                    shard.filter(pk__gt=last_pk)[:batch_size]
+                )
+                if not reviews:
+                    break
+                last_pk = reviews[-1].pk
+                review_ids: list[int] = [review.id for review in reviews]
+                comments = Comment.objects.using(shard.db).filter(
+                    review_id__in=review_ids
+                )
+                thread: list[Comment] = list(
+                    comments.order_by('-pub_date', '-id')
+                )
+                comments.delete()
+                Review.objects.using(shard.db).filter(
+                    pk__in=review_ids
+                ).delete()
+                archive.store(reviews, thread)
+            yield [review.title_id for review in reviews], len(thread)
@@ -1,3 +1,7 @@
 COUNT_CHARACTERS: int = 15
 ONE_POINT: int = 1
 TEN_POINTS: int = 10
+RATING_PRIOR_MEAN: float = 6.0
+RATING_PRIOR_WEIGHT: int = 10
+LEADERBOARD_ALL: str = 'all'
+MAX_BULK_IDS: int = 1000
@@ -0,0 +1,228 @@
+import threading
+from typing import Callable, Iterator, Optional
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from api_back.prerender import refresh_reviews, refresh_titles
+from .archive import archive
+from .models import (Comment, DeletionTask, LeaderboardEntry, Review, Title,
+                     User)
+from .shards import on_shards
+from .stats import rebuild_comment_stats, rebuild_title_stats
+from .tombstones import bury_comments, bury_reviews
+
+_lock: threading.Lock = threading.Lock()
+_worker: Optional[threading.Thread] = None
+_wanted: bool = False
+
+
+def schedule_title_deletion(title: Title) -> DeletionTask:
+    """
+    Скрывает произведение сразу, а отзывы и комментарии
+    к нему удаляет фоновая задача.
+    """
+    Title.objects.filter(pk=title.pk).update(is_deleted=True)
+    LeaderboardEntry.objects.filter(title_id=title.pk).delete()
+    task: DeletionTask = DeletionTask.objects.create(
+        kind=DeletionTask.TITLE, object_id=title.pk
+    )
+    transaction.on_commit(start_worker)
+    return task
+
+
+def schedule_user_deletion(user: User) -> DeletionTask:
+    """Блокирует и скрывает пользователя, его данные удаляются в фоне."""
+    User.objects.filter(pk=user.pk).update(is_deleted=True, is_active=False)
+    task: DeletionTask = DeletionTask.objects.create(
+        kind=DeletionTask.USER, object_id=user.pk
+    )
+    transaction.on_commit(start_worker)
+    return task
+
+
+def start_worker() -> None:
+    """Запускает фоновый поток, если он ещё не обрабатывает очередь."""
+    global _worker, _wanted
+    if not settings.DELETION_IN_BACKGROUND:
+        run_pending()
+        return
+    with _lock:
+        _wanted = True
+        if _worker is not None and _worker.is_alive():
+            return
+        _worker = threading.Thread(
+            target=_work, name='deletion-worker', daemon=True
+        )
+        _worker.start()
+
+
+def _work() -> None:
+    global _worker, _wanted
+    try:
+        while True:
+            with _lock:
+                if not _wanted:
+                    _worker = None
+                    return
+                _wanted = False
+            run_pending()
+    finally:
+        connections.close_all()
+
+
+def run_pending() -> int:
+    """Выполняет задачи из очереди, возвращает число выполненных."""
+    done: int = 0
+    while True:
+        task: Optional[DeletionTask] = DeletionTask.objects.filter(
+            status=DeletionTask.PENDING
+        ).order_by('created_at', 'pk').first()
+        if task is None:
+            return done
+        if process(task):
+            done += 1
+
+
+def process(task: DeletionTask) -> bool:
+    """
+    Выполняет задачу, если её не забрал другой процесс: статус меняется
+    условным UPDATE, и только один из конкурентов получит одну строку.
+    """
+    if not DeletionTask.objects.filter(
+            pk=task.pk, status=DeletionTask.PENDING
+    ).update(status=DeletionTask.RUNNING):
+        return False
+    task.status = DeletionTask.RUNNING
+    try:
+        if task.kind == DeletionTask.TITLE:
+            purge_title(task)
+        else:
+            purge_user(task)
+    except Exception as error:
+        task.status = DeletionTask.FAILED
+        task.error = repr(error)
+    else:
+        task.status = DeletionTask.DONE
+    task.finished_at = timezone.now()
+    task.save(update_fields=('status', 'error', 'finished_at'))
+    return True
+
+
+def delete_batches(queryset: QuerySet, *fields: str,
+                   check: Optional[Callable] = None) -> Iterator[list]:
+    """
+    Удаляет строки выборки пачками, каждая в своей транзакции,
+    чтобы не держать блокировку записи долго. Возвращает значения
+    полей удалённых строк для пересчёта зависимых агрегатов.
+    Пачка удаляется в той базе, из которой прочитана. Функция check
+    вызывается перед каждой пачкой и может прервать удаление.
+    """
+    model = queryset.model
+    queryset = queryset.order_by()
+    while True:
+        if check is not None:
+            check()
+        with transaction.atomic(using=queryset.db):
+            rows: list = list(
+                queryset.values_list('pk', *fields)[
+                    :settings.DELETION_BATCH_SIZE
+                ]
+            )
+            if not rows:
+                return
+            model.objects.using(queryset.db).filter(
+                pk__in=[row[0] for row in rows]
+            ).delete()
+            yield rows
+
+
+def save_progress(task: DeletionTask) -> None:
+    task.save(update_fields=('reviews_deleted', 'comments_deleted'))
+
+
+def purge_title(task: DeletionTask) -> None:
+    title_id: int = task.object_id
+    for comments in on_shards(
+            Comment.objects.filter(review__title_id=title_id)):
+        for rows in delete_batches(comments):
+            task.comments_deleted += len(rows)
+            save_progress(task)
+    for reviews in on_shards(Review.objects.filter(title_id=title_id)):
+        for rows in delete_batches(reviews, 'title_id'):
+            bury_reviews(rows)
+            task.reviews_deleted += len(rows)
+            save_progress(task)
+    rows, comments = archive.purge_title(title_id)
+    bury_reviews(rows)
+    task.reviews_deleted += len(rows)
+    task.comments_deleted += comments
+    save_progress(task)
+    Title.objects.filter(pk=title_id).delete()
+
+
+def delete_comments(comments: QuerySet,
+                    check: Optional[Callable] = None) -> Iterator[int]:
+    """
+    Удаляет комментарии пачками с отметками об удалении
+    и пересчётом счётчиков их отзывов. Возвращает размеры пачек.
+    """
+    for shard in on_shards(comments):
+        for rows in delete_batches(shard, 'review_id', 'review__title_id',
+                                   check=check):
+            bury_comments(rows)
+            review_ids: set[int] = {review_id for _, review_id, _ in rows}
+            rebuild_comment_stats(review_ids)
+            refresh_reviews(review_ids)
+            yield len(rows)
+
+
+def delete_reviews(reviews: QuerySet, check: Optional[Callable] = None
+                   ) -> Iterator[tuple[int, int]]:
+    """
+    Удаляет отзывы пачками: сначала их комментарии, затем сами
+    отзывы с отметками и пересчётом рейтингов произведений.
+    Возвращает пары (удалено отзывов, удалено комментариев).
+    """
+    for shard in on_shards(Comment.objects.filter(review__in=reviews)):
+        for rows in delete_batches(shard, check=check):
+            yield 0, len(rows)
+    for shard in on_shards(reviews):
+        for rows in delete_batches(shard, 'title_id', check=check):
+            bury_reviews(rows)
+            title_ids: set[int] = {title_id for _, title_id in rows}
+            rebuild_title_stats(title_ids)
+            refresh_titles(title_ids)
+            yield len(rows), 0
+
+
+def purge_author(user_id: int, check: Optional[Callable] = None
+                 ) -> Iterator[tuple[int, int]]:
+    """
+    Удаляет все отзывы и комментарии автора, включая архивные.
+    Возвращает пары (удалено отзывов, удалено комментариев) по пачкам.
+    """
+    for deleted in delete_comments(
+            Comment.objects.filter(author_id=user_id), check):
+        yield 0, deleted
+    yield from delete_reviews(Review.objects.filter(author_id=user_id), check)
+    if check is not None:
+        check()
+    rows, comments, removed = archive.purge_author(user_id)
+    bury_reviews(rows)
+    bury_comments(comments)
+    if rows:
+        title_ids: set[int] = {title_id for _, title_id in rows}
+        rebuild_title_stats(title_ids)
+        refresh_titles(title_ids)
+    yield len(rows), removed
+
+
+def purge_user(task: DeletionTask) -> None:
+    for reviews, comments in purge_author(task.object_id):
+        task.reviews_deleted += reviews
+        task.comments_deleted += comments
+        save_progress(task)
+    User.objects.filter(pk=task.object_id).delete()
@@ -0,0 +1,90 @@
+import threading
+from typing import Any, Optional
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import F, Max, Model
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from .archive import archive
+from .models import Comment, IdSequence, Review, Tombstone
+from .shards import is_sharded, shard_aliases
+
+ID_BLOCK: int = 1000
+
+
+def highest_id(model: type[Model]) -> int:
+    """
+    Наибольший id, который уже встречался: в базах, в архиве
+    и в отметках об удалении, которые видят клиенты синхронизации.
+    """
+    kind: str = model._meta.model_name
+    found: list[int] = [
+        model.objects.using(alias).aggregate(top=Max('pk'))['top'] or 0
+        for alias in (DEFAULT_DB_ALIAS, *shard_aliases())
+    ]
+    found.append(Tombstone.objects.filter(kind=kind).aggregate(
+        top=Max('object_id')
+    )['top'] or 0)
+    found.append(archive.highest_id(kind))
+    return max(found)
+
+
+class IdAllocator:
+    """
+    Выдача id строкам шардов блоками из счётчика в основной базе
+    (hi/lo): один UPDATE на ID_BLOCK новых строк, id уникальны
+    во всех шардах и процессах. Неиспользованный остаток блока
+    при перезапуске процесса пропадает.
+    """
+
+    def __init__(self) -> None:
+        self.lock: threading.Lock = threading.Lock()
+        self.blocks: dict[str, tuple[int, int]] = {}
+
+    def next_id(self, model: type[Model]) -> int:
+        name: str = model._meta.label_lower
+        with self.lock:
+            current, stop = self.blocks.get(name, (0, 0))
+            if current >= stop:
+                current, stop = self.reserve(model)
+            self.blocks[name] = (current + 1, stop)
+            return current
+
+    def sequence(self, model: type[Model]) -> IdSequence:
+        """Счётчик модели; создаётся от наибольшего встречавшегося id."""
+        name: str = model._meta.label_lower
+        found: Optional[IdSequence] = IdSequence.objects.filter(
+            name=name
+        ).first()
+        if found is not None:
+            return found
+        start: int = highest_id(model) + 1
+        try:
+            with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                return IdSequence.objects.create(
+                    name=name, first_value=start, next_value=start
+                )
+        except IntegrityError:
+            return IdSequence.objects.get(name=name)
+
+    def reserve(self, model: type[Model]) -> tuple[int, int]:
+        name: str = self.sequence(model).name
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            IdSequence.objects.filter(name=name).update(
+                next_value=F('next_value') + ID_BLOCK
+            )
+            stop: int = IdSequence.objects.get(name=name).next_value
+        return stop - ID_BLOCK, stop
+
+
+id_allocator: IdAllocator = IdAllocator()
+
+
+@receiver(pre_save, sender=Review)
+@receiver(pre_save, sender=Comment)
+def assign_global_id(sender: type[Model], instance: Model,
+                     **kwargs: Any) -> None:
+    """Новой строке при шардах id выдаётся до вставки."""
+    if is_sharded() and instance.pk is None:
+        instance.pk = id_allocator.next_id(sender)
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from api_back.cache import invalidate_title
+from reviews.archive import archive, archive_batches
+
+
+class Command(BaseCommand):
+    """
+    Перенос старых отзывов вместе с комментариями в архив.
+    Отзыв переносится, если в его ветке ничего не менялось
+    дольше ARCHIVE_AFTER_DAYS дней.
+    """
+
+    help: str = 'Moves old review threads into the compressed archive'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--days', type=int,
+                            default=settings.ARCHIVE_AFTER_DAYS,
+                            help='Возраст последнего изменения, дни')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options) -> None:
+        cutoff: datetime = timezone.now() - timedelta(days=options['days'])
+        reviews: int = 0
+        comments: int = 0
+        for title_ids, moved in archive_batches(cutoff,
+                                                options['batch_size']):
+            for title_id in set(title_ids):
+                invalidate_title(title_id)
+            reviews += len(title_ids)
+            comments += moved
+            self.stdout.write(f'{reviews} reviews, {comments} comments')
+        size: int = archive.path.stat().st_size if archive.exists() else 0
+        self.stdout.write(
+            f'Archived {reviews} reviews and {comments} comments older than '
+            f'{cutoff:%Y-%m-%d}; {archive.path} is {size} bytes'
+        )
@@ -0,0 +1,76 @@
+import random
+import time
+from typing import Callable
+
+from django.core.management import BaseCommand
+from django.db.models import QuerySet
+
+from api_back.bitmaps import Bitmap, filter_by_ids, title_index
+from reviews.models import Genre, Title
+
+PAGE_SIZE: int = 10
+
+
+def join_filter(genres: list[str], mode: str) -> QuerySet:
+    """Прежний способ: фильтрация через JOIN с GenreTitle."""
+    queryset: QuerySet = Title.objects.all()
+    if mode == 'all':
+        for slug in genres:
+            queryset = queryset.filter(genre__slug=slug)
+        return queryset
+    return queryset.filter(genre__slug__in=genres).distinct()
+
+
+def bitmap_filter(genres: list[str], mode: str) -> QuerySet:
+    """Фильтрация по битовым картам индекса каталога."""
+    bitmap: Bitmap = title_index.match(genres, [], mode)
+    return filter_by_ids(Title.objects.all(), bitmap.ids())
+
+
+class Command(BaseCommand):
+    """Сравнение фильтра по жанрам через JOIN и через битовые карты."""
+
+    help: str = 'Benchmarks join-based and bitmap genre filtering'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--genres', type=int, default=2,
+                            help='Жанров в одном запросе')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options) -> None:
+        slugs: list[str] = list(Genre.objects.values_list('slug', flat=True))
+        if len(slugs) < options['genres']:
+            self.stderr.write('Not enough genres, run generate_data first')
+            return
+        rnd: random.Random = random.Random(options['seed'])
+        cases: list[tuple[list[str], str]] = [
+            (rnd.sample(slugs, options['genres']), rnd.choice(('all', 'any')))
+            for _ in range(options['repeat'])
+        ]
+        started: float = time.perf_counter()
+        title_index.build()
+        self.stdout.write(
+            f'bitmap index build: '
+            f'{(time.perf_counter() - started) * 1000:.1f} ms, '
+            f'{title_index.nbytes() / 1024:.1f} KiB'
+        )
+        for name, method in (('join', join_filter),
+                             ('bitmap', bitmap_filter)):
+            self.measure(name, method, cases)
+
+    def measure(self, name: str, method: Callable,
+                cases: list[tuple[list[str], str]]) -> None:
+        timings: list[float] = []
+        for genres, mode in cases:
+            started: float = time.perf_counter()
+            queryset: QuerySet = method(genres, mode).order_by('id')
+            queryset.count()
+            list(queryset[:PAGE_SIZE])
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        self.stdout.write(
+            f'{name:>6}: mean {sum(timings) / len(timings) * 1000:.2f} ms, '
+            f'p50 {timings[len(timings) // 2] * 1000:.2f} ms, '
+            f'p95 {timings[int(len(timings) * 0.95)] * 1000:.2f} ms'
+        )
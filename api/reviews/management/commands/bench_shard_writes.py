@@ -0,0 +1,90 @@
+import threading
+import time
+from itertools import count
+
+from django.core.management import BaseCommand
+from django.db import connections, transaction
+
+from reviews.models import Review
+from reviews.shards import is_sharded, shard_aliases, shard_for, use_shard
+
+BENCH_TITLES: int = 10 ** 12
+
+
+class Command(BaseCommand):
+    """
+    Пропускная способность записи отзывов при 1..N шардах:
+    потоки пишут отзывы по одному в транзакции, как запросы API,
+    в произведения, которые попадают в первые k шардов.
+    Записанные строки удаляются после замера.
+    """
+
+    help: str = 'Benchmarks review write throughput as shards are added'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--writes', type=int, default=2000,
+                            help='Записей в одном замере')
+        parser.add_argument('--threads', type=int, default=8)
+
+    def handle(self, *args, **options) -> None:
+        if not is_sharded():
+            self.stderr.write('REVIEW_SHARDS is not set')
+            raise SystemExit(1)
+        aliases: list[str] = shard_aliases()
+        titles: dict[str, list[int]] = {alias: [] for alias in aliases}
+        for title_id in count(BENCH_TITLES):
+            titles[shard_for(title_id)].append(title_id)
+            if all(len(found) >= options['threads']
+                   for found in titles.values()):
+                break
+        baseline: float = 0
+        for shards in range(1, len(aliases) + 1):
+            active: list[int] = [
+                title_id for alias in aliases[:shards]
+                for title_id in titles[alias][:options['threads']]
+            ]
+            elapsed: float = self.measure(
+                active, options['writes'], options['threads']
+            )
+            rate: float = options['writes'] / elapsed
+            baseline = baseline or rate
+            self.stdout.write(
+                f'{shards} shard(s): {rate:,.0f} writes/s '
+                f'(x{rate / baseline:.2f})'
+            )
+
+    def measure(self, title_ids: list[int], writes: int,
+                threads: int) -> float:
+        authors = count(1)
+        lock: threading.Lock = threading.Lock()
+
+        def work(number: int) -> None:
+            try:
+                for index in range(number, writes, threads):
+                    title_id: int = title_ids[index % len(title_ids)]
+                    with lock:
+                        author_id: int = next(authors)
+                    with use_shard(title_id) as alias, (
+                            transaction.atomic(using=alias)):
+                        Review.objects.create(
+                            title_id=title_id, author_id=author_id,
+                            text='bench', score=author_id % 10 + 1
+                        )
+            finally:
+                connections.close_all()
+
+        workers: list[threading.Thread] = [
+            threading.Thread(target=work, args=(number,))
+            for number in range(threads)
+        ]
+        started: float = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed: float = time.perf_counter() - started
+        for alias in shard_aliases():
+            Review.objects.using(alias).filter(
+                title_id__gte=BENCH_TITLES
+            ).delete()
+        return elapsed
@@ -0,0 +1,114 @@
+import asyncio
+import re
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+from django.core.management import BaseCommand
+
+from api_back.events import broker, stream_title
+
+SEQUENCE: re.Pattern = re.compile(rb'"seq": (\d+)')
+
+
+class Command(BaseCommand):
+    """
+    Нагрузочный тест потока событий: множество одновременных
+    подписчиков, память на подписчика и задержка рассылки.
+    """
+
+    help: str = 'Benchmarks SSE fan-out to concurrent subscribers'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--subscribers', type=int, default=5000)
+        parser.add_argument('--titles', type=int, default=10,
+                            help='Между скольких произведений разделить '
+                                 'подписчиков')
+        parser.add_argument('--events', type=int, default=200)
+        parser.add_argument('--interval', type=float, default=0.005,
+                            help='Пауза между событиями, секунды')
+
+    def handle(self, *args, **options) -> None:
+        self.titles: int = options['titles']
+        self.expected: Counter = Counter(
+            index % self.titles + 1 for index in range(options['subscribers'])
+        )
+        self.delivered: Counter = Counter()
+        self.sent_at: dict[int, float] = {}
+        self.latencies: list[float] = []
+        self.lock: threading.Lock = threading.Lock()
+
+        loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        self.closed: asyncio.Future = asyncio.run_coroutine_threadsafe(
+            self.make_future(), loop
+        ).result()
+
+        tracemalloc.start()
+        memory_before: int = tracemalloc.get_traced_memory()[0]
+        started: float = time.perf_counter()
+        for title_id, amount in self.expected.items():
+            for _ in range(amount):
+                asyncio.run_coroutine_threadsafe(
+                    stream_title(title_id, self.receive, self.send), loop
+                )
+        while sum(broker.subscribers_count(title_id)
+                  for title_id in self.expected) < options['subscribers']:
+            time.sleep(0.01)
+        elapsed: float = time.perf_counter() - started
+        memory: int = tracemalloc.get_traced_memory()[0] - memory_before
+        tracemalloc.stop()
+        self.stdout.write(
+            f'{options["subscribers"]} subscribers connected in '
+            f'{elapsed:.2f}s, {memory / options["subscribers"]:.0f} bytes '
+            f'per idle subscriber'
+        )
+
+        started = time.perf_counter()
+        for seq in range(options['events']):
+            with self.lock:
+                self.sent_at[seq] = time.perf_counter()
+            broker.publish(seq % self.titles + 1, 'bench', {'seq': seq})
+            time.sleep(options['interval'])
+        deadline: float = time.monotonic() + 30
+        while (len(self.latencies) < options['events']
+               and time.monotonic() < deadline):
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - started
+        deliveries: int = sum(self.delivered.values())
+        loop.call_soon_threadsafe(self.closed.set_result, None)
+
+        self.latencies.sort()
+        if not self.latencies:
+            self.stderr.write('No event reached all subscribers')
+            return
+        self.stdout.write(
+            f'{deliveries} deliveries in {elapsed:.2f}s '
+            f'({deliveries / elapsed:,.0f}/s); fan-out latency '
+            f'p50 {self.percentile(0.5) * 1000:.1f} ms, '
+            f'p99 {self.percentile(0.99) * 1000:.1f} ms, '
+            f'complete {len(self.latencies)}/{options["events"]}'
+        )
+
+    async def make_future(self) -> asyncio.Future:
+        return asyncio.get_running_loop().create_future()
+
+    async def receive(self) -> dict:
+        await self.closed
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message: dict) -> None:
+        for match in SEQUENCE.findall(message.get('body', b'')):
+            seq: int = int(match)
+            with self.lock:
+                self.delivered[seq] += 1
+                if self.delivered[seq] == self.expected[seq % self.titles + 1]:
+                    self.latencies.append(
+                        time.perf_counter() - self.sent_at[seq]
+                    )
+
+    def percentile(self, value: float) -> float:
+        return self.latencies[
+            min(len(self.latencies) - 1, int(len(self.latencies) * value))
+        ]
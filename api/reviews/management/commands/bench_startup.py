@@ -0,0 +1,141 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from statistics import median
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+CHILD: str = '''
+import asyncio
+import json
+import resource
+import sys
+import time
+
+entry, path = sys.argv[1:3]
+started = time.time()
+if entry == 'asgi':
+    from api.asgi import application
+else:
+    from api.wsgi import application
+ready = time.time()
+status = []
+if entry == 'asgi':
+    async def respond():
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+
+        await application({
+            'type': 'http', 'asgi': {'version': '3.0'}, 'method': 'GET',
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'query_string': b'', 'headers': [(b'host', b'localhost')],
+            'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+        }, receive, send)
+    asyncio.run(respond())
+else:
+    from wsgiref.util import setup_testing_defaults
+    environ = {'PATH_INFO': path, 'REQUEST_METHOD': 'GET'}
+    setup_testing_defaults(environ)
+    b''.join(application(
+        environ, lambda line, headers, exc_info=None: status.append(
+            int(line.split()[0])
+        )
+    ))
+print(json.dumps({
+    'started': started,
+    'ready': ready,
+    'responded': time.time(),
+    'status': status[0] if status else None,
+    'max_rss_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'modules': len(sys.modules),
+}))
+'''
+
+
+class Command(BaseCommand):
+    """
+    Холодный старт процесса: каждый запуск — новый интерпретатор,
+    который импортирует api/wsgi.py (или api/asgi.py) с заданными
+    настройками и обрабатывает один запрос. Печатаются медианы времени
+    до готовности приложения и до первого ответа, память процесса
+    и число модулей; с --imports — самые долгие импорты.
+    """
+
+    help: str = 'Measures worker cold start time and memory to first response'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--settings-modules', nargs='+',
+                            default=['api.settings', 'api.settings_api'])
+        parser.add_argument('--entry', choices=('wsgi', 'asgi'),
+                            default='wsgi')
+        parser.add_argument('--path', default='/api/v1/genres/')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--imports', type=int, default=0,
+                            help='Показать столько самых долгих импортов')
+
+    def handle(self, *args, **options) -> None:
+        for module in options['settings_modules']:
+            runs: list[dict] = [
+                self.run(module, options['entry'], options['path'], False)
+                for _ in range(options['repeat'])
+            ]
+            self.stdout.write(
+                '{}: ready {:.0f} ms, first response {:.0f} ms, '
+                'max RSS {:.1f} MiB, {} modules, status {}'.format(
+                    module,
+                    median(run['ready'] - run['spawned'] for run in runs)
+                    * 1000,
+                    median(run['responded'] - run['spawned'] for run in runs)
+                    * 1000,
+                    median(run['max_rss_kib'] for run in runs) / 1024,
+                    runs[0]['modules'],
+                    runs[0]['status'],
+                )
+            )
+            if options['imports']:
+                self.show_imports(
+                    self.run(module, options['entry'], options['path'],
+                             True)['importtime'],
+                    options['imports']
+                )
+
+    def run(self, module: str, entry: str, path: str,
+            importtime: bool) -> dict:
+        command: list[str] = [sys.executable]
+        if importtime:
+            command += ['-X', 'importtime']
+        spawned: float = time.time()
+        result = subprocess.run(
+            command + ['-c', CHILD, entry, path],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': module},
+        )
+        if result.returncode:
+            self.stderr.write(result.stderr)
+            raise SystemExit(result.returncode)
+        return {
+            **json.loads(result.stdout.splitlines()[-1]),
+            'spawned': spawned,
+            'importtime': result.stderr,
+        }
+
+    def show_imports(self, report: str, limit: int) -> None:
+        """Модули с наибольшим собственным временем импорта."""
+        modules: list[tuple[int, int, str]] = []
+        for line in report.splitlines():
+            if not line.startswith('import time:') or '[us]' in line:
+                continue
+            own, cumulative, name = line[len('import time:'):].split('|')
+            modules.append((int(own), int(cumulative), name.strip()))
+        for own, cumulative, name in sorted(modules, reverse=True)[:limit]:
+            self.stdout.write(
+                f'  {own / 1000:8.1f} ms self {cumulative / 1000:8.1f} ms '
+                f'cumulative  {name}'
+            )
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management import BaseCommand
+
+from api_back.catalog import SNAPSHOT_VERSION_KEY, touch_catalog
+from api_back.snapshot import Snapshot, catalog_snapshot
+
+
+class Command(BaseCommand):
+    """
+    Сборка снимка каталога. Нужна после массовой загрузки:
+    она не пересобирает снимок сама.
+    """
+
+    help: str = 'Compiles the catalog into a memory-mapped snapshot file'
+
+    def handle(self, *args, **options) -> None:
+        touch_catalog(SNAPSHOT_VERSION_KEY)
+        started: float = time.perf_counter()
+        size: int = catalog_snapshot.build()
+        elapsed: float = time.perf_counter() - started
+        if not size:
+            self.stderr.write('Catalog changed during the build, retry')
+            raise SystemExit(1)
+        snapshot: Snapshot = Snapshot(catalog_snapshot.path)
+        self.stdout.write(
+            f'{len(snapshot.titles)} titles, {len(snapshot.genres)} genres, '
+            f'{len(snapshot.categories)} categories: {size} bytes in '
+            f'{elapsed:.2f}s -> {catalog_snapshot.path}'
+        )
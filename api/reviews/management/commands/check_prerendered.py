@@ -0,0 +1,66 @@
+from typing import Callable
+
+from django.core.management import BaseCommand
+from django.db.models import QuerySet
+
+from api_back.prerender import (BATCH_SIZE, render_review, render_title,
+                                review_queryset, title_queryset)
+from reviews.models import Review, Title
+from reviews.shards import on_shards
+
+
+class Command(BaseCommand):
+    """Сверка готовых JSON-фрагментов с текущими данными."""
+
+    help: str = 'Finds stale or missing pre-rendered title/review JSON'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--fix', action='store_true',
+                            help='Перезаписать расходящиеся фрагменты')
+
+    def handle(self, *args, **options) -> None:
+        drift: int = 0
+        for model, queryset, render_row in (
+                (Title, title_queryset().filter(is_deleted=False),
+                 render_title),
+                *((Review, reviews, render_review)
+                  for reviews in on_shards(review_queryset()))):
+            drift += self.check_model(model, queryset, render_row,
+                                      options['fix'])
+        if drift and not options['fix']:
+            self.stderr.write(f'{drift} fragments differ, run with --fix')
+            raise SystemExit(1)
+
+    def check_model(self, model, queryset: QuerySet, render_row: Callable,
+                    fix: bool) -> int:
+        stale: int = 0
+        missing: int = 0
+        last_pk: int = 0
+        while True:
+            rows: list = list(
+                queryset.filter(pk__gt=last_pk).order_by('pk')[:BATCH_SIZE]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1].pk
+            changed: list = []
+            for row in rows:
+                fresh: str = render_row(row)
+                if row.rendered == fresh:
+                    continue
+                if row.rendered:
+                    stale += 1
+                else:
+                    missing += 1
+                row.rendered = fresh
+                changed.append(row)
+            if fix and changed:
+                model.objects.using(queryset.db).bulk_update(
+                    changed, ('rendered',)
+                )
+        self.stdout.write(
+            f'{model.__name__} ({queryset.db}): '
+            f'{stale} stale, {missing} missing'
+            + (' (fixed)' if fix and stale + missing else '')
+        )
+        return stale + missing
@@ -0,0 +1,300 @@
+import random
+import time
+from bisect import bisect
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Iterable, Iterator
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+
+from reviews.constants import ONE_POINT, TEN_POINTS
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+from reviews.stats import rebuild_comment_stats, rebuild_title_stats
+
+WORDS: tuple[str, ...] = (
+    'фильм', 'книга', 'музыка', 'сюжет', 'герой', 'финал', 'автор',
+    'история', 'смысл', 'атмосфера', 'игра', 'актёр', 'сцена', 'звук',
+    'отлично', 'скучно', 'сильно', 'странно', 'красиво', 'честно',
+)
+START_DATE: datetime = datetime(2010, 1, 1, tzinfo=timezone.utc)
+DATE_RANGE_SECONDS: int = 15 * 365 * 24 * 60 * 60
+
+
+def skewed_weights(rnd: random.Random, size: int,
+                   alpha: float) -> list[float]:
+    """Накопленные веса с распределением Парето (длинный хвост)."""
+    return list(accumulate(rnd.paretovariate(alpha) for _ in range(size)))
+
+
+def pick_distinct(rnd: random.Random, cum_weights: list[float],
+                  count: int) -> set[int]:
+    """Выбирает count различных индексов с учётом весов."""
+    if not cum_weights:
+        return set()
+    total: float = cum_weights[-1]
+    size: int = len(cum_weights)
+    chosen: set[int] = set()
+    attempts: int = 0
+    while len(chosen) < count and attempts < count * 4:
+        chosen.add(min(bisect(cum_weights, rnd.random() * total), size - 1))
+        attempts += 1
+    while len(chosen) < count:
+        chosen.add(rnd.randrange(size))
+    return chosen
+
+
+def batched(rows: Iterable[tuple], size: int) -> Iterator[list[tuple]]:
+    """Разбивает поток строк на пачки фиксированного размера."""
+    batch: list[tuple] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class RawInserter:
+    """Пакетная вставка строк в таблицу модели в обход ORM."""
+
+    def __init__(self, model, columns: tuple[str, ...]) -> None:
+        fields: dict = {
+            field.attname: field for field in model._meta.concrete_fields
+        }
+        self.defaults: dict = {}
+        now: str = datetime.now(timezone.utc).isoformat(' ')
+        for attname, field in fields.items():
+            if attname in columns or field.primary_key:
+                continue
+            if getattr(field, 'auto_now', False) or getattr(
+                    field, 'auto_now_add', False):
+                self.defaults[field.column] = now
+            else:
+                self.defaults[field.column] = field.get_db_prep_save(
+                    field.get_default(), connection
+                )
+        names: list[str] = [fields[name].column for name in columns]
+        names += list(self.defaults)
+        quote = connection.ops.quote_name
+        self.sql: str = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(model._meta.db_table),
+            ', '.join(quote(name) for name in names),
+            ', '.join(['%s'] * len(names)),
+        )
+        self.tail: tuple = tuple(self.defaults.values())
+
+    def insert(self, rows: Iterable[tuple], batch_size: int) -> int:
+        inserted: int = 0
+        with connection.cursor() as cursor:
+            for batch in batched(rows, batch_size):
+                if self.tail:
+                    batch = [row + self.tail for row in batch]
+                cursor.executemany(self.sql, batch)
+                inserted += len(batch)
+        return inserted
+
+
+class Command(BaseCommand):
+    """Генерация синтетических данных для нагрузочного тестирования."""
+
+    help: str = 'Generates large amounts of synthetic data'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=40)
+        parser.add_argument('--titles', type=int, default=50000)
+        parser.add_argument('--reviews', type=int, default=500000,
+                            help='Примерное общее количество отзывов')
+        parser.add_argument('--comments', type=int, default=500000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=20000)
+
+    def check_options(self, options: dict) -> None:
+        """Отклоняет объёмы, для которых не из чего выбирать."""
+        for name in ('users', 'categories', 'genres', 'titles', 'reviews',
+                     'comments'):
+            if options[name] < 0:
+                raise CommandError(f'--{name} must not be negative')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        if options['titles'] and not (
+                options['categories'] and options['genres']):
+            raise CommandError(
+                '--titles needs at least one category and one genre'
+            )
+        if options['reviews'] and not (options['users'] and options['titles']):
+            raise CommandError('--reviews needs at least one user and title')
+
+    def handle(self, *args, **options) -> None:
+        self.check_options(options)
+        self.rnd: random.Random = random.Random(options['seed'])
+        self.batch_size: int = options['batch_size']
+        started: float = time.perf_counter()
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA synchronous = OFF')
+                cursor.execute('PRAGMA journal_mode = MEMORY')
+        with transaction.atomic():
+            total: int = self.generate(options)
+        elapsed: float = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Inserted {total} rows in {elapsed:.1f}s '
+            f'({total / elapsed * 60:,.0f} rows/min)'
+        ))
+        started = time.perf_counter()
+        with transaction.atomic():
+            rebuild_title_stats()
+            rebuild_comment_stats()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'Rebuilt title and review stats in {elapsed:.1f}s')
+
+    def next_id(self, model) -> int:
+        return (model.objects.aggregate(value=Max('id'))['value'] or 0) + 1
+
+    def text(self, low: int, high: int) -> str:
+        return ' '.join(self.rnd.choices(WORDS, k=self.rnd.randint(low, high)))
+
+    def date(self) -> datetime:
+        return START_DATE + timedelta(
+            seconds=self.rnd.randrange(DATE_RANGE_SECONDS)
+        )
+
+    def generate(self, options: dict) -> int:
+        rnd: random.Random = self.rnd
+        total: int = 0
+
+        first_user: int = self.next_id(User)
+        user_ids: range = range(first_user, first_user + options['users'])
+        total += self.report('users', RawInserter(
+            User, ('id', 'username', 'email', 'password')
+        ).insert((
+            (pk, f'user{pk}', f'user{pk}@yamdb.fake', '!')
+            for pk in user_ids
+        ), self.batch_size))
+
+        category_ids: list[int] = self.catalog(Category, options['categories'])
+        genre_ids: list[int] = self.catalog(Genre, options['genres'])
+        total += len(category_ids) + len(genre_ids)
+
+        first_title: int = self.next_id(Title)
+        title_ids: range = range(first_title, first_title + options['titles'])
+        category_weights: list[float] = skewed_weights(
+            rnd, len(category_ids), 1.5
+        )
+        total += self.report('titles', RawInserter(
+            Title, ('id', 'name', 'year', 'description', 'category_id')
+        ).insert((
+            (pk, f'{self.text(1, 3)} {pk}'[:200],
+             min(2023, int(rnd.triangular(1900, 2023, 2015))),
+             self.text(5, 20),
+             category_ids[min(
+                 bisect(category_weights, rnd.random() * category_weights[-1]),
+                 len(category_ids) - 1
+             )])
+            for pk in title_ids
+        ), self.batch_size))
+
+        genre_weights: list[float] = skewed_weights(rnd, len(genre_ids), 1.2)
+        total += self.report('genre links', RawInserter(
+            GenreTitle, ('title_id', 'genre_id')
+        ).insert((
+            (title_id, genre_ids[index])
+            for title_id in title_ids
+            for index in pick_distinct(
+                rnd, genre_weights, min(len(genre_ids), rnd.randint(1, 3))
+            )
+        ), self.batch_size))
+
+        review_ids: list[int] = []
+        total += self.report('reviews', RawInserter(
+            Review, ('id', 'title_id', 'author_id', 'text', 'score',
+                     'pub_date', 'updated_at')
+        ).insert(self.reviews(title_ids, user_ids, options['reviews'],
+                              review_ids), self.batch_size))
+
+        total += self.report('comments', RawInserter(
+            Comment, ('review_id', 'author_id', 'text', 'pub_date',
+                      'updated_at')
+        ).insert(self.comments(review_ids, user_ids, options['comments']),
+                 self.batch_size))
+        return total
+
+    def catalog(self, model, count: int) -> list[int]:
+        first: int = self.next_id(model)
+        ids: list[int] = list(range(first, first + count))
+        RawInserter(model, ('id', 'name', 'slug')).insert((
+            (pk, f'{model.__name__} {pk}', f'{model.__name__.lower()}-{pk}')
+            for pk in ids
+        ), self.batch_size)
+        return ids
+
+    def reviews(self, title_ids: range, user_ids: range, count: int,
+                review_ids: list[int]) -> Iterator[tuple]:
+        """
+        Отзывы: популярность произведений и активность авторов скошены.
+        Время изменения совпадает со временем публикации, чтобы
+        синхронизация по updated_at видела отзывы разнесёнными во времени.
+        """
+        rnd: random.Random = self.rnd
+        if not count or not title_ids or not user_ids:
+            return
+        title_weights: list[float] = [
+            rnd.paretovariate(1.1) for _ in title_ids
+        ]
+        scale: float = count / sum(title_weights)
+        author_weights: list[float] = skewed_weights(rnd, len(user_ids), 1.3)
+        pk: int = self.next_id(Review)
+        for title_id, weight in zip(title_ids, title_weights):
+            amount: int = min(
+                len(user_ids), int(weight * scale + rnd.random())
+            )
+            if not amount:
+                continue
+            quality: float = rnd.gauss(7, 1.5)
+            for author in pick_distinct(rnd, author_weights, amount):
+                score: int = max(ONE_POINT, min(
+                    TEN_POINTS, round(rnd.gauss(quality, 1.8))
+                ))
+                review_ids.append(pk)
+                published: str = self.date().isoformat(' ')
+                yield (pk, title_id, user_ids[author], self.text(3, 30),
+                       score, published, published)
+                pk += 1
+
+    def comments(self, review_ids: list[int], user_ids: range,
+                 count: int) -> Iterator[tuple]:
+        """
+        Комментарии концентрируются на небольшой доле отзывов.
+        Время изменения — момент внутри дня публикации.
+        """
+        rnd: random.Random = self.rnd
+        if not review_ids:
+            return
+        review_weights: list[float] = skewed_weights(
+            rnd, len(review_ids), 1.1
+        )
+        author_weights: list[float] = skewed_weights(rnd, len(user_ids), 1.3)
+        review_total: float = review_weights[-1]
+        author_total: float = author_weights[-1]
+        last_review: int = len(review_ids) - 1
+        last_user: int = len(user_ids) - 1
+        for _ in range(count):
+            review: int = min(
+                bisect(review_weights, rnd.random() * review_total),
+                last_review
+            )
+            author: int = min(
+                bisect(author_weights, rnd.random() * author_total), last_user
+            )
+            published: datetime = self.date()
+            yield (review_ids[review], user_ids[author], self.text(2, 20),
+                   published.date().isoformat(), published.isoformat(' '))
+
+    def report(self, name: str, count: int) -> int:
+        self.stdout.write(f'{name}: {count}')
+        return count
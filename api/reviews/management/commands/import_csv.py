@@ -5,6 +5,7 @@ from django.core.management import BaseCommand
 
 from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
                             Title, User)
+from reviews.stats import rebuild_comment_stats, rebuild_title_stats
 
 
 file_category: str = './static/data/category.csv'
@@ -63,4 +64,6 @@ def load() -> bool:
                 row[key] = verify_value(key, value, model)
             obj.append(model(**row))
         model.objects.bulk_create(obj)
+    rebuild_title_stats()
+    rebuild_comment_stats()
     return True
@@ -0,0 +1,24 @@
+from django.core.management import BaseCommand
+
+from reviews.deletion import run_pending
+from reviews.models import DeletionTask
+
+
+class Command(BaseCommand):
+    """Выполнение фоновых удалений, прерванных перезапуском сервера."""
+
+    help: str = 'Runs pending user and title deletions'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Повторить задачи, завершившиеся ошибкой')
+
+    def handle(self, *args, **options) -> None:
+        statuses: list[str] = [DeletionTask.RUNNING]
+        if options['retry_failed']:
+            statuses.append(DeletionTask.FAILED)
+        DeletionTask.objects.filter(status__in=statuses).update(
+            status=DeletionTask.PENDING, error=''
+        )
+        done: int = run_pending()
+        self.stdout.write(self.style.SUCCESS(f'Processed {done} tasks'))
@@ -0,0 +1,160 @@
+from typing import Optional
+
+from django.core.management import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from api_back.cache import invalidate_title
+from api_back.prerender import refresh_reviews
+from reviews.archive import archive
+from reviews.ids import id_allocator
+from reviews.models import Comment, Review
+from reviews.shards import is_sharded, shard_aliases, shard_for, use_shard
+
+KEYS: dict = {
+    Review: ('title_id', 'author_id'),
+    Comment: ('review_id', 'author_id', 'updated_at'),
+}
+
+
+def columns(model) -> list[str]:
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def place(model, rows: list[tuple], source: str,
+          target: str) -> tuple[list, dict]:
+    """
+    Строки, которых ещё нет в целевой базе, и замены id. Строка
+    с тем же ключом уже скопирована прошлым запуском. Строка, чей id
+    занят в шарде или архиве или выдан счётчиком после включения
+    шардов (загрузка в основную базу), получает новый id.
+    """
+    names: list[str] = columns(model)
+    positions: list[int] = [names.index(name) for name in KEYS[model]]
+    ids: list[int] = [row[0] for row in rows]
+    copied: dict[tuple, int] = {
+        tuple(key): pk for pk, *key in model.objects.using(target).filter(**{
+            f'{KEYS[model][0]}__in': {row[positions[0]] for row in rows}
+        }).values_list('pk', *KEYS[model])
+    }
+    taken: set[int] = set(model.objects.using(target).filter(
+        pk__in=ids
+    ).values_list('pk', flat=True)) | archive.taken_ids(
+        model._meta.model_name, ids
+    )
+    issued: Optional[int] = None
+    if source == DEFAULT_DB_ALIAS:
+        issued = id_allocator.sequence(model).first_value
+    fresh: list[tuple] = []
+    renamed: dict[int, int] = {}
+    for row in rows:
+        key: tuple = tuple(row[index] for index in positions)
+        if key in copied:
+            if copied[key] != row[0]:
+                renamed[row[0]] = copied[key]
+            continue
+        if row[0] in taken or (issued is not None and row[0] >= issued):
+            renamed[row[0]] = id_allocator.next_id(model)
+            row = (renamed[row[0]], *row[1:])
+        fresh.append(row)
+    return fresh, renamed
+
+
+def copy_rows(model, rows: list[tuple], target: str) -> None:
+    """Вставка строк как есть, без auto_now и сигналов ORM."""
+    connection = connections[target]
+    fields: list = model._meta.concrete_fields
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO {} ({}) VALUES ({})'.format(
+                quote(model._meta.db_table),
+                ', '.join(quote(field.column) for field in fields),
+                ', '.join(['%s'] * len(fields))
+            ),
+            [[field.get_db_prep_save(value, connection)
+              for field, value in zip(fields, row)] for row in rows]
+        )
+
+
+class Command(BaseCommand):
+    """
+    Перенос отзывов и комментариев в шарды их произведений: после
+    изменения REVIEW_SHARDS и после загрузки данных в основную базу.
+    Пачка сначала фиксируется в целевом шарде, потом удаляется из
+    исходной базы, так что прерванный перенос безопасно повторить.
+    """
+
+    help: str = 'Moves reviews and comments to the shards of their titles'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options) -> None:
+        if not is_sharded():
+            self.stderr.write('REVIEW_SHARDS is not set')
+            raise SystemExit(1)
+        for source in (DEFAULT_DB_ALIAS, *shard_aliases()):
+            title_ids: list[int] = [
+                title_id for title_id in Review.objects.using(
+                    source
+                ).order_by().values_list('title_id', flat=True).distinct()
+                if shard_for(title_id) != source
+            ]
+            reviews: int = 0
+            comments: int = 0
+            for title_id in title_ids:
+                moved: tuple[int, int] = self.move_title(
+                    title_id, source, options['batch_size']
+                )
+                reviews += moved[0]
+                comments += moved[1]
+                invalidate_title(title_id)
+            self.stdout.write(
+                f'{source}: moved {reviews} reviews and {comments} comments '
+                f'of {len(title_ids)} titles'
+            )
+
+    def move_title(self, title_id: int, source: str,
+                   batch_size: int) -> tuple[int, int]:
+        target: str = shard_for(title_id)
+        reviews: int = 0
+        comments: int = 0
+        renamed: dict[int, int] = {}
+        while True:
+            with transaction.atomic(using=source), (
+                    transaction.atomic(using=target)):
+                rows: list[tuple] = list(Review.objects.using(source).filter(
+                    title_id=title_id
+                ).order_by('pk').values_list(*columns(Review))[:batch_size])
+                if not rows:
+                    break
+                review_ids: list[int] = [row[0] for row in rows]
+                thread: list[tuple] = list(Comment.objects.using(
+                    source
+                ).filter(review_id__in=review_ids).order_by('pk').values_list(
+                    *columns(Comment)
+                ))
+                fresh, batch_renamed = place(Review, rows, source, target)
+                position: int = columns(Comment).index('review_id')
+                thread = [
+                    (*row[:position],
+                     batch_renamed.get(row[position], row[position]),
+                     *row[position + 1:])
+                    for row in thread
+                ]
+                fresh_comments, _ = place(Comment, thread, source, target)
+                copy_rows(Review, fresh, target)
+                copy_rows(Comment, fresh_comments, target)
+                Comment.objects.using(source).filter(
+                    review_id__in=review_ids
+                ).delete()
+                Review.objects.using(source).filter(
+                    pk__in=review_ids
+                ).delete()
+                renamed.update(batch_renamed)
+                reviews += len(rows)
+                comments += len(thread)
+        if renamed:
+            with use_shard(title_id):
+                refresh_reviews(renamed.values())
+        return reviews, comments
@@ -0,0 +1,64 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import BaseCommand
+
+from api_back.warmup import HttpWarmup, hot_paths
+
+
+class Command(BaseCommand):
+    """
+    Прогрев кэшей работающего сервера после выкладки: самые частые
+    запросы из журнала доступа или карточки и отзывы произведений
+    с наибольшим числом отзывов запрашиваются по HTTP в несколько
+    потоков, пока не выйдет время. Печатается доля попаданий в кэш
+    до и после прогрева по заголовку X-Cache ответов сервера.
+    """
+
+    help: str = 'Preloads caches with the hottest API requests'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--access-log', type=Path,
+                            help='Журнал доступа nginx/gunicorn')
+        parser.add_argument('--limit', type=int,
+                            default=settings.WARM_CACHES_LIMIT,
+                            help='Сколько адресов прогреть')
+        parser.add_argument('--workers', type=int,
+                            default=settings.WARM_CACHES_WORKERS)
+        parser.add_argument('--seconds', type=float,
+                            default=settings.WARM_CACHES_SECONDS,
+                            help='Время на прогрев')
+        parser.add_argument('--host', default=settings.WARM_CACHES_HOST,
+                            help='Host, с которым приходят клиенты: '
+                                 'он входит в ключи кэша и ссылки')
+        parser.add_argument('--address',
+                            help='Адрес сервера (host:port), если запросы '
+                                 'нужно отправить не на --host')
+        parser.add_argument('--scheme', choices=('http', 'https'),
+                            default='http')
+
+    def handle(self, *args, **options) -> None:
+        if isinstance(caches['default'], LocMemCache):
+            self.stderr.write(
+                'Кэш Django не общий (нет MEMCACHED_LOCATION): прогреются '
+                'только воркеры, которые ответили на запросы.'
+            )
+        paths: list[str] = hot_paths(options['limit'], options['access_log'])
+        report: dict = HttpWarmup(
+            options['host'], options['scheme'], options['address']
+        ).warm(paths, options['workers'], options['seconds'])
+        self.stdout.write(
+            'warmed {} of {} paths in {:.1f}s ({} skipped, {} errors)'.format(
+                report['requested'], len(paths), report['seconds'],
+                report['skipped'], report['errors']
+            )
+        )
+        self.stdout.write(
+            'hit ratio: {:.1f}% before, {:.1f}% after '
+            '({} cached responses)'.format(
+                report['hit_ratio_before'] * 100,
+                report['hit_ratio_after'] * 100, report['cached']
+            )
+        )
@@ -0,0 +1,60 @@
+# Generated by Django 3.2 on 2026-10-19 05:11
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_title_stats(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    TitleStats = apps.get_model('reviews', 'TitleStats')
+    counters = {}
+    for title_id, score, amount in Review.objects.order_by().values_list(
+            'title_id', 'score').annotate(amount=Count('id')):
+        counters.setdefault(title_id, {})[score] = amount
+    stats = []
+    for title_id in Title.objects.values_list('pk', flat=True).iterator():
+        histogram = counters.get(title_id, {})
+        stats.append(TitleStats(
+            title_id=title_id,
+            reviews_count=sum(histogram.values()),
+            score_sum=sum(score * amount
+                          for score, amount in histogram.items()),
+            **{f'score_{score}': amount
+               for score, amount in histogram.items()}
+        ))
+    TitleStats.objects.bulk_create(stats, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleStats',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='reviews.title', verbose_name='Произведение')),
+                ('reviews_count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('score_sum', models.PositiveIntegerField(default=0, verbose_name='Сумма оценок')),
+                ('score_1', models.PositiveIntegerField(default=0, verbose_name='1 балл')),
+                ('score_2', models.PositiveIntegerField(default=0, verbose_name='2 балла')),
+                ('score_3', models.PositiveIntegerField(default=0, verbose_name='3 балла')),
+                ('score_4', models.PositiveIntegerField(default=0, verbose_name='4 балла')),
+                ('score_5', models.PositiveIntegerField(default=0, verbose_name='5 баллов')),
+                ('score_6', models.PositiveIntegerField(default=0, verbose_name='6 баллов')),
+                ('score_7', models.PositiveIntegerField(default=0, verbose_name='7 баллов')),
+                ('score_8', models.PositiveIntegerField(default=0, verbose_name='8 баллов')),
+                ('score_9', models.PositiveIntegerField(default=0, verbose_name='9 баллов')),
+                ('score_10', models.PositiveIntegerField(default=0, verbose_name='10 баллов')),
+            ],
+            options={
+                'verbose_name': 'Статистика произведения',
+                'verbose_name_plural': 'Статистика произведений',
+            },
+        ),
+        migrations.RunPython(fill_title_stats, migrations.RunPython.noop),
+    ]
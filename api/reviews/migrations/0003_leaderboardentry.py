@@ -0,0 +1,70 @@
+# Generated by Django 3.2 on 2026-10-19 05:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from reviews.constants import (LEADERBOARD_ALL, RATING_PRIOR_MEAN,
+                               RATING_PRIOR_WEIGHT)
+
+
+def fill_leaderboard(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    TitleStats = apps.get_model('reviews', 'TitleStats')
+    GenreTitle = apps.get_model('reviews', 'GenreTitle')
+    LeaderboardEntry = apps.get_model('reviews', 'LeaderboardEntry')
+    ratings = {
+        title_id: (RATING_PRIOR_MEAN * RATING_PRIOR_WEIGHT + score_sum) / (
+            RATING_PRIOR_WEIGHT + reviews_count)
+        for title_id, score_sum, reviews_count in TitleStats.objects.
+        values_list('title_id', 'score_sum', 'reviews_count').iterator()
+    }
+    scopes = {}
+    for title_id, genre_id in GenreTitle.objects.values_list(
+            'title_id', 'genre_id'):
+        scopes.setdefault(title_id, []).append(f'genre:{genre_id}')
+    entries = []
+    for title_id, category_id in Title.objects.values_list(
+            'pk', 'category_id').iterator():
+        title_scopes = [LEADERBOARD_ALL, *scopes.get(title_id, ())]
+        if category_id is not None:
+            title_scopes.append(f'category:{category_id}')
+        entries.extend(
+            LeaderboardEntry(
+                scope=scope, title_id=title_id,
+                weighted_rating=ratings.get(title_id, RATING_PRIOR_MEAN)
+            )
+            for scope in title_scopes
+        )
+    LeaderboardEntry.objects.bulk_create(entries, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_titlestats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=64, verbose_name='Срез рейтинга')),
+                ('weighted_rating', models.FloatField(verbose_name='Взвешенный рейтинг')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Позиция в рейтинге',
+                'verbose_name_plural': 'Позиции в рейтинге',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['scope', '-weighted_rating', 'title'], name='leaderboard_scope_rating'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='leaderboardentry',
+            unique_together={('scope', 'title')},
+        ),
+        migrations.RunPython(fill_leaderboard, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 3.2 on 2026-10-19 05:14
+
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, FloatField
+
+
+def fill_rating(apps, schema_editor):
+    TitleStats = apps.get_model('reviews', 'TitleStats')
+    TitleStats.objects.filter(reviews_count__gt=0).update(
+        rating=ExpressionWrapper(
+            F('score_sum') * 1.0 / F('reviews_count'),
+            output_field=FloatField()
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_leaderboardentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='titlestats',
+            name='rating',
+            field=models.FloatField(null=True, verbose_name='Средняя оценка'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', 'id'], name='title_year_id'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['name', 'id'], name='title_name_id'),
+        ),
+        migrations.AddIndex(
+            model_name='titlestats',
+            index=models.Index(fields=['rating', 'title'], name='stats_rating'),
+        ),
+        migrations.AddIndex(
+            model_name='titlestats',
+            index=models.Index(fields=['reviews_count', 'title'], name='stats_reviews_count'),
+        ),
+        migrations.RunPython(fill_rating, migrations.RunPython.noop),
+    ]
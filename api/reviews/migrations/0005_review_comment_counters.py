@@ -0,0 +1,57 @@
+# Generated by Django 3.2 on 2026-10-19 05:19
+
+from datetime import datetime, time, timezone
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def fill_comment_counters(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Comment = apps.get_model('reviews', 'Comment')
+    reviews = []
+    for review_id, amount, last_date in Comment.objects.order_by().values(
+            'review_id').annotate(
+            amount=Count('id'), last_date=Max('pub_date')
+    ).values_list('review_id', 'amount', 'last_date').iterator():
+        reviews.append(Review(
+            pk=review_id,
+            comments_count=amount,
+            last_comment_at=datetime.combine(
+                last_date, time.min, tzinfo=timezone.utc
+            )
+        ))
+    Review.objects.bulk_update(
+        reviews, ('comments_count', 'last_comment_at'), batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_title_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество комментариев'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='last_comment_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Время последнего комментария'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['title', 'comments_count', 'id'], name='review_title_comments'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['title', 'last_comment_at', 'id'], name='review_title_activity'),
+        ),
+        migrations.RunPython(
+            fill_comment_counters, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-19 05:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_delta_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='rendered',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Готовое JSON-представление'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rendered',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Готовое JSON-представление'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2 on 2026-10-19 05:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_prerendered_json'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdSequence',
+            fields=[
+                ('name', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='Модель')),
+                ('first_value', models.PositiveBigIntegerField(verbose_name='Первый выданный id')),
+                ('next_value', models.PositiveBigIntegerField(verbose_name='Следующий свободный id')),
+            ],
+            options={
+                'verbose_name': 'Счётчик id',
+                'verbose_name_plural': 'Счётчики id',
+            },
+        ),
+    ]
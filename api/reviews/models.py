@@ -70,14 +70,31 @@ class Title(models.Model):
         null=True,
         verbose_name='Категория'
     )
+    is_deleted = models.BooleanField(
+        default=False,
+        verbose_name='Удалено'
+    )
+    rendered = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Готовое JSON-представление'
+    )
 
     def __str__(self):
         return self.name[:COUNT_CHARACTERS]
 
     class Meta:
-        """Модель Мета. Обозначены правила сортировки."""
+        """
+        Модель Мета. Обозначены правила сортировки.
+        Индексы обслуживают сортировку по году и названию с добором по id.
+        """
 
         ordering: tuple[str] = ('year',)
+        indexes: tuple = (
+            models.Index(fields=('year', 'id'), name='title_year_id'),
+            models.Index(fields=('name', 'id'), name='title_name_id'),
+        )
         verbose_name: str = 'Произведение'
         verbose_name_plural: str = 'Произведения'
 
@@ -139,14 +156,51 @@ class Review(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество комментариев'
+    )
+    last_comment_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Время последнего комментария'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Время изменения'
+    )
+    rendered = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Готовое JSON-представление'
+    )
 
     class Meta:
         """
         Модель Мета. Обозначены правила сортировки.
         Обозначена уникальность полей.
+        Индексы обслуживают сортировку отзывов произведения
+        по обсуждаемости и последней активности,
+        а также выборку изменений для синхронизации.
         """
 
         unique_together: tuple[str] = ('title', 'author')
+        indexes: tuple = (
+            models.Index(
+                fields=('title', 'comments_count', 'id'),
+                name='review_title_comments'
+            ),
+            models.Index(
+                fields=('title', 'last_comment_at', 'id'),
+                name='review_title_activity'
+            ),
+            models.Index(
+                fields=('title', 'updated_at', 'id'),
+                name='review_title_updated'
+            ),
+            models.Index(fields=('updated_at', 'id'), name='review_updated'),
+        )
         ordering: tuple[str] = ('-pub_date',)
         verbose_name: str = 'Отзыв'
         verbose_name_plural: str = 'Отзывы'
@@ -155,6 +209,111 @@ class Review(models.Model):
         return self.text
 
 
+class TitleStats(models.Model):
+    """Модель накопленной статистики оценок произведения"""
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Произведение'
+    )
+    reviews_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество отзывов'
+    )
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Сумма оценок'
+    )
+    rating = models.FloatField(
+        null=True,
+        verbose_name='Средняя оценка'
+    )
+    score_1 = models.PositiveIntegerField(default=0, verbose_name='1 балл')
+    score_2 = models.PositiveIntegerField(default=0, verbose_name='2 балла')
+    score_3 = models.PositiveIntegerField(default=0, verbose_name='3 балла')
+    score_4 = models.PositiveIntegerField(default=0, verbose_name='4 балла')
+    score_5 = models.PositiveIntegerField(default=0, verbose_name='5 баллов')
+    score_6 = models.PositiveIntegerField(default=0, verbose_name='6 баллов')
+    score_7 = models.PositiveIntegerField(default=0, verbose_name='7 баллов')
+    score_8 = models.PositiveIntegerField(default=0, verbose_name='8 баллов')
+    score_9 = models.PositiveIntegerField(default=0, verbose_name='9 баллов')
+    score_10 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='10 баллов'
+    )
+
+    class Meta:
+        """
+        Модель Мета. Задает имя в admin панели.
+        Индексы обслуживают сортировку произведений по рейтингу
+        и количеству отзывов.
+        """
+
+        indexes: tuple = (
+            models.Index(fields=('rating', 'title'), name='stats_rating'),
+            models.Index(
+                fields=('reviews_count', 'title'), name='stats_reviews_count'
+            ),
+        )
+        verbose_name: str = 'Статистика произведения'
+        verbose_name_plural: str = 'Статистика произведений'
+
+    def __str__(self):
+        return f'{self.title_id}: {self.reviews_count}'
+
+    @property
+    def histogram(self) -> list[int]:
+        """Количество отзывов с каждой оценкой от 1 до 10."""
+        return [
+            getattr(self, f'score_{score}')
+            for score in range(ONE_POINT, TEN_POINTS + 1)
+        ]
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Модель позиции произведения в рейтинге.
+    Для каждого произведения хранится строка в общем рейтинге,
+    в рейтинге своей категории и в рейтинге каждого своего жанра.
+    """
+
+    scope = models.CharField(
+        max_length=64,
+        verbose_name='Срез рейтинга'
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries',
+        verbose_name='Произведение'
+    )
+    weighted_rating = models.FloatField(
+        verbose_name='Взвешенный рейтинг'
+    )
+
+    class Meta:
+        """
+        Модель Мета. Обозначена уникальность полей.
+        Индекс покрывает чтение страницы среза в порядке рейтинга.
+        """
+
+        unique_together: tuple[str] = ('scope', 'title')
+        indexes: tuple = (
+            models.Index(
+                fields=('scope', '-weighted_rating', 'title'),
+                name='leaderboard_scope_rating'
+            ),
+        )
+        verbose_name: str = 'Позиция в рейтинге'
+        verbose_name_plural: str = 'Позиции в рейтинге'
+
+    def __str__(self):
+        return f'{self.scope}: {self.title_id}'
+
+
 class Comment(models.Model):
     """Модель комментраиев"""
 
@@ -178,13 +337,209 @@ class Comment(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Время изменения'
+    )
 
     class Meta:
-        """Модель Мета. Обозначены правила сортировки."""
+        """
+        Модель Мета. Обозначены правила сортировки.
+        Индексы обслуживают выборку изменений для синхронизации.
+        """
 
+        indexes: tuple = (
+            models.Index(
+                fields=('review', 'updated_at', 'id'),
+                name='comment_review_updated'
+            ),
+            models.Index(fields=('updated_at', 'id'), name='comment_updated'),
+        )
         ordering: tuple[str] = ('-pub_date',)
         verbose_name: str = 'Комментарий'
         verbose_name_plural: str = 'Комментарии'
 
     def __str__(self):
         return self.text
+
+
+class DeletionTask(models.Model):
+    """Модель фонового удаления пользователя или произведения"""
+
+    TITLE: str = 'title'
+    USER: str = 'user'
+    KIND_CHOICES: tuple = (
+        (TITLE, 'Произведение'),
+        (USER, 'Пользователь'),
+    )
+    PENDING: str = 'pending'
+    RUNNING: str = 'running'
+    DONE: str = 'done'
+    FAILED: str = 'failed'
+    STATUS_CHOICES: tuple = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Завершено'),
+        (FAILED, 'Ошибка'),
+    )
+
+    kind = models.CharField(
+        max_length=16,
+        choices=KIND_CHOICES,
+        verbose_name='Тип объекта'
+    )
+    object_id = models.PositiveBigIntegerField(
+        verbose_name='ID объекта'
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        db_index=True,
+        verbose_name='Статус'
+    )
+    reviews_deleted = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Удалено отзывов'
+    )
+    comments_deleted = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Удалено комментариев'
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name='Ошибка'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано'
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Завершено'
+    )
+
+    class Meta:
+        """Модель Мета. Обозначены правила сортировки."""
+
+        ordering: tuple[str] = ('-created_at',)
+        verbose_name: str = 'Фоновое удаление'
+        verbose_name_plural: str = 'Фоновые удаления'
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}: {self.status}'
+
+
+class Tombstone(models.Model):
+    """
+    Модель отметки об удалении отзыва или комментария.
+    Клиенты синхронизации узнают по ней, что строку нужно удалить.
+    Комментарии удалённого отзыва отдельных отметок не получают.
+    """
+
+    REVIEW: str = 'review'
+    COMMENT: str = 'comment'
+    KIND_CHOICES: tuple = (
+        (REVIEW, 'Отзыв'),
+        (COMMENT, 'Комментарий'),
+    )
+
+    kind = models.CharField(
+        max_length=16,
+        choices=KIND_CHOICES,
+        verbose_name='Тип объекта'
+    )
+    object_id = models.PositiveBigIntegerField(
+        verbose_name='ID объекта'
+    )
+    title_id = models.PositiveBigIntegerField(
+        verbose_name='ID произведения'
+    )
+    review_id = models.PositiveBigIntegerField(
+        null=True,
+        verbose_name='ID отзыва'
+    )
+    deleted_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Время удаления'
+    )
+
+    class Meta:
+        """
+        Модель Мета. Индексы обслуживают выборку удалений
+        по произведению, отзыву и по всей базе.
+        """
+
+        indexes: tuple = (
+            models.Index(
+                fields=('kind', 'title_id', 'deleted_at', 'id'),
+                name='tombstone_title'
+            ),
+            models.Index(
+                fields=('review_id', 'deleted_at', 'id'),
+                name='tombstone_review'
+            ),
+            models.Index(fields=('deleted_at', 'id'), name='tombstone_time'),
+        )
+        verbose_name: str = 'Отметка об удалении'
+        verbose_name_plural: str = 'Отметки об удалении'
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
+
+
+class IdSequence(models.Model):
+    """
+    Модель счётчика глобальных id отзывов и комментариев.
+    При разнесении по шардам id выдаются из него блоками,
+    чтобы строки разных шардов не получали одинаковых id.
+    """
+
+    name = models.CharField(
+        max_length=64,
+        primary_key=True,
+        verbose_name='Модель'
+    )
+    first_value = models.PositiveBigIntegerField(
+        verbose_name='Первый выданный id'
+    )
+    next_value = models.PositiveBigIntegerField(
+        verbose_name='Следующий свободный id'
+    )
+
+    class Meta:
+        """Модель Мета."""
+
+        verbose_name: str = 'Счётчик id'
+        verbose_name_plural: str = 'Счётчики id'
+
+    def __str__(self):
+        return f'{self.name}: {self.next_value}'
+
+
+class CatalogVersion(models.Model):
+    """
+    Модель версии каталога. Процессы сверяют с ней индексы и кэши
+    каталога в своей памяти: запись в каталог меняет версию в базе,
+    и изменение видят все процессы, даже без общего кэша.
+    """
+
+    key = models.CharField(
+        max_length=64,
+        primary_key=True,
+        verbose_name='Ключ'
+    )
+    version = models.CharField(
+        max_length=32,
+        verbose_name='Версия'
+    )
+
+    class Meta:
+        """Модель Мета."""
+
+        verbose_name: str = 'Версия каталога'
+        verbose_name_plural: str = 'Версии каталога'
+
+    def __str__(self):
+        return f'{self.key}: {self.version}'
@@ -0,0 +1,54 @@
+from typing import Optional
+
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Max, QuerySet
+from django.utils.functional import cached_property
+
+COUNT_LIMIT: int = 10000
+
+
+def estimated_rows(queryset: QuerySet) -> int:
+    """
+    Оценка числа строк таблицы по статистике базы без COUNT(*):
+    reltuples в PostgreSQL, sqlite_stat1 после ANALYZE в SQLite,
+    иначе наибольший id.
+    """
+    connection = connections[queryset.db]
+    table: str = queryset.model._meta.db_table
+    query: Optional[str] = {
+        'postgresql': 'SELECT reltuples::bigint FROM pg_class '
+                      'WHERE relname = %s',
+        'sqlite': 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+    }.get(connection.vendor)
+    if query is not None:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(query, (table,))
+                row: Optional[tuple] = cursor.fetchone()
+        except DatabaseError:
+            row = None
+        if row is not None:
+            estimate: int = int(str(row[0]).split()[0])
+            if estimate >= 0:
+                return estimate
+    return queryset.model._default_manager.using(queryset.db).aggregate(
+        highest=Max('pk')
+    )['highest'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор админки для больших таблиц. Без фильтров число строк
+    оценивается по статистике базы, небольшие таблицы, фильтры и поиск
+    считаются точно, но не дальше COUNT_LIMIT строк.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        queryset: QuerySet = self.object_list
+        if not queryset.query.where:
+            estimate: int = estimated_rows(queryset)
+            if estimate > COUNT_LIMIT:
+                return estimate
+        return queryset.order_by()[:COUNT_LIMIT].count()
@@ -0,0 +1,155 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from hashlib import blake2b
+from typing import Any, Iterator, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.backends.signals import connection_created
+from django.db.models import Model, QuerySet
+from django.dispatch import receiver
+
+from .models import Comment, Review, Title, User
+
+SHARDED_MODELS: tuple[str, ...] = ('review', 'comment')
+
+current_shard: ContextVar[Optional[str]] = ContextVar(
+    'current_shard', default=None
+)
+
+
+def shard_aliases() -> list[str]:
+    """Алиасы баз-шардов отзывов и комментариев, пусто — без шардов."""
+    return list(settings.REVIEW_SHARDS)
+
+
+def is_sharded() -> bool:
+    return bool(settings.REVIEW_SHARDS)
+
+
+def shard_for(title_id: Any) -> str:
+    """
+    Шард произведения по рандеву-хешированию: при добавлении шарда
+    на него переезжает только его доля произведений.
+    """
+    aliases: list[str] = shard_aliases()
+    if not aliases:
+        return DEFAULT_DB_ALIAS
+    return max(aliases, key=lambda alias: blake2b(
+        f'{alias}:{int(title_id)}'.encode(), digest_size=8
+    ).digest())
+
+
+def review_databases() -> list[str]:
+    """
+    Базы, где ищутся отзывы и комментарии: шард запроса, если он
+    выбран, иначе все шарды и основная база со строками, которые
+    ещё не разнесены rebalance_shards.
+    """
+    if not is_sharded():
+        return [DEFAULT_DB_ALIAS]
+    alias: Optional[str] = current_shard.get()
+    if alias is not None:
+        return [alias]
+    return [*shard_aliases(), DEFAULT_DB_ALIAS]
+
+
+def on_shards(queryset: QuerySet) -> list[QuerySet]:
+    """Выборка, разложенная по базам review_databases()."""
+    return [queryset.using(alias) for alias in review_databases()]
+
+
+@contextmanager
+def use_shard(title_id: Any) -> Iterator[str]:
+    """Направляет запросы к отзывам и комментариям в шард произведения."""
+    alias: str = shard_for(title_id)
+    token = current_shard.set(alias if is_sharded() else None)
+    try:
+        yield alias
+    finally:
+        current_shard.reset(token)
+
+
+def deleted_ids(model: type[Model]) -> list[int]:
+    return list(model.objects.filter(
+        is_deleted=True
+    ).values_list('pk', flat=True))
+
+
+def live_authors(queryset: QuerySet, field: str = 'author') -> QuerySet:
+    """
+    Исключает строки удалённых пользователей. В шарде нет таблицы
+    пользователей, поэтому там вместо JOIN используется список id.
+    """
+    if not is_sharded():
+        return queryset.filter(**{f'{field}__is_deleted': False})
+    return queryset.exclude(**{f'{field}_id__in': deleted_ids(User)})
+
+
+def live_titles(queryset: QuerySet, field: str = 'title') -> QuerySet:
+    """Исключает строки удалённых произведений, как live_authors."""
+    if not is_sharded():
+        return queryset.filter(**{f'{field}__is_deleted': False})
+    return queryset.exclude(**{f'{field}_id__in': deleted_ids(Title)})
+
+
+def with_authors(queryset: QuerySet) -> QuerySet:
+    """Авторы строк одним запросом: JOIN или отдельная выборка."""
+    if not is_sharded():
+        return queryset.select_related('author')
+    return queryset.prefetch_related('author')
+
+
+class ShardRouter:
+    """
+    Роутер баз: отзывы и комментарии лежат в шарде своего
+    произведения, остальные модели — в основной базе. Шард берётся
+    из строки, с которой связан запрос, или из use_shard(); без них
+    запросы идут в основную базу.
+    """
+
+    def db_for_model(self, model: type[Model],
+                     **hints: Any) -> Optional[str]:
+        if not is_sharded():
+            return None
+        if model._meta.model_name not in SHARDED_MODELS:
+            return DEFAULT_DB_ALIAS
+        instance: Optional[Model] = hints.get('instance')
+        if isinstance(instance, (Review, Comment)) and instance._state.db:
+            return instance._state.db
+        if isinstance(instance, Review):
+            return shard_for(instance.title_id)
+        if isinstance(instance, Title):
+            return shard_for(instance.pk)
+        if isinstance(instance, Comment) and Comment.review.is_cached(
+                instance):
+            return instance.review._state.db
+        return current_shard.get() or DEFAULT_DB_ALIAS
+
+    db_for_read = db_for_model
+    db_for_write = db_for_model
+
+    def allow_relation(self, obj1: Model, obj2: Model,
+                       **hints: Any) -> Optional[bool]:
+        if is_sharded():
+            return True
+        return None
+
+    def allow_migrate(self, db: str, app_label: str,
+                      model_name: Optional[str] = None,
+                      **hints: Any) -> Optional[bool]:
+        if db in shard_aliases():
+            return app_label == 'reviews' and model_name in SHARDED_MODELS
+        return None
+
+
+@receiver(connection_created)
+def disable_shard_foreign_keys(sender: Any, connection: Any,
+                               **kwargs: Any) -> None:
+    """
+    Произведения и пользователи лежат в основной базе, так что
+    внешние ключи шарда проверить нельзя: SQLite их не проверяет.
+    """
+    if connection.alias in shard_aliases() and connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA foreign_keys = OFF')
@@ -0,0 +1,237 @@
+from collections import defaultdict
+from datetime import datetime, time, timezone
+from typing import Iterable, Optional
+
+from django.db import connections
+from django.db.models import (Case, Count, Exists, ExpressionWrapper, F,
+                              FloatField, Max, OuterRef, Q, QuerySet, Value,
+                              When)
+from django.utils import timezone as django_timezone
+
+from .archive import archive
+from .constants import (LEADERBOARD_ALL, ONE_POINT, RATING_PRIOR_MEAN,
+                        RATING_PRIOR_WEIGHT, TEN_POINTS)
+from .models import (Comment, GenreTitle, LeaderboardEntry, Review, Title,
+                     TitleStats)
+from .shards import on_shards
+
+
+def score_field(score: int) -> str:
+    """Имя счётчика гистограммы для оценки."""
+    return f'score_{score}'
+
+
+def weighted_rating(score_sum: int, reviews_count: int) -> float:
+    """
+    Байесовская оценка: среднее, притянутое к априорному значению.
+    Произведения с одним отзывом не поднимаются на вершину рейтинга.
+    """
+    return (RATING_PRIOR_MEAN * RATING_PRIOR_WEIGHT + score_sum) / (
+        RATING_PRIOR_WEIGHT + reviews_count
+    )
+
+
+def category_scope(category_id: int) -> str:
+    return f'category:{category_id}'
+
+
+def genre_scope(genre_id: int) -> str:
+    return f'genre:{genre_id}'
+
+
+def change_score(title_id: int, added: Optional[int] = None,
+                 removed: Optional[int] = None) -> None:
+    """
+    Инкрементально обновляет статистику произведения одним UPDATE.
+    Если строки статистики ещё нет, она пересчитывается целиком.
+    """
+    if added == removed:
+        return
+    changes: dict = {}
+    count_delta: int = 0
+    sum_delta: int = 0
+    if added is not None:
+        changes[score_field(added)] = F(score_field(added)) + 1
+        count_delta += 1
+        sum_delta += added
+    if removed is not None:
+        changes[score_field(removed)] = F(score_field(removed)) - 1
+        count_delta -= 1
+        sum_delta -= removed
+    if count_delta:
+        changes['reviews_count'] = F('reviews_count') + count_delta
+    changes['score_sum'] = F('score_sum') + sum_delta
+    changes['rating'] = Case(
+        When(reviews_count=-count_delta, then=Value(None)),
+        default=ExpressionWrapper(
+            (F('score_sum') + sum_delta) * 1.0
+            / (F('reviews_count') + count_delta),
+            output_field=FloatField()
+        ),
+        output_field=FloatField()
+    )
+    if not TitleStats.objects.filter(title_id=title_id).update(**changes):
+        rebuild_title_stats((title_id,))
+        return
+    score_sum, reviews_count = TitleStats.objects.values_list(
+        'score_sum', 'reviews_count'
+    ).get(title_id=title_id)
+    LeaderboardEntry.objects.filter(title_id=title_id).update(
+        weighted_rating=weighted_rating(score_sum, reviews_count)
+    )
+
+
+def rebuild_title_stats(title_ids: Optional[Iterable[int]] = None) -> None:
+    """
+    Пересчитывает статистику по отзывам всех или указанных произведений
+    во всех шардах, включая перенесённые в архив.
+    """
+    titles = Title.objects.all()
+    reviews = Review.objects.all()
+    stale = TitleStats.objects.all()
+    if title_ids is not None:
+        title_ids = list(title_ids)
+        titles = titles.filter(pk__in=title_ids)
+        reviews = reviews.filter(title_id__in=title_ids)
+        stale = stale.filter(title_id__in=title_ids)
+    counters: dict[int, dict] = defaultdict(dict)
+    for shard in on_shards(reviews):
+        for title_id, score, amount in shard.order_by().values_list(
+                'title_id', 'score').annotate(amount=Count('id')):
+            counters[title_id][score] = (
+                counters[title_id].get(score, 0) + amount
+            )
+    for title_id, histogram in archive.histograms(title_ids).items():
+        for score, amount in histogram.items():
+            counters[title_id][score] = (
+                counters[title_id].get(score, 0) + amount
+            )
+    stats: list[TitleStats] = []
+    for title_id in titles.values_list('pk', flat=True).iterator():
+        histogram: dict = counters.get(title_id, {})
+        reviews_count: int = sum(histogram.values())
+        score_sum: int = sum(
+            score * amount for score, amount in histogram.items()
+        )
+        stats.append(TitleStats(
+            title_id=title_id,
+            reviews_count=reviews_count,
+            score_sum=score_sum,
+            rating=score_sum / reviews_count if reviews_count else None,
+            **{
+                score_field(score): histogram.get(score, 0)
+                for score in range(ONE_POINT, TEN_POINTS + 1)
+            }
+        ))
+    stale.delete()
+    TitleStats.objects.bulk_create(stats, batch_size=5000)
+    rebuild_leaderboard(title_ids)
+
+
+def rebuild_leaderboard(title_ids: Optional[Iterable[int]] = None) -> None:
+    """
+    Пересоздаёт позиции произведений во всех срезах рейтинга.
+    Вызывается при изменении категории или жанров произведения.
+    """
+    stats = TitleStats.objects.all()
+    titles = Title.objects.filter(is_deleted=False)
+    links = GenreTitle.objects.all()
+    entries = LeaderboardEntry.objects.all()
+    if title_ids is not None:
+        title_ids = list(title_ids)
+        stats = stats.filter(title_id__in=title_ids)
+        titles = titles.filter(pk__in=title_ids)
+        links = links.filter(title_id__in=title_ids)
+        entries = entries.filter(title_id__in=title_ids)
+    ratings: dict[int, float] = {
+        title_id: weighted_rating(score_sum, reviews_count)
+        for title_id, score_sum, reviews_count in stats.values_list(
+            'title_id', 'score_sum', 'reviews_count').iterator()
+    }
+    scopes: dict[int, list[str]] = defaultdict(list)
+    for title_id, genre_id in links.values_list('title_id', 'genre_id'):
+        scopes[title_id].append(genre_scope(genre_id))
+    new_entries: list[LeaderboardEntry] = []
+    for title_id, category_id in titles.values_list(
+            'pk', 'category_id').iterator():
+        rating: float = ratings.get(title_id, RATING_PRIOR_MEAN)
+        title_scopes: list[str] = [LEADERBOARD_ALL, *scopes[title_id]]
+        if category_id is not None:
+            title_scopes.append(category_scope(category_id))
+        new_entries.extend(
+            LeaderboardEntry(scope=scope, title_id=title_id,
+                             weighted_rating=rating)
+            for scope in title_scopes
+        )
+    entries.delete()
+    LeaderboardEntry.objects.bulk_create(new_entries, batch_size=5000)
+
+
+def change_comments(review_id: int, delta: int) -> None:
+    """
+    Обновляет счётчик комментариев отзыва одним UPDATE.
+    Новый комментарий сдвигает время последней активности,
+    удаление последнего комментария его сбрасывает.
+    """
+    now: datetime = django_timezone.now()
+    if delta > 0:
+        last_comment_at = now
+    else:
+        last_comment_at = Case(
+            When(comments_count__lte=-delta, then=Value(None)),
+            default=F('last_comment_at')
+        )
+    Review.objects.filter(pk=review_id).update(
+        comments_count=F('comments_count') + delta,
+        last_comment_at=last_comment_at,
+        updated_at=now
+    )
+
+
+def rebuild_comment_stats(review_ids: Optional[Iterable[int]] = None) -> None:
+    """
+    Пересчитывает счётчики комментариев всех или указанных отзывов
+    в каждом шарде.
+    """
+    reviews = Review.objects.all()
+    comments = Comment.objects.all()
+    if review_ids is not None:
+        review_ids = list(review_ids)
+        reviews = reviews.filter(pk__in=review_ids)
+        comments = comments.filter(review_id__in=review_ids)
+    for shard in on_shards(reviews):
+        count_comments(shard, comments.using(shard.db))
+
+
+def count_comments(reviews: QuerySet, comments: QuerySet) -> None:
+    """
+    Счётчики комментариев по правилу change_comments: время последнего
+    комментария сбрасывается только у отзывов без комментариев,
+    записанное время не меняется. Пустое время заполняется датой
+    последнего комментария (полночь UTC): точнее даты pub_date
+    комментария не хранит. updated_at не трогается, чтобы пересчёт
+    не заставлял клиентов синхронизации перекачивать отзывы.
+    """
+    connection = connections[reviews.db]
+    reviews.filter(
+        Q(comments_count__gt=0) | Q(last_comment_at__isnull=False),
+        ~Exists(comments.filter(review_id=OuterRef('pk')))
+    ).update(comments_count=0, last_comment_at=None)
+    rows: list[tuple] = [
+        (amount, connection.ops.adapt_datetimefield_value(
+            datetime.combine(last_date, time.min, tzinfo=timezone.utc)
+        ), review_id)
+        for review_id, amount, last_date in comments.order_by().values(
+            'review_id').annotate(
+            amount=Count('id'), last_date=Max('pub_date')
+        ).values_list('review_id', 'amount', 'last_date').iterator()
+    ]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'UPDATE {quote(Review._meta.db_table)} '
+            f'SET {quote("comments_count")} = %s, '
+            f'{quote("last_comment_at")} = COALESCE('
+            f'{quote("last_comment_at")}, %s) WHERE {quote("id")} = %s',
+            rows
+        )
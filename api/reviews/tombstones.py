@@ -0,0 +1,24 @@
+from typing import Iterable
+
+from .models import Tombstone
+
+
+def bury_reviews(rows: Iterable[tuple[int, int]]) -> None:
+    """Отметки об удалении отзывов по парам (id отзыва, id произведения)."""
+    Tombstone.objects.bulk_create(
+        Tombstone(kind=Tombstone.REVIEW, object_id=review_id,
+                  title_id=title_id)
+        for review_id, title_id in rows
+    )
+
+
+def bury_comments(rows: Iterable[tuple[int, int, int]]) -> None:
+    """
+    Отметки об удалении комментариев по тройкам
+    (id комментария, id отзыва, id произведения).
+    """
+    Tombstone.objects.bulk_create(
+        Tombstone(kind=Tombstone.COMMENT, object_id=comment_id,
+                  review_id=review_id, title_id=title_id)
+        for comment_id, review_id, title_id in rows
+    )
@@ -0,0 +1,83 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from reviews.models import Category, Genre, GenreTitle, Title, TitleStats
+
+
+@pytest.fixture(autouse=True)
+def local_cache(settings):
+    """
+    Кэш в памяти даже при заданном MEMCACHED_LOCATION; очищается после
+    каждого теста. Версии каталога откатываются вместе с транзакцией
+    теста, и индексы процесса перестраиваются под данные следующего.
+    """
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create(
+        username='admin', email='admin@example.com', role='admin'
+    )
+
+
+@pytest.fixture
+def admin_api_client(admin):
+    client = APIClient()
+    token = RefreshToken.for_user(admin).access_token
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.fixture
+def make_catalog():
+    """
+    Каталог из titles произведений: категория по кругу,
+    у каждого произведения два соседних жанра.
+    """
+    def make(titles, genres=4, categories=2):
+        genre_list = [
+            Genre.objects.create(
+                name=f'Genre {number}', slug=f'genre-{number}'
+            )
+            for number in range(genres)
+        ]
+        category_list = [
+            Category.objects.create(
+                name=f'Category {number}', slug=f'category-{number}'
+            )
+            for number in range(categories)
+        ]
+        title_list = [
+            Title.objects.create(
+                name=f'Title {number}', year=1990 + number % 30,
+                category=category_list[number % categories]
+            )
+            for number in range(titles)
+        ]
+        TitleStats.objects.bulk_create(
+            TitleStats(title=title) for title in title_list
+        )
+        GenreTitle.objects.bulk_create(
+            GenreTitle(
+                title=title, genre=genre_list[(number + shift) % genres]
+            )
+            for number, title in enumerate(title_list)
+            for shift in (0, 1)
+        )
+        return title_list
+
+    return make
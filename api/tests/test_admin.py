@@ -0,0 +1,320 @@
+import pytest
+from django.db import connection
+from django.db.models import Max
+
+from reviews import paginators
+from reviews.models import (Category, Comment, DeletionTask, Genre,
+                            GenreTitle, LeaderboardEntry, Review, Title,
+                            TitleStats, Tombstone)
+from reviews.paginators import EstimatedCountPaginator, estimated_rows
+from reviews.stats import genre_scope, rebuild_leaderboard, weighted_rating
+
+pytestmark = pytest.mark.django_db
+
+
+def make_titles(rows, django_user_model=None):
+    category = Category.objects.create(name='Category', slug='category')
+    return [
+        Title.objects.create(name=f'Title {number}', year=2000,
+                             category=category)
+        for number in range(rows)
+    ]
+
+
+def make_users(rows, django_user_model):
+    return [
+        django_user_model.objects.create(
+            username=f'user-{number}', email=f'user-{number}@example.com'
+        )
+        for number in range(rows)
+    ]
+
+
+def make_reviews(rows, django_user_model):
+    title = make_titles(1)[0]
+    return [
+        Review.objects.create(title=title, author=author, text='Text',
+                              score=5)
+        for author in make_users(rows, django_user_model)
+    ]
+
+
+def make_categories(rows, django_user_model):
+    for number in range(rows):
+        Category.objects.create(name=f'C {number}', slug=f'c-{number}')
+
+
+def make_genres(rows, django_user_model):
+    for number in range(rows):
+        Genre.objects.create(name=f'G {number}', slug=f'g-{number}')
+
+
+def make_genre_titles(rows, django_user_model):
+    genre = Genre.objects.create(name='Genre', slug='genre')
+    for title in make_titles(rows):
+        GenreTitle.objects.create(title=title, genre=genre)
+
+
+def make_comments(rows, django_user_model):
+    review = make_reviews(1, django_user_model)[0]
+    for _ in range(rows):
+        Comment.objects.create(review=review, author=review.author,
+                               text='Text')
+
+
+def make_tasks(rows, django_user_model):
+    for number in range(rows):
+        DeletionTask.objects.create(kind='title', object_id=number + 1)
+
+
+# Запросов на список не больше при любом числе строк: сессия,
+# пользователь, оценка числа строк или COUNT, страница, связи.
+CHANGELISTS = (
+    ('reviews/category', make_categories, 5),
+    ('reviews/genre', make_genres, 5),
+    ('reviews/title', make_titles, 7),
+    ('reviews/genretitle', make_genre_titles, 6),
+    ('reviews/review', make_reviews, 6),
+    ('reviews/comment', make_comments, 6),
+    ('reviews/deletiontask', make_tasks, 5),
+    ('users/user', make_users, 6),
+)
+
+
+def has_statistics():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        )
+        return cursor.fetchone() is not None
+
+
+def analyze():
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+@pytest.mark.parametrize('rows', (3, 120))
+@pytest.mark.parametrize('changelist, fill, queries', CHANGELISTS)
+def test_changelist_queries(admin_client, django_user_model,
+                            django_assert_num_queries, changelist, fill,
+                            queries, rows):
+    fill(rows, django_user_model)
+    with django_assert_num_queries(queries):
+        response = admin_client.get(f'/admin/{changelist}/')
+    assert response.status_code == 200
+    changes = response.context['cl']
+    assert len(changes.result_list) == min(changes.queryset.count(), 100)
+
+
+def test_estimated_rows_without_statistics(monkeypatch):
+    monkeypatch.setattr(paginators, 'COUNT_LIMIT', 10)
+    make_titles(30)
+    Title.objects.filter(pk__in=Title.objects.order_by('pk')[:5]).delete()
+    assert not has_statistics()
+    highest = Title.objects.aggregate(highest=Max('pk'))['highest']
+    assert estimated_rows(Title.objects.all()) == highest
+    paginator = EstimatedCountPaginator(Title.objects.order_by('pk'), 10)
+    assert paginator.count == highest
+
+
+def test_estimated_rows_with_statistics(monkeypatch,
+                                        django_assert_num_queries):
+    monkeypatch.setattr(paginators, 'COUNT_LIMIT', 10)
+    make_titles(30)
+    analyze()
+    assert has_statistics()
+    Title.objects.filter(pk__in=Title.objects.order_by('pk')[:5]).delete()
+    # Оценка по статистике одним запросом, без COUNT(*).
+    with django_assert_num_queries(1):
+        paginator = EstimatedCountPaginator(Title.objects.order_by('pk'), 10)
+        assert paginator.count == 30
+
+
+@pytest.mark.parametrize('statistics', (False, True))
+def test_estimated_count_exact_below_limit(statistics):
+    make_titles(8)
+    if statistics:
+        analyze()
+    Title.objects.filter(pk=Title.objects.order_by('pk')[0].pk).delete()
+    paginator = EstimatedCountPaginator(Title.objects.order_by('pk'), 5)
+    assert paginator.count == 7
+    assert paginator.num_pages == 2
+
+
+@pytest.mark.parametrize('statistics', (False, True))
+def test_estimated_count_limits_filtered(monkeypatch, statistics):
+    monkeypatch.setattr(paginators, 'COUNT_LIMIT', 10)
+    titles = make_titles(30)
+    if statistics:
+        analyze()
+    filtered = Title.objects.filter(pk__gte=titles[5].pk).order_by('pk')
+    assert EstimatedCountPaginator(filtered, 10).count == 10
+    small = Title.objects.filter(pk__gte=titles[25].pk).order_by('pk')
+    assert EstimatedCountPaginator(small, 10).count == 5
+
+
+def test_changelist_uses_statistics(admin_client, monkeypatch,
+                                    django_assert_max_num_queries):
+    monkeypatch.setattr(paginators, 'COUNT_LIMIT', 10)
+    make_titles(30)
+    analyze()
+    with django_assert_max_num_queries(7) as queries:
+        response = admin_client.get('/admin/reviews/title/')
+    assert response.status_code == 200
+    assert response.context['cl'].result_count == 30
+    assert not [query for query in queries.captured_queries
+                if 'COUNT(' in query['sql']]
+
+
+@pytest.fixture
+def on_commit(django_capture_on_commit_callbacks):
+    """Выполняет колбэки фиксации транзакции, как после ответа админки."""
+    return lambda: django_capture_on_commit_callbacks(execute=True)
+
+
+@pytest.fixture
+def title(make_catalog):
+    title = make_catalog(1)[0]
+    rebuild_leaderboard()
+    return title
+
+
+def post(client, url, data=None):
+    response = client.post(url, data or {})
+    assert response.status_code == 302
+    return response
+
+
+def test_admin_review_writes_update_stats(admin_client, django_user_model,
+                                          title, on_commit):
+    authors = make_users(2, django_user_model)
+    with on_commit():
+        for author, score in zip(authors, (4, 8)):
+            post(admin_client, '/admin/reviews/review/add/', {
+                'title': title.pk, 'author': author.pk,
+                'text': 'Text', 'score': score,
+            })
+    review = Review.objects.get(author=authors[0])
+    with on_commit():
+        post(admin_client, f'/admin/reviews/review/{review.pk}/change/', {
+            'text': 'Text', 'score': 10,
+        })
+    stats = TitleStats.objects.get(title=title)
+    assert (stats.reviews_count, stats.score_sum, stats.rating) == (
+        2, 18, 9.0
+    )
+    assert (stats.score_4, stats.score_8, stats.score_10) == (0, 1, 1)
+    assert set(LeaderboardEntry.objects.filter(title=title).values_list(
+        'weighted_rating', flat=True
+    )) == {weighted_rating(18, 2)}
+    with on_commit():
+        post(admin_client, f'/admin/reviews/review/{review.pk}/delete/',
+             {'post': 'yes'})
+    stats.refresh_from_db()
+    assert (stats.reviews_count, stats.score_sum, stats.score_10) == (
+        1, 8, 0
+    )
+    assert Tombstone.objects.filter(kind=Tombstone.REVIEW,
+                                    object_id=review.pk).exists()
+
+
+def test_admin_review_keeps_relations_and_counters(admin_client, title,
+                                                   django_user_model):
+    author, other = make_users(2, django_user_model)
+    review = Review.objects.create(title=title, author=author, text='Text',
+                                   score=5)
+    other_title = Title.objects.create(name='Other', year=2000)
+    post(admin_client, f'/admin/reviews/review/{review.pk}/change/', {
+        'title': other_title.pk, 'author': other.pk, 'text': 'Text',
+        'score': 5, 'comments_count': 7,
+    })
+    review.refresh_from_db()
+    assert (review.title_id, review.author_id, review.comments_count) == (
+        title.pk, author.pk, 0
+    )
+
+
+def test_admin_comment_writes_update_review(admin_client, django_user_model,
+                                            title, on_commit):
+    author = make_users(1, django_user_model)[0]
+    review = Review.objects.create(title=title, author=author, text='Text',
+                                   score=5)
+    with on_commit():
+        post(admin_client, '/admin/reviews/comment/add/', {
+            'review': review.pk, 'author': author.pk, 'text': 'Text',
+        })
+    review.refresh_from_db()
+    assert review.comments_count == 1
+    assert review.last_comment_at is not None
+    comment = Comment.objects.get(review=review)
+    with on_commit():
+        post(admin_client, '/admin/reviews/comment/', {
+            'action': 'delete_selected', '_selected_action': [comment.pk],
+            'post': 'yes',
+        })
+    review.refresh_from_db()
+    assert (review.comments_count, review.last_comment_at) == (0, None)
+    assert Tombstone.objects.filter(kind=Tombstone.COMMENT,
+                                    object_id=comment.pk).exists()
+
+
+def test_admin_genre_link_updates_index(admin_client, api_client, title,
+                                        on_commit):
+    genre = Genre.objects.get(slug='genre-3')
+    url = '/api/v1/titles/?genre=genre-3'
+    assert api_client.get(url).data['count'] == 0
+    with on_commit():
+        post(admin_client, '/admin/reviews/genretitle/add/', {
+            'title': title.pk, 'genre': genre.pk,
+        })
+    assert api_client.get(url).data['count'] == 1
+    assert api_client.get(
+        '/api/v1/titles/facets/'
+    ).data['genre']['genre-3'] == 1
+    assert LeaderboardEntry.objects.filter(
+        title=title, scope=genre_scope(genre.pk)
+    ).exists()
+    link = GenreTitle.objects.get(title=title, genre=genre)
+    with on_commit():
+        post(admin_client, f'/admin/reviews/genretitle/{link.pk}/delete/',
+             {'post': 'yes'})
+    assert api_client.get(url).data['count'] == 0
+    assert not LeaderboardEntry.objects.filter(
+        title=title, scope=genre_scope(genre.pk)
+    ).exists()
+
+
+def test_admin_category_rename_updates_index(admin_client, api_client, title,
+                                             on_commit):
+    category = title.category
+    assert api_client.get(
+        f'/api/v1/titles/?category={category.slug}'
+    ).data['count'] == 1
+    api_client.get(f'/api/v1/titles/{title.pk}/')
+    with on_commit():
+        post(admin_client, f'/admin/reviews/category/{category.pk}/change/', {
+            'name': category.name, 'slug': 'renamed',
+        })
+    assert api_client.get(
+        '/api/v1/titles/?category=renamed'
+    ).data['count'] == 1
+    assert api_client.get(
+        f'/api/v1/titles/{title.pk}/'
+    ).data['category']['slug'] == 'renamed'
+
+
+def test_admin_title_delete_schedules_deletion(admin_client, api_client,
+                                               title, on_commit):
+    post(admin_client, f'/admin/reviews/title/{title.pk}/change/', {
+        'name': title.name, 'year': title.year, 'description': '',
+        'category': title.category_id, 'is_deleted': 'on',
+    })
+    assert not Title.objects.get(pk=title.pk).is_deleted
+    post(admin_client, f'/admin/reviews/title/{title.pk}/delete/',
+         {'post': 'yes'})
+    assert Title.objects.get(pk=title.pk).is_deleted
+    assert DeletionTask.objects.filter(kind=DeletionTask.TITLE,
+                                       object_id=title.pk).exists()
+    assert not LeaderboardEntry.objects.filter(title=title).exists()
+    assert api_client.get(f'/api/v1/titles/{title.pk}/').status_code == 404
@@ -0,0 +1,42 @@
+import pytest
+
+from reviews.deletion import process, run_pending, schedule_title_deletion
+from reviews.models import DeletionTask, Review, Title
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def title_with_reviews(make_catalog, django_user_model):
+    title = make_catalog(1)[0]
+    for number in range(3):
+        author = django_user_model.objects.create(
+            username=f'author{number}', email=f'author{number}@example.com'
+        )
+        Review.objects.create(title=title, author=author, text='Текст',
+                              score=5)
+    return title
+
+
+def test_run_pending_deletes_title(title_with_reviews):
+    task = schedule_title_deletion(title_with_reviews)
+    assert run_pending() == 1
+    task.refresh_from_db()
+    assert task.status == DeletionTask.DONE
+    assert task.reviews_deleted == 3
+    assert not Title.objects.filter(pk=title_with_reviews.pk).exists()
+
+
+def test_task_claimed_by_another_worker_is_skipped(title_with_reviews):
+    task = schedule_title_deletion(title_with_reviews)
+    # Другой процесс успел забрать задачу после того, как эта копия
+    # прочитала её из очереди.
+    DeletionTask.objects.filter(pk=task.pk).update(
+        status=DeletionTask.RUNNING
+    )
+    assert process(task) is False
+    task.refresh_from_db()
+    assert task.status == DeletionTask.RUNNING
+    assert task.reviews_deleted == 0
+    assert Review.objects.filter(title=title_with_reviews).count() == 3
+    assert run_pending() == 0
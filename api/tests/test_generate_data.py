@@ -0,0 +1,51 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+from reviews.models import Comment, Review, Title
+
+pytestmark = pytest.mark.django_db
+
+
+def generate(**options):
+    arguments = [
+        f'--{name.replace("_", "-")}={value}'
+        for name, value in {
+            'users': 20, 'categories': 2, 'genres': 3, 'titles': 30,
+            'reviews': 100, 'comments': 50, **options,
+        }.items()
+    ]
+    call_command('generate_data', *arguments, stdout=None)
+
+
+# Команда меняет PRAGMA SQLite, что возможно только вне транзакции.
+@pytest.mark.django_db(transaction=True)
+def test_generate_data_spreads_updated_at():
+    generate()
+    reviews = list(Review.objects.values_list('pub_date', 'updated_at'))
+    assert reviews
+    assert all(pub_date == updated_at for pub_date, updated_at in reviews)
+    assert len({updated_at for _, updated_at in reviews}) == len(reviews)
+    comments = list(Comment.objects.values_list('pub_date', 'updated_at'))
+    assert comments
+    assert all(updated_at.date() == pub_date
+               for pub_date, updated_at in comments)
+
+
+@pytest.mark.parametrize('options', (
+    {'categories': 0},
+    {'genres': 0},
+    {'users': 0},
+    {'titles': 0},
+    {'comments': -1},
+))
+def test_generate_data_rejects_empty_choices(options):
+    with pytest.raises(CommandError):
+        generate(**options)
+    assert not Title.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_generate_data_without_titles():
+    generate(titles=0, reviews=0, comments=10, categories=0, genres=0)
+    assert not Title.objects.exists()
+    assert not Comment.objects.exists()
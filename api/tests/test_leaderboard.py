@@ -0,0 +1,59 @@
+import pytest
+
+from reviews.constants import LEADERBOARD_ALL
+from reviews.models import LeaderboardEntry, Title
+
+pytestmark = pytest.mark.django_db
+
+URL = '/api/v1/titles/leaderboard/'
+
+
+@pytest.fixture
+def leaderboard(make_catalog):
+    """Рейтинг с повторами: по три произведения на каждое значение."""
+    titles = make_catalog(25)
+    for number, title in enumerate(titles):
+        LeaderboardEntry.objects.create(
+            scope=LEADERBOARD_ALL, title=title,
+            weighted_rating=float(9 - number // 3)
+        )
+    return list(LeaderboardEntry.objects.filter(
+        scope=LEADERBOARD_ALL
+    ).order_by('-weighted_rating', 'title_id').values_list(
+        'title_id', flat=True
+    ))
+
+
+def test_leaderboard_pages_by_key(api_client, leaderboard,
+                                  django_assert_num_queries):
+    ids, url = [], URL
+    while url:
+        # Страница с произведениями и категориями, жанры страницы;
+        # без COUNT и OFFSET.
+        with django_assert_num_queries(2) as queries:
+            response = api_client.get(url)
+        assert response.status_code == 200
+        assert set(response.data) == {'next', 'results'}
+        assert not [query for query in queries.captured_queries
+                    if 'COUNT(' in query['sql'] or 'OFFSET' in query['sql']]
+        ids += [entry['id'] for entry in response.data['results']]
+        url = response.data['next']
+    assert ids == leaderboard
+
+
+def test_leaderboard_pages_do_not_shift(api_client, leaderboard):
+    first = api_client.get(URL).data
+    category = Title.objects.get(pk=leaderboard[0]).category
+    LeaderboardEntry.objects.create(
+        scope=LEADERBOARD_ALL, weighted_rating=10.0,
+        title=Title.objects.create(name='New', year=2000, category=category)
+    )
+    second = api_client.get(first['next']).data
+    assert [entry['id'] for entry in second['results']] == leaderboard[10:20]
+
+
+@pytest.mark.parametrize('cursor', ('broken', 'WzFd', 'WyJhIiwxXQ'))
+def test_leaderboard_invalid_cursor(api_client, leaderboard, cursor):
+    response = api_client.get(URL, {'cursor': cursor})
+    assert response.status_code == 400
+    assert set(response.data) == {'cursor'}
@@ -0,0 +1,79 @@
+import pytest
+
+from api_back.catalog import SNAPSHOT_VERSION_KEY, touch_catalog
+from api_back.serializers import ReadOnlyTitleSerializer
+from api_back.snapshot import catalog_snapshot
+from api_back.views import TitleViewSet
+from reviews.models import TitleStats
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def catalog(make_catalog):
+    """Произведения с дробным рейтингом, без рейтинга и с целым."""
+    titles = make_catalog(15)
+    for number, title in enumerate(titles):
+        TitleStats.objects.filter(title=title).update(
+            rating=(None, number + 0.6, 7.0)[number % 3]
+        )
+    return titles
+
+
+@pytest.fixture
+def snapshot(settings, tmp_path, catalog):
+    settings.CATALOG_SNAPSHOT = True
+    settings.CATALOG_SNAPSHOT_PATH = tmp_path / 'catalog.snapshot'
+    assert catalog_snapshot.build()
+    assert catalog_snapshot.current() is not None
+    return catalog_snapshot.current()
+
+
+@pytest.mark.parametrize('page', (1, 2))
+def test_snapshot_list_matches_serializer(api_client, settings, snapshot,
+                                          django_assert_num_queries, page):
+    url = f'/api/v1/titles/?page={page}'
+    # Без запросов к произведениям: версия снимка и рейтинги страницы.
+    with django_assert_num_queries(2):
+        from_snapshot = api_client.get(url).json()
+    settings.CATALOG_SNAPSHOT = False
+    from_database = api_client.get(url).json()
+    assert from_snapshot == from_database
+    assert {type(title['rating']) for title in from_snapshot['results']} <= {
+        int, type(None)
+    }
+
+
+def test_snapshot_detail_matches_serializer(api_client, snapshot, catalog):
+    for title in catalog[:3]:
+        expected = ReadOnlyTitleSerializer(
+            TitleViewSet.queryset.get(pk=title.pk)
+        ).data
+        assert api_client.get(f'/api/v1/titles/{title.pk}/').json() == (
+            expected
+        )
+
+
+def test_admin_title_edit_rebuilds_snapshot(admin_client, api_client,
+                                            snapshot, catalog, monkeypatch,
+                                            django_capture_on_commit_callbacks,
+                                            django_assert_num_queries):
+    # Сборка в этом же потоке: фоновый поток не видит транзакцию теста.
+    monkeypatch.setattr(catalog_snapshot, 'start_worker', lambda: (
+        touch_catalog(SNAPSHOT_VERSION_KEY), catalog_snapshot.build()
+    ))
+    title = catalog[0]
+    with django_capture_on_commit_callbacks(execute=True):
+        response = admin_client.post(
+            f'/admin/reviews/title/{title.pk}/change/', {
+                'name': 'Renamed', 'year': title.year,
+                'description': '', 'category': title.category_id,
+            }
+        )
+    assert response.status_code == 302
+    assert catalog_snapshot.current().find_title(title.pk)['name'] == (
+        'Renamed'
+    )
+    with django_assert_num_queries(2):
+        results = api_client.get('/api/v1/titles/').json()['results']
+    assert results[0]['name'] == 'Renamed'
@@ -0,0 +1,54 @@
+from datetime import datetime, time, timezone
+
+import pytest
+
+from reviews.models import Comment, Review
+from reviews.stats import change_comments, rebuild_comment_stats
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def reviews(make_catalog, django_user_model):
+    title = make_catalog(1)[0]
+    return [
+        Review.objects.create(
+            title=title, text='Text', score=5,
+            author=django_user_model.objects.create(
+                username=f'user-{number}', email=f'user-{number}@example.com'
+            )
+        )
+        for number in range(3)
+    ]
+
+
+def test_rebuild_keeps_comment_times_and_updated_at(reviews):
+    commented, filled, emptied = reviews
+    for review in (commented, filled):
+        Comment.objects.create(review=review, author=review.author,
+                               text='Text')
+    change_comments(commented.pk, 1)
+    Review.objects.filter(pk=emptied.pk).update(
+        comments_count=3, last_comment_at=commented.pub_date
+    )
+    before = {
+        review.pk: review for review in Review.objects.filter(
+            pk__in=[review.pk for review in reviews]
+        )
+    }
+    rebuild_comment_stats()
+    after = {review.pk: review for review in Review.objects.all()}
+    assert after[commented.pk].comments_count == 1
+    assert after[commented.pk].last_comment_at == (
+        before[commented.pk].last_comment_at
+    )
+    assert after[filled.pk].comments_count == 1
+    assert after[filled.pk].last_comment_at == datetime.combine(
+        Comment.objects.get(review=filled).pub_date, time.min,
+        tzinfo=timezone.utc
+    )
+    assert (after[emptied.pk].comments_count,
+            after[emptied.pk].last_comment_at) == (0, None)
+    assert {pk: review.updated_at for pk, review in after.items()} == {
+        pk: review.updated_at for pk, review in before.items()
+    }
@@ -0,0 +1,111 @@
+import pytest
+
+from reviews.models import Title
+
+pytestmark = pytest.mark.django_db
+
+FILTERS = (
+    ('genre=genre-0',
+     lambda titles: titles.filter(genre__slug='genre-0')),
+    ('genre=genre-0,genre-2',
+     lambda titles: titles.filter(
+         genre__slug__in=('genre-0', 'genre-2')
+     ).distinct()),
+    ('genre=genre-0,genre-1&genre_mode=all',
+     lambda titles: titles.filter(genre__slug='genre-0').filter(
+         genre__slug='genre-1'
+     )),
+    ('category=category-1',
+     lambda titles: titles.filter(category__slug='category-1')),
+    ('category=category-0&genre=genre-2,genre-3',
+     lambda titles: titles.filter(
+         category__slug='category-0',
+         genre__slug__in=('genre-2', 'genre-3')
+     ).distinct()),
+)
+
+
+def expected_ids(expected):
+    return list(
+        expected(Title.objects.all()).order_by('id').values_list(
+            'id', flat=True
+        )
+    )
+
+
+@pytest.mark.parametrize('titles', (5, 60))
+@pytest.mark.parametrize('query, expected', FILTERS)
+def test_title_filters(api_client, make_catalog, django_assert_num_queries,
+                       titles, query, expected):
+    make_catalog(titles)
+    url = f'/api/v1/titles/?{query}'
+    # Версия каталога (при первом чтении — с созданием записи),
+    # построение индекса: жанры и категории произведений,
+    # затем COUNT, страница произведений и жанры страницы.
+    with django_assert_num_queries(8):
+        api_client.get(url)
+    with django_assert_num_queries(4):
+        response = api_client.get(url)
+    assert response.status_code == 200
+    ids = expected_ids(expected)
+    assert response.data['count'] == len(ids)
+    assert [title['id'] for title in response.data['results']] == ids[:10]
+
+
+@pytest.mark.parametrize('titles', (5, 60))
+def test_title_facets(api_client, make_catalog, django_assert_num_queries,
+                      titles):
+    make_catalog(titles)
+    api_client.get('/api/v1/titles/?genre=genre-1')
+    url = '/api/v1/titles/facets/?genre=genre-1'
+    # Версия каталога и выборка для подсчёта; затем только версия.
+    with django_assert_num_queries(2):
+        response = api_client.get(url)
+    with django_assert_num_queries(1):
+        assert api_client.get(url).data == response.data
+    matched = Title.objects.filter(genre__slug='genre-1')
+    assert response.data['count'] == matched.count()
+    assert response.data['genre'] == {
+        slug: matched.filter(genre__slug=slug).count()
+        for slug in ('genre-0', 'genre-1', 'genre-2')
+        if matched.filter(genre__slug=slug).exists()
+    }
+    assert sum(response.data['category'].values()) == matched.count()
+    assert sum(response.data['decade'].values()) == matched.count()
+
+
+@pytest.mark.parametrize('genres', (1, 4))
+def test_title_create_resolves_slugs_once(admin_api_client, make_catalog,
+                                          django_assert_num_queries, genres):
+    make_catalog(5)
+    data = {
+        'name': 'New',
+        'year': 2000,
+        'category': 'category-0',
+        'genre': [f'genre-{number}' for number in range(genres)],
+    }
+    # Один запрос на все slug жанров и категории, пока их нет в памяти;
+    # версию набора slug каждый запрос сверяет с базой.
+    with django_assert_num_queries(17):
+        response = admin_api_client.post('/api/v1/titles/', data,
+                                         format='json')
+    assert response.status_code == 201
+    assert [genre['slug'] for genre in response.data['genre']] == (
+        data['genre']
+    )
+    with django_assert_num_queries(14):
+        response = admin_api_client.post('/api/v1/titles/', data,
+                                         format='json')
+    assert response.status_code == 201
+
+
+def test_title_create_unknown_slug(admin_api_client, make_catalog):
+    make_catalog(1)
+    response = admin_api_client.post('/api/v1/titles/', {
+        'name': 'New',
+        'year': 2000,
+        'category': 'missing',
+        'genre': ['genre-0', 'unknown'],
+    }, format='json')
+    assert response.status_code == 400
+    assert set(response.data) == {'genre', 'category'}
@@ -0,0 +1,220 @@
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from reviews.models import DeletionTask
+
+pytestmark = pytest.mark.django_db
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+TOKEN_URL = '/api/v1/auth/token/'
+USERS_URL = '/api/v1/users/'
+ME_URL = '/api/v1/users/me/'
+USERNAME_TAKEN = 'Пользователь с таким Никнейм пользователя уже существует.'
+EMAIL_TAKEN = 'Пользователь с таким Электронная почта уже существует.'
+
+
+@pytest.fixture
+def taken(django_user_model):
+    return django_user_model.objects.create(
+        username='taken', email='taken@example.com'
+    )
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create(
+        username='user', email='u@example.com'
+    )
+
+
+@pytest.fixture
+def user_api_client(user):
+    client = APIClient()
+    token = RefreshToken.for_user(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def lookups(queries):
+    """Запросы, которые ищут пользователей по имени или почте."""
+    return [
+        query for query in queries.captured_queries
+        if query['sql'].startswith('SELECT')
+        and 'FROM "users_user"' in query['sql']
+        and ('"username" IN' in query['sql'] or '"email" =' in query['sql'])
+    ]
+
+
+def test_signup_looks_users_up_once(api_client, taken, mailoutbox,
+                                    django_assert_num_queries):
+    data = {'username': 'new', 'email': 'new@example.com'}
+    with django_assert_num_queries(2) as queries:
+        response = api_client.post(SIGNUP_URL, data)
+    assert response.status_code == 200
+    assert response.data == data
+    assert len(lookups(queries)) == 1
+    assert mailoutbox[-1].to == ['new@example.com']
+
+
+def test_signup_repeated_sends_new_code(api_client, taken, mailoutbox,
+                                        django_assert_num_queries):
+    data = {'username': 'taken', 'email': 'taken@example.com'}
+    with django_assert_num_queries(1):
+        response = api_client.post(SIGNUP_URL, data)
+    assert response.status_code == 200
+    assert response.data == data
+    assert len(mailoutbox) == 1
+
+
+@pytest.mark.parametrize('data, field, message', (
+    ({'username': 'taken', 'email': 'other@example.com'},
+     'username', USERNAME_TAKEN),
+    ({'username': 'other', 'email': 'taken@example.com'},
+     'email', EMAIL_TAKEN),
+))
+def test_signup_duplicate(api_client, taken, mailoutbox,
+                          django_assert_num_queries, data, field, message):
+    with django_assert_num_queries(1):
+        response = api_client.post(SIGNUP_URL, data)
+    assert response.status_code == 400
+    assert response.data == {field: [message]}
+    assert not mailoutbox
+
+
+def test_create_user_looks_users_up_once(admin_api_client, taken,
+                                         django_assert_num_queries):
+    # Пользователь из токена, поиск по имени и почте, INSERT.
+    with django_assert_num_queries(3) as queries:
+        response = admin_api_client.post(USERS_URL, {
+            'username': 'new', 'email': 'new@example.com'
+        })
+    assert response.status_code == 201
+    assert len(lookups(queries)) == 1
+
+
+@pytest.mark.parametrize('data, errors', (
+    ({'username': 'taken', 'email': 'other@example.com'},
+     {'Ошибка': ['Имя пользователя уже использовано!']}),
+    ({'username': 'other', 'email': 'taken@example.com'},
+     {'email': ['Значения поля должны быть уникальны.']}),
+))
+def test_create_user_duplicate(admin_api_client, taken,
+                               django_assert_num_queries, data, errors):
+    with django_assert_num_queries(2):
+        response = admin_api_client.post(USERS_URL, data)
+    assert response.status_code == 400
+    assert response.data == errors
+
+
+@pytest.mark.parametrize('data, errors', (
+    ({'username': 'taken'},
+     {'Ошибка': ['Имя пользователя уже использовано!']}),
+    ({'email': 'taken@example.com'},
+     {'email': ['Значения поля должны быть уникальны.']}),
+))
+def test_patch_user_duplicate(admin_api_client, taken, django_user_model,
+                              django_assert_num_queries, data, errors):
+    django_user_model.objects.create(username='user', email='u@example.com')
+    with django_assert_num_queries(2):
+        response = admin_api_client.patch(f'{USERS_URL}user/', data)
+    assert response.status_code == 400
+    assert response.data == errors
+
+
+def test_patch_user_looks_users_up_once(admin_api_client, django_user_model,
+                                        django_assert_num_queries):
+    django_user_model.objects.create(username='user', email='u@example.com')
+    # Пользователь из токена, поиск по имени из адреса, UPDATE.
+    with django_assert_num_queries(3):
+        response = admin_api_client.patch(f'{USERS_URL}user/', {'bio': 'Био'})
+    assert response.status_code == 200
+    assert response.data['bio'] == 'Био'
+
+
+def test_token_looks_user_up_once(api_client, user,
+                                  django_assert_num_queries):
+    code = default_token_generator.make_token(user)
+    with django_assert_num_queries(1):
+        response = api_client.post(TOKEN_URL, {
+            'username': 'user', 'confirmation_code': code
+        })
+    assert response.status_code == 200
+    assert 'token' in response.data
+
+
+@pytest.mark.parametrize('username, status_code', (
+    ('user', 400),
+    ('missing', 404),
+))
+def test_token_rejected(api_client, user, django_assert_num_queries,
+                        username, status_code):
+    with django_assert_num_queries(1):
+        response = api_client.post(TOKEN_URL, {
+            'username': username, 'confirmation_code': 'wrong'
+        })
+    assert response.status_code == status_code
+    assert 'token' not in response.data
+
+
+@pytest.mark.parametrize('username, status_code', (
+    ('user', 200),
+    ('missing', 404),
+))
+def test_get_user_looks_user_up_once(admin_api_client, user,
+                                     django_assert_num_queries, username,
+                                     status_code):
+    # Пользователь из токена и поиск по имени из адреса.
+    with django_assert_num_queries(2):
+        response = admin_api_client.get(f'{USERS_URL}{username}/')
+    assert response.status_code == status_code
+
+
+def test_delete_user_looks_user_up_once(admin_api_client, user,
+                                        django_assert_num_queries):
+    # Пользователь из токена, поиск по имени, в транзакции —
+    # скрытие пользователя и задача на удаление его данных.
+    with django_assert_num_queries(6) as queries:
+        response = admin_api_client.delete(f'{USERS_URL}user/')
+    assert response.status_code == 204
+    assert len(lookups(queries)) == 1
+    assert DeletionTask.objects.filter(kind=DeletionTask.USER,
+                                       object_id=user.pk).exists()
+
+
+def test_get_me_reads_token_user_only(user_api_client,
+                                      django_assert_num_queries):
+    with django_assert_num_queries(1):
+        response = user_api_client.get(ME_URL)
+    assert response.status_code == 200
+    assert response.data['username'] == 'user'
+
+
+@pytest.mark.parametrize('data, queries', (
+    ({'bio': 'Био'}, 2),
+    ({'username': 'renamed'}, 3),
+))
+def test_patch_me_looks_users_up_once(user_api_client,
+                                      django_assert_num_queries, data,
+                                      queries):
+    # Пользователь из токена, поиск по новому имени или почте, UPDATE.
+    with django_assert_num_queries(queries) as captured:
+        response = user_api_client.patch(ME_URL, data)
+    assert response.status_code == 200
+    assert response.data[next(iter(data))] == next(iter(data.values()))
+    assert len(lookups(captured)) == queries - 2
+
+
+@pytest.mark.parametrize('data, errors', (
+    ({'username': 'taken'},
+     {'Ошибка': ['Имя пользователя уже использовано!']}),
+    ({'email': 'taken@example.com'},
+     {'email': ['Значения поля должны быть уникальны.']}),
+))
+def test_patch_me_duplicate(user_api_client, taken,
+                            django_assert_num_queries, data, errors):
+    with django_assert_num_queries(2):
+        response = user_api_client.patch(ME_URL, data)
+    assert response.status_code == 400
+    assert response.data == errors
@@ -0,0 +1,24 @@
+import pytest
+
+from api_back.warmup import LocalWarmup
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def test_title_detail_reports_cache_status(api_client, make_catalog):
+    title = make_catalog(1)[0]
+    url = f'/api/v1/titles/{title.pk}/'
+    assert api_client.get(url)['X-Cache'] == 'MISS'
+    assert api_client.get(url)['X-Cache'] == 'HIT'
+    assert 'X-Cache' not in api_client.get('/api/v1/genres/')
+
+
+def test_local_warmup_hit_ratio(make_catalog):
+    paths = [f'/api/v1/titles/{title.pk}/' for title in make_catalog(3)]
+    report = LocalWarmup('testserver').warm(
+        paths + ['/api/v1/genres/'], workers=2, seconds=10
+    )
+    assert report['errors'] == 0
+    assert report['cached'] == 3
+    assert report['hit_ratio_before'] == 0
+    assert report['hit_ratio_after'] == 1
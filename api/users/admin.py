@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from reviews.paginators import EstimatedCountPaginator
 from users.models import User
 
 
@@ -17,7 +18,9 @@ class UserAdmin(admin.ModelAdmin):
         "username",
         "email",
     )
-    search_fields: tuple[str, str] = ("username", "email", )
+    search_fields: tuple[str, str] = ("^username", "=email", )
     list_editable: tuple[str] = ("role", )
     list_filter: tuple[str] = ("role", )
     empty_value_display: str = "-пусто-"
+    paginator = EstimatedCountPaginator
+    show_full_result_count: bool = False
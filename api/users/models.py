@@ -54,6 +54,10 @@ class User(AbstractUser):
         blank=True,
         help_text='Выберите роль пользователя',
     )
+    is_deleted = models.BooleanField(
+        verbose_name='Удалён',
+        default=False,
+    )
 
     class Meta:
         verbose_name: str = 'Пользователь'
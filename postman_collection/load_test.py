@@ -0,0 +1,460 @@
+"""
+Нагрузочное тестирование API по сценариям postman-коллекции.
+
+Каждая «листовая» папка коллекции превращается во взвешенный сценарий:
+виртуальный пользователь выбирает сценарий по весу и последовательно
+выполняет его запросы. Переменные коллекции ({{adminToken}}, {{adminTitle}}
+и т.д.) подставляются в url и тело запроса и обновляются из ответов так же,
+как это делают тест-скрипты Postman.
+
+Пример запуска с локальным сервером, поднятым из api/wsgi.py:
+
+    python load_test.py --serve wsgi --users 50 --duration 60
+
+С --memory-budget запуск завершается с ошибкой, если пик памяти
+хотя бы одного запроса (заголовок X-Memory-Peak) превысил бюджет.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+BASE_DIR: Path = Path(__file__).resolve().parent
+API_DIR: Path = BASE_DIR.parent / 'api'
+COLLECTION: Path = BASE_DIR / 'Ymdb-collection.postman_collection.json'
+SAFE_METHODS: tuple[str, ...] = ('GET', 'HEAD', 'OPTIONS')
+MEMORY_HEADER: str = 'X-Memory-Peak'
+SETUP_PASSWORD: str = '5eCretPaSsw0rD'
+SETUP_USERS: tuple[tuple[str, str, str], ...] = (
+    ('superuser', 'superuser@admin.ru', 'superuser'),
+    ('admin-user', 'admin-user@admin.ru', 'admin'),
+    ('moderator', 'moderator@admin.ru', 'moderator'),
+    ('regular-user', 'user@no-admin.ru', 'user'),
+)
+CODE_VARIABLES: dict[str, str] = {
+    'superuser': 'superuserConfirmationCode',
+    'admin-user': 'adminConfirmationCode',
+    'moderator': 'moderatorConfirmationCode',
+    'regular-user': 'userConfirmationCode',
+}
+VARIABLE: re.Pattern = re.compile(r'\{\{([$\w]+)\}\}')
+LOCAL_FROM_RESPONSE: re.Pattern = re.compile(
+    r'(\w+)\s*=\s*_\.get\(\s*responseData\s*,\s*[\'"]([\w.]+)[\'"]\s*\)'
+)
+SET_VARIABLE: re.Pattern = re.compile(
+    r'collectionVariables\.set\(\s*[\'"](\w+)[\'"]\s*,\s*(\w+)\s*\)'
+)
+
+
+@dataclass
+class RequestTemplate:
+    """Запрос коллекции с правилами извлечения переменных из ответа."""
+
+    name: str
+    method: str
+    url: str
+    body: Optional[str]
+    token: Optional[str]
+    captures: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class Scenario:
+    """Папка коллекции, выполняемая виртуальным пользователем целиком."""
+
+    name: str
+    requests: list[RequestTemplate]
+    weight: float = 1.0
+
+
+class Stats:
+    """Потокобезопасный сбор задержек и статусов по каждому запросу."""
+
+    def __init__(self) -> None:
+        self.lock: threading.Lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.client_errors: dict[str, int] = defaultdict(int)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.memory_peaks: dict[str, int] = {}
+
+    def record(self, name: str, latency: float, status: int,
+               memory_peak: Optional[int] = None) -> None:
+        with self.lock:
+            self.latencies[name].append(latency)
+            if memory_peak is not None:
+                self.memory_peaks[name] = max(
+                    self.memory_peaks.get(name, 0), memory_peak
+                )
+            if status == 0 or status >= 500:
+                self.errors[name] += 1
+            elif status >= 400:
+                self.client_errors[name] += 1
+
+
+def percentile(values: list[float], share: float) -> float:
+    if not values:
+        return 0.0
+    index: int = min(len(values) - 1, int(round(share * (len(values) - 1))))
+    return values[index]
+
+
+def capture_rules(item: dict) -> dict[str, str]:
+    """Переменные, которые тест-скрипт Postman сохраняет из ответа."""
+    script: str = '\n'.join(
+        line
+        for event in item.get('event', ())
+        if event.get('listen') == 'test'
+        for line in event['script'].get('exec', ())
+    )
+    locals_: dict[str, str] = dict(LOCAL_FROM_RESPONSE.findall(script))
+    return {
+        variable: locals_[local]
+        for variable, local in SET_VARIABLE.findall(script)
+        if local in locals_
+    }
+
+
+def bearer_token(auth: Optional[dict]) -> Optional[str]:
+    if not auth or auth.get('type') != 'bearer':
+        return None
+    for entry in auth.get('bearer', ()):
+        if entry.get('key') == 'token':
+            return entry.get('value')
+    return None
+
+
+def load_scenarios(path: Path, include_deletes: bool
+                   ) -> tuple[list[Scenario], dict[str, str]]:
+    """Разворачивает коллекцию в список сценариев и начальные переменные."""
+    collection: dict = json.loads(path.read_text(encoding='utf8'))
+    variables: dict[str, str] = {
+        entry['key']: str(entry.get('value', ''))
+        for entry in collection.get('variable', ())
+    }
+    scenarios: list[Scenario] = []
+
+    def walk(items: list, prefix: str, auth: Optional[dict]) -> None:
+        leafs: list[RequestTemplate] = []
+        for item in items:
+            item_auth: Optional[dict] = item.get('auth', auth)
+            if 'item' in item:
+                walk(item['item'], f'{prefix}{item["name"]}/', item_auth)
+                continue
+            request: dict = item['request']
+            request_auth: Optional[dict] = request.get('auth', item_auth)
+            method: str = request['method']
+            if method == 'DELETE' and not include_deletes:
+                continue
+            url: dict = request['url']
+            leafs.append(RequestTemplate(
+                name=f'{prefix}{item["name"]}',
+                method=method,
+                url=url['raw'] if isinstance(url, dict) else url,
+                body=(request.get('body') or {}).get('raw'),
+                token=bearer_token(request_auth),
+                captures=capture_rules(item),
+            ))
+        if leafs:
+            read_only: bool = all(
+                template.method in SAFE_METHODS for template in leafs
+            )
+            scenarios.append(Scenario(
+                name=prefix.rstrip('/'),
+                requests=leafs,
+                weight=10.0 if read_only else 1.0,
+            ))
+
+    walk(collection['item'], '', collection.get('auth'))
+    return scenarios, variables
+
+
+def apply_weights(scenarios: list[Scenario], spec: list[str]) -> None:
+    """Переопределяет веса: `--weight titles/get_titles_info=20`."""
+    for entry in spec:
+        prefix, _, weight = entry.partition('=')
+        for scenario in scenarios:
+            if scenario.name.startswith(prefix):
+                scenario.weight = float(weight)
+
+
+class VirtualUser(threading.Thread):
+    """Виртуальный пользователь со своей сессией и копией переменных."""
+
+    def __init__(self, number: int, base_url: str,
+                 scenarios: list[Scenario], variables: dict[str, str],
+                 stats: Stats, deadline: float, iterations: int,
+                 seed: int) -> None:
+        super().__init__(daemon=True)
+        self.number: int = number
+        self.base_url: str = base_url
+        self.scenarios: list[Scenario] = scenarios
+        self.weights: list[float] = [scenario.weight for scenario in scenarios]
+        self.variables: dict[str, str] = dict(variables)
+        self.stats: Stats = stats
+        self.deadline: float = deadline
+        self.iterations: int = iterations
+        self.random: random.Random = random.Random(seed + number)
+        self.session: requests.Session = requests.Session()
+
+    def substitute(self, value: str) -> str:
+        def replace(match: re.Match) -> str:
+            name: str = match.group(1)
+            if name == '$guid':
+                return str(uuid.uuid4())
+            if name == '$randomInt':
+                return str(self.random.randint(0, 1000))
+            if name == '$vu':
+                return str(self.number)
+            return self.variables.get(name, match.group(0))
+        return VARIABLE.sub(replace, value)
+
+    def execute(self, template: RequestTemplate) -> None:
+        parts = urlsplit(self.substitute(template.url))
+        url: str = self.base_url + parts.path
+        if parts.query:
+            url += '?' + parts.query
+        headers: dict[str, str] = {}
+        if template.token:
+            headers['Authorization'] = (
+                f'Bearer {self.substitute(template.token)}'
+            )
+        data: Optional[bytes] = None
+        if template.body:
+            data = self.substitute(template.body).encode('utf8')
+            headers['Content-Type'] = 'application/json'
+        started: float = time.perf_counter()
+        try:
+            response = self.session.request(
+                template.method, url, data=data, headers=headers, timeout=30
+            )
+        except requests.RequestException:
+            self.stats.record(template.name, time.perf_counter() - started, 0)
+            return
+        memory_peak: Optional[str] = response.headers.get(MEMORY_HEADER)
+        self.stats.record(
+            template.name, time.perf_counter() - started,
+            response.status_code,
+            int(memory_peak) if memory_peak is not None else None
+        )
+        if template.captures and response.ok:
+            self.capture(template, response)
+
+    def capture(self, template: RequestTemplate,
+                response: requests.Response) -> None:
+        try:
+            payload: Any = response.json()
+        except ValueError:
+            return
+        for variable, path in template.captures.items():
+            value: Any = payload
+            for key in path.split('.'):
+                value = value.get(key) if isinstance(value, dict) else None
+            if value is not None:
+                self.variables[variable] = str(value)
+
+    def run(self) -> None:
+        done: int = 0
+        while time.monotonic() < self.deadline and (
+                not self.iterations or done < self.iterations):
+            scenario: Scenario = self.random.choices(
+                self.scenarios, weights=self.weights
+            )[0]
+            for template in scenario.requests:
+                self.execute(template)
+            done += 1
+
+
+def setup_django(settings: str) -> None:
+    sys.path.insert(0, str(API_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings)
+
+
+def prepare_users(variables: dict[str, str]) -> None:
+    """Создаёт пользователей коллекции и их коды (как set_up_data.sh)."""
+    from django.contrib.auth.tokens import default_token_generator
+    from django.core.management import call_command
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from users.models import User
+
+    call_command('migrate', verbosity=0)
+    for username, email, role in SETUP_USERS:
+        user, _ = User.objects.get_or_create(
+            username=username, defaults={'email': email}
+        )
+        user.email = email
+        user.role = role
+        user.is_superuser = user.is_staff = role == 'superuser'
+        user.set_password(SETUP_PASSWORD)
+        user.save()
+        variables[CODE_VARIABLES[username]] = (
+            default_token_generator.make_token(user)
+        )
+        prefix: str = CODE_VARIABLES[username][:-len('ConfirmationCode')]
+        variables[f'{prefix}Token'] = str(
+            RefreshToken.for_user(user).access_token
+        )
+
+
+def serve(kind: str, port: int) -> str:
+    """Запускает приложение из api/wsgi.py или api/asgi.py в фоне."""
+    if kind == 'asgi':
+        import uvicorn
+
+        from api.asgi import application
+        server = uvicorn.Server(uvicorn.Config(
+            application, host='127.0.0.1', port=port, log_level='warning'
+        ))
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+    else:
+        from socketserver import ThreadingMixIn
+        from wsgiref.simple_server import (WSGIRequestHandler, WSGIServer,
+                                           make_server)
+
+        from api.wsgi import application
+
+        class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+            daemon_threads: bool = True
+            request_queue_size: int = 1024
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+        server = make_server('127.0.0.1', port, application,
+                             ThreadingWSGIServer, QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{port}'
+
+
+def report(stats: Stats, elapsed: float) -> None:
+    """Печатает пропускную способность, ошибки и перцентили по запросам."""
+    header: str = (
+        f'{"request":<70} {"count":>7} {"rps":>8} {"4xx%":>6} {"err%":>6} '
+        f'{"p50ms":>8} {"p95ms":>8} {"p99ms":>8}'
+    )
+    if stats.memory_peaks:
+        header += f' {"peakKiB":>9}'
+    print(header)
+    print('-' * len(header))
+    total: int = 0
+    errors: int = 0
+    for name in sorted(stats.latencies):
+        values: list[float] = sorted(stats.latencies[name])
+        count: int = len(values)
+        total += count
+        errors += stats.errors[name]
+        print(
+            f'{name[-70:]:<70} {count:>7} {count / elapsed:>8.1f} '
+            f'{stats.client_errors[name] / count * 100:>6.1f} '
+            f'{stats.errors[name] / count * 100:>6.1f} '
+            f'{percentile(values, 0.50) * 1000:>8.1f} '
+            f'{percentile(values, 0.95) * 1000:>8.1f} '
+            f'{percentile(values, 0.99) * 1000:>8.1f}'
+            + (f' {stats.memory_peaks.get(name, 0) / 1024:>9.1f}'
+               if stats.memory_peaks else '')
+        )
+    print('-' * len(header))
+    print(
+        f'total: {total} requests in {elapsed:.1f}s, '
+        f'{total / elapsed:.1f} req/s, '
+        f'error rate {errors / max(total, 1) * 100:.2f}%'
+    )
+
+
+def over_budget(stats: Stats, budget: int) -> bool:
+    """Печатает запросы, пик памяти которых превысил бюджет."""
+    if not stats.memory_peaks:
+        print(f'server sent no {MEMORY_HEADER} header: '
+              'enable MEMORY_PROFILING to check the memory budget')
+        return True
+    exceeded: dict[str, int] = {
+        name: peak for name, peak in stats.memory_peaks.items()
+        if peak > budget
+    }
+    for name, peak in sorted(exceeded.items()):
+        print(f'memory budget exceeded: {name} peaked at {peak} bytes '
+              f'(budget {budget})')
+    return bool(exceeded)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--collection', type=Path, default=COLLECTION)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--serve', choices=('wsgi', 'asgi'),
+                        help='поднять сервер из api/wsgi.py или api/asgi.py')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--settings', default='api.settings')
+    parser.add_argument('--users', type=int, default=20,
+                        help='количество виртуальных пользователей')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--iterations', type=int, default=0,
+                        help='сценариев на пользователя (0 - без лимита)')
+    parser.add_argument('--weight', action='append', default=[],
+                        metavar='PREFIX=WEIGHT')
+    parser.add_argument('--var', action='append', default=[],
+                        metavar='NAME=VALUE')
+    parser.add_argument('--include-deletes', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--memory-budget', type=int, metavar='BYTES',
+                        help='предельный пик памяти одного запроса')
+    args = parser.parse_args()
+
+    scenarios, variables = load_scenarios(args.collection,
+                                          args.include_deletes)
+    apply_weights(scenarios, args.weight)
+    scenarios = [scenario for scenario in scenarios if scenario.weight > 0]
+    base_url: str = args.base_url.rstrip('/')
+    if args.serve:
+        setup_django(args.settings)
+        import django
+        django.setup()
+        if args.memory_budget:
+            from django.conf import settings
+            settings.MEMORY_PROFILING = True
+        prepare_users(variables)
+        base_url = serve(args.serve, args.port)
+    variables.update(entry.split('=', 1) for entry in args.var)
+
+    warmup = VirtualUser(0, base_url, scenarios, variables, Stats(),
+                         float('inf'), 0, args.seed)
+    for scenario in scenarios:
+        for template in scenario.requests:
+            warmup.execute(template)
+    variables = warmup.variables
+
+    stats = Stats()
+    started: float = time.monotonic()
+    deadline: float = started + args.duration
+    workers: list[VirtualUser] = [
+        VirtualUser(number, base_url, scenarios, variables, stats, deadline,
+                    args.iterations, args.seed)
+        for number in range(1, args.users + 1)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    report(stats, time.monotonic() - started)
+    if args.memory_budget and over_budget(stats, args.memory_budget):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())